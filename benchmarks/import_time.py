@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the time it takes to import the package and its command line interface.
+
+Runs ``python -X importtime -c "import <module>"`` in fresh interpreters and reports the median cumulative import
+time of the module, the slowest modules it pulls in, and whether any of the dependencies that are only needed to
+populate the database (:data:`DEFERRED`) got imported. It exits with an error if one did, or if the median is
+above ``--max-ms``, so it can guard against regressions.
+
+Run with ``python benchmarks/import_time.py --module bio2bel_reactome.cli --repeats 5``.
+"""
+
+import statistics
+import subprocess
+import sys
+from typing import List, Mapping, Tuple
+
+import click
+
+#: Modules that are only imported once the database is populated, updated, or exported
+DEFERRED = (
+    'protmapper',
+    'flask_admin',
+    'bio2bel_reactome.batch',
+    'bio2bel_reactome.enrichment',
+    'bio2bel_reactome.export',
+    'bio2bel_reactome.hierarchy',
+    'bio2bel_reactome.parsers.entity_pathways',
+    'bio2bel_reactome.parsers.mappings',
+    'bio2bel_reactome.parsers.prefetch',
+)
+
+
+def measure_import(module: str) -> Tuple[Mapping[str, int], List[str]]:
+    """Import the module in a fresh interpreter.
+
+    :return: The cumulative import time in microseconds of each imported module, and the imported modules in order
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    cumulative, order = {}, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, _, cumulative_time, name = (part.strip() for part in line.replace(':', '|', 1).split('|'))
+        cumulative[name] = int(cumulative_time)
+        order.append(name)
+    return cumulative, order
+
+
+@click.command()
+@click.option('--module', default='bio2bel_reactome', show_default=True, help='The module to import')
+@click.option('--repeats', type=int, default=5, show_default=True)
+@click.option('--top', type=int, default=15, show_default=True, help='The number of slowest imports to show')
+@click.option('--max-ms', type=float, help='Fail if the median import time is above this many milliseconds')
+def main(module: str, repeats: int, top: int, max_ms: float):
+    """Report the import time of the module."""
+    runs = [measure_import(module) for _ in range(repeats)]
+    median_ms = statistics.median(cumulative[module] for cumulative, _ in runs) / 1000
+
+    cumulative, order = runs[-1]
+    click.echo(f'{module}: median {median_ms:.1f} ms over {repeats} runs')
+    click.echo(f'slowest of the {len(order)} imported modules (cumulative, last run):')
+    for name in sorted(cumulative, key=cumulative.get, reverse=True)[:top]:
+        click.echo(f'{cumulative[name] / 1000:10.1f} ms  {name}')
+
+    imported = [name for name in DEFERRED if name in cumulative]
+    if imported:
+        click.secho(f'imported deferred modules: {", ".join(imported)}', fg='red')
+        sys.exit(1)
+    if max_ms is not None and median_ms > max_ms:
+        click.secho(f'median {median_ms:.1f} ms is above the limit of {max_ms:.1f} ms', fg='red')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
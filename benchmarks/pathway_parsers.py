@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the parsers of the pathway hierarchy and pathway names files.
+
+Builds a synthetic hierarchy with the given number of edges, and a names table with one row per pathway, then reports
+the best time of :func:`bio2bel_reactome.parsers.pathway_hierarchy.parse_pathway_hierarchy`, its array variant, and
+the :func:`bio2bel_reactome.parsers.pathway_names.parse_pathway_names` functions, next to the previous implementations
+that went through the dataframes one row at a time.
+
+Run with ``python benchmarks/pathway_parsers.py --edges 100000``.
+"""
+
+import time
+
+import click
+import numpy as np
+import pandas as pd
+
+from bio2bel_reactome.parsers.pathway_hierarchy import parse_pathway_hierarchy, parse_pathway_hierarchy_arrays
+from bio2bel_reactome.parsers.pathway_names import parse_pathway_names, parse_pathway_names_columns
+
+
+def make_synthetic_hierarchy(edges: int, seed: int = 0) -> pd.DataFrame:
+    """Make a hierarchy where every pathway but the first has a parent among the pathways before it."""
+    rng = np.random.default_rng(seed)
+    children = np.arange(1, edges + 1)
+    parents = (rng.random(edges) * children).astype(int)
+    return pd.DataFrame({
+        0: [f'R-HSA-{i:07d}' for i in parents],
+        1: [f'R-HSA-{i:07d}' for i in children],
+    })
+
+
+def make_synthetic_names(pathways: int) -> pd.DataFrame:
+    """Make a names table whose names have surrounding whitespace, like some of the release."""
+    return pd.DataFrame({
+        0: [f'R-HSA-{i:07d}' for i in range(pathways)],
+        1: [f' Synthetic pathway {i} ' for i in range(pathways)],
+        2: 'Homo sapiens',
+    })
+
+
+def parse_pathway_hierarchy_per_row(pathway_dataframe: pd.DataFrame):
+    """Build the edges from :meth:`pandas.DataFrame.iterrows`, as done before."""
+    return [
+        (row[0], row[1])
+        for _, row in pathway_dataframe.iterrows()
+    ]
+
+
+def parse_pathway_names_per_row(pathway_names_df: pd.DataFrame):
+    """Strip the names one row at a time, as done before."""
+    pathways = {}
+    species_set = set()
+
+    for reactome_id, name, species in pathway_names_df.values:
+        pathways[reactome_id] = (name.strip(), species)
+        species_set.add(species)
+
+    return pathways, species_set
+
+
+def _best_time(func, df: pd.DataFrame, repeats: int) -> float:
+    rv = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(df)
+        rv = min(rv, time.perf_counter() - start)
+    return rv
+
+
+@click.command()
+@click.option('--edges', type=int, default=100_000, show_default=True)
+@click.option('--repeats', type=int, default=3, show_default=True)
+def main(edges: int, repeats: int):
+    """Benchmark the pathway parsers on synthetic tables."""
+    hierarchy_df = make_synthetic_hierarchy(edges)
+    names_df = make_synthetic_names(edges + 1)
+    assert parse_pathway_hierarchy(hierarchy_df) == parse_pathway_hierarchy_per_row(hierarchy_df)  # noqa: S101
+    assert parse_pathway_names(names_df) == parse_pathway_names_per_row(names_df)  # noqa: S101
+
+    benchmarks = [
+        ('hierarchy', 'per row', parse_pathway_hierarchy_per_row, hierarchy_df),
+        ('hierarchy', 'list', parse_pathway_hierarchy, hierarchy_df),
+        ('hierarchy', 'arrays', parse_pathway_hierarchy_arrays, hierarchy_df),
+        ('names', 'per row', parse_pathway_names_per_row, names_df),
+        ('names', 'dict', parse_pathway_names, names_df),
+        ('names', 'arrays', parse_pathway_names_columns, names_df),
+    ]
+    baselines = {}
+    for table, label, func, df in benchmarks:
+        elapsed = _best_time(func, df, repeats)
+        baseline = baselines.setdefault(table, elapsed)
+        click.echo(
+            f'{table:>9} {label:>7}: {elapsed * 1000:9.1f} ms ({len(df.index):,} rows, '
+            f'{baseline / elapsed:5.1f}x the per row speed)',
+        )
+
+
+if __name__ == '__main__':
+    main()
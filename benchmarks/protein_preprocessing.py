@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the preprocessing of the UniProt to Reactome file.
+
+Writes a synthetic file in the format of ``UniProt2Reactome_All_Levels.txt`` and reports the time and the peak
+memory of :func:`bio2bel_reactome.parsers.entity_pathways.get_procesed_proteins_pathways_df` on it, next to the
+previous implementation that annotated every row.
+
+Run with ``python benchmarks/protein_preprocessing.py --rows 1000000``.
+"""
+
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import click
+from protmapper.uniprot_client import get_hgnc_id, get_mnemonic
+
+from bio2bel_reactome.constants import SPECIES_REMAPPING
+from bio2bel_reactome.parsers.entity_pathways import (
+    _hgnc_id_to_name, get_procesed_proteins_pathways_df, get_proteins_pathways_df,
+)
+from bio2bel_reactome.parsers.mappings import get_species_name_to_id
+
+SPECIES = [
+    ('HSA', 'Homo sapiens'),
+    ('MMU', 'Mus musculus'),
+    ('RNO', 'Rattus norvegicus'),
+    ('CFA', 'Canis familiaris'),
+    ('DRE', 'Danio rerio'),
+]
+
+
+def write_synthetic_file(path: str, rows: int, levels: int = 8, seed: int = 0) -> None:
+    """Write a file where every accession is repeated once per pathway level, like the all-levels release."""
+    rng = random.Random(seed)
+    with open(path, 'w') as file:
+        for i in range(rows):
+            code, species = SPECIES[(i // levels) % len(SPECIES)]
+            uniprot_id = f'P{i // levels:06d}'
+            reactome_id = f'R-{code}-{rng.randrange(100_000, 120_000)}'
+            print(
+                uniprot_id,
+                reactome_id,
+                f'https://reactome.org/PathwayBrowser/#/{reactome_id}',
+                'Synthetic pathway',
+                'IEA',
+                species,
+                sep='\t',
+                file=file,
+            )
+
+
+def get_procesed_proteins_pathways_df_per_row(url: str):
+    """Annotate every row, as done before the lookups were made once per accession."""
+    df = get_proteins_pathways_df(url=url)
+    del df['reactome_link']
+    del df['reactome_name']
+    del df['evidence']
+
+    df['uniprot_accession'] = df['uniprot_id'].map(get_mnemonic)
+    df['hgnc_id'] = df['uniprot_id'].map(get_hgnc_id)
+    df['hgnc_symbol'] = df['hgnc_id'].map(_hgnc_id_to_name().get)
+
+    df['species'] = df['species'].map(lambda x: SPECIES_REMAPPING.get(x, x))
+    df['species_taxonomy_id'] = df['species'].map(get_species_name_to_id().get)
+    return df
+
+
+def _measure(func, path: str):
+    """Time the function, then run it again while tracing allocations to get its peak memory."""
+    start = time.perf_counter()
+    df = func(url=path)
+    elapsed = time.perf_counter() - start
+    size = df.memory_usage(deep=True).sum()
+    del df
+
+    tracemalloc.start()
+    func(url=path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+@click.command()
+@click.option('--rows', type=int, default=1_000_000, show_default=True)
+@click.option('--skip-per-row', is_flag=True, help='Only measure the current implementation')
+def main(rows: int, skip_per_row: bool):
+    """Benchmark the protein preprocessing on a synthetic file."""
+    # warm up the lazily loaded mappings so they are not counted
+    _hgnc_id_to_name()
+    get_species_name_to_id()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'UniProt2Reactome_All_Levels.txt')
+        write_synthetic_file(path, rows)
+
+        functions = [('per unique accession', get_procesed_proteins_pathways_df)]
+        if not skip_per_row:
+            functions.append(('per row', get_procesed_proteins_pathways_df_per_row))
+
+        for label, func in functions:
+            elapsed, peak, size = _measure(func, path)
+            click.echo(
+                f'{label:>22}: {elapsed:.2f} s, peak {peak / 2 ** 20:.1f} MiB, '
+                f'result {size / 2 ** 20:.1f} MiB ({rows:,} rows)',
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the latency of the manager's lookups with and without the lookup indexes.
+
+Fills a SQLite database with a synthetic release of roughly the size of the full Reactome one (no downloads are
+needed), then times each lookup first without :data:`bio2bel_reactome.models.LOOKUP_INDEXES` and then with them.
+
+Run with ``python benchmarks/query_latency.py --pathways 25000 --proteins 120000``.
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import click
+
+from bio2bel_reactome import Manager
+from bio2bel_reactome.bulk import bulk_insert, create_indexes, drop_indexes
+from bio2bel_reactome.models import (
+    Chemical, LOOKUP_INDEXES, Pathway, Protein, Species, chemical_pathway, protein_pathway,
+)
+
+
+def fill_synthetic_database(
+    manager: Manager,
+    n_species: int,
+    n_pathways: int,
+    n_proteins: int,
+    n_chemicals: int,
+    pathways_per_entity: int,
+    seed: int = 0,
+) -> None:
+    """Insert a synthetic release directly into the tables."""
+    rng = random.Random(seed)
+    species_rows = [
+        {'id': i + 1, 'taxonomy_id': str(9000 + i), 'name': f'Species {i}'}
+        for i in range(n_species)
+    ]
+    pathway_rows = [
+        {
+            'id': i + 1,
+            'identifier': f'R-SYN-{i:07d}',
+            'name': f'Pathway {i}',
+            'species_id': i % n_species + 1,
+            # every 50th pathway is a root, the others hang below an earlier pathway
+            'parent_id': rng.randrange(1, i + 1) if i % 50 else None,
+        }
+        for i in range(n_pathways)
+    ]
+    protein_rows = [
+        {
+            'id': i + 1,
+            'uniprot_id': f'P{i:06d}',
+            'uniprot_accession': f'P{i:06d}_SYN',
+            'hgnc_id': str(i) if i % 5 == 0 else None,
+            'hgnc_symbol': f'GENE{i}' if i % 5 == 0 else None,
+        }
+        for i in range(n_proteins)
+    ]
+    chemical_rows = [
+        {'id': i + 1, 'chebi_id': str(10000 + i), 'name': f'chemical {i}'}
+        for i in range(n_chemicals)
+    ]
+
+    def _iter_links(n_entities, column):
+        for entity_pk in range(1, n_entities + 1):
+            for pathway_pk in set(rng.randrange(1, n_pathways + 1) for _ in range(pathways_per_entity)):
+                yield {column: entity_pk, 'pathway_id': pathway_pk}
+
+    with manager.engine.begin() as connection:
+        bulk_insert(connection, Species.__table__, species_rows)
+        bulk_insert(connection, Pathway.__table__, pathway_rows)
+        bulk_insert(connection, Protein.__table__, protein_rows)
+        bulk_insert(connection, Chemical.__table__, chemical_rows)
+        bulk_insert(connection, protein_pathway, _iter_links(n_proteins, 'protein_id'))
+        bulk_insert(connection, chemical_pathway, _iter_links(n_chemicals, 'chemical_id'))
+
+
+def _get_lookups(manager: Manager, n_pathways: int, n_proteins: int, n_species: int):
+    """Get the lookups to time, each taking a random number generator."""
+    def _pathway_id(rng):
+        return f'R-SYN-{rng.randrange(n_pathways):07d}'
+
+    def _hgnc(rng):
+        return 5 * rng.randrange(n_proteins // 5)
+
+    return [
+        ('get_species_by_name', lambda rng: manager.get_species_by_name(f'Species {rng.randrange(n_species)}')),
+        ('get_pathways_by_name', lambda rng: manager.get_pathways_by_name(f'Pathway {rng.randrange(n_pathways)}')),
+        ('get_protein_by_hgnc_symbol', lambda rng: manager.get_protein_by_hgnc_symbol(f'GENE{_hgnc(rng)}')),
+        ('get_protein_by_hgnc_id', lambda rng: manager.get_protein_by_hgnc_id(str(_hgnc(rng)))),
+        ('pathway.proteins', lambda rng: manager.get_pathway_by_id(_pathway_id(rng)).proteins),
+        ('pathway.chemicals', lambda rng: manager.get_pathway_by_id(_pathway_id(rng)).chemicals),
+        ('pathway.children', lambda rng: manager.get_pathway_by_id(_pathway_id(rng)).children),
+    ]
+
+
+def _time_lookups(manager: Manager, lookups, repeats: int):
+    rv = {}
+    for name, lookup in lookups:
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            lookup(rng)
+            manager.session.expire_all()
+        rv[name] = (time.perf_counter() - start) / repeats
+    return rv
+
+
+@click.command()
+@click.option('--species', 'n_species', type=int, default=20, show_default=True)
+@click.option('--pathways', 'n_pathways', type=int, default=25_000, show_default=True)
+@click.option('--proteins', 'n_proteins', type=int, default=120_000, show_default=True)
+@click.option('--chemicals', 'n_chemicals', type=int, default=2_000, show_default=True)
+@click.option('--links', 'pathways_per_entity', type=int, default=10, show_default=True)
+@click.option('--repeats', type=int, default=50, show_default=True)
+def main(
+    n_species: int,
+    n_pathways: int,
+    n_proteins: int,
+    n_chemicals: int,
+    pathways_per_entity: int,
+    repeats: int,
+):
+    """Time the lookups of the manager before and after building the lookup indexes."""
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection='sqlite:///' + os.path.join(directory, 'reactome.db'))
+        fill_synthetic_database(manager, n_species, n_pathways, n_proteins, n_chemicals, pathways_per_entity)
+        lookups = _get_lookups(manager, n_pathways, n_proteins, n_species)
+
+        with manager.engine.begin() as connection:
+            drop_indexes(connection, LOOKUP_INDEXES)
+        before = _time_lookups(manager, lookups, repeats)
+
+        start = time.perf_counter()
+        with manager.engine.begin() as connection:
+            create_indexes(connection, LOOKUP_INDEXES)
+        click.echo(f'built {len(LOOKUP_INDEXES)} indexes in {time.perf_counter() - start:.2f} s')
+        after = _time_lookups(manager, lookups, repeats)
+        manager.session.close()
+
+    click.echo(f'{"lookup":>28} {"before (ms)":>12} {"after (ms)":>12} {"speedup":>8}')
+    for name, _ in lookups:
+        click.echo(
+            f'{name:>28} {1000 * before[name]:12.3f} {1000 * after[name]:12.3f} {before[name] / after[name]:7.1f}x',
+        )
+
+
+if __name__ == '__main__':
+    main()
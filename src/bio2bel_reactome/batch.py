@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""Score many gene lists against the pathway memberships in a process pool, streaming the results.
+
+The :class:`bio2bel_reactome.enrichment.EnrichmentIndex` is built from the database once, handed to each worker of
+the pool when it starts, and the gene lists are sent to the workers in batches. The results of each batch are written
+as soon as it is scored, in the order of the lists, so memory stays flat however many lists there are.
+
+>>> from bio2bel_reactome import Manager
+>>> from bio2bel_reactome.batch import iter_gene_list_directory, iter_scored_batches, write_enrichment_tsv
+>>> index = Manager().get_enrichment_index(species='Homo sapiens')
+>>> with open('enrichment.tsv', 'w') as file:  # doctest: +SKIP
+...     write_enrichment_tsv(iter_scored_batches(index, iter_gene_list_directory('gene_lists'), workers=4), file)
+"""
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bulk import iter_chunks
+from .enrichment import EnrichmentIndex
+
+__all__ = [
+    'GeneList',
+    'iter_gene_list_directory',
+    'iter_gmt',
+    'iter_gene_lists',
+    'iter_scored_batches',
+    'write_enrichment_tsv',
+    'write_enrichment_parquet',
+]
+
+#: A named gene list
+GeneList = Tuple[str, List[str]]
+
+#: The default number of gene lists sent to a worker at a time
+DEFAULT_BATCH_SIZE = 100
+
+#: The types of the columns of the results, for the schema of Parquet files
+RESULT_COLUMN_TYPES = {
+    'list': 'string',
+    'pathway_id': 'string',
+    'pathway_name': 'string',
+    'overlap': 'int64',
+    'mapped_proteins': 'int64',
+    'pathway_size': 'int64',
+    'query_size': 'int64',
+    'p_value': 'float64',
+    'depth': 'int64',
+    'root_id': 'string',
+    'is_root': 'bool_',
+    'significant': 'bool_',
+    'redundant': 'bool_',
+}
+
+#: The index of the worker process, set once when it starts
+_worker_index: Optional[EnrichmentIndex] = None
+
+
+def _read_genes(lines: Iterable[str]) -> List[str]:
+    """Read one gene per line, skipping empty lines and comments."""
+    return [
+        line.strip()
+        for line in lines
+        if line.strip() and not line.startswith('#')
+    ]
+
+
+def iter_gene_list_directory(directory: str) -> Iterable[GeneList]:
+    """Iterate over the gene lists in the files of a directory, in order of the file names.
+
+    Each file holds one gene per line and the list is named after the file, without its extension. Hidden files are
+    skipped.
+
+    :param directory: A directory of gene list files
+    """
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        if file_name.startswith('.') or not os.path.isfile(path):
+            continue
+        with open(path) as file:
+            yield os.path.splitext(file_name)[0], _read_genes(file)
+
+
+def iter_gmt(file: TextIO) -> Iterable[GeneList]:
+    """Iterate over the gene lists of a GMT file, one line each.
+
+    The first column is the name of the list, the second its description, which is ignored, and the rest its genes.
+
+    :param file: A GMT file, like standard input
+    """
+    for line in file:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        name, _, *genes = line.split('\t')
+        yield name, [gene for gene in genes if gene]
+
+
+def iter_gene_lists(source: str) -> Iterable[GeneList]:
+    """Iterate over the gene lists of a directory, a GMT file, or standard input.
+
+    :param source: A directory read with :func:`iter_gene_list_directory`, the path of a GMT file, or ``-`` for a GMT
+     file on standard input
+    """
+    if source == '-':
+        yield from iter_gmt(sys.stdin)
+    elif os.path.isdir(source):
+        yield from iter_gene_list_directory(source)
+    else:
+        with open(source) as file:
+            yield from iter_gmt(file)
+
+
+def _score(
+    index: EnrichmentIndex,
+    batch: List[GeneList],
+    hierarchy: bool,
+    alpha: float,
+    collapse: bool,
+) -> pd.DataFrame:
+    """Score a batch of gene lists, naming each row after its list."""
+    names = np.array([name for name, _ in batch], dtype=object)
+    gene_lists = [genes for _, genes in batch]
+    if hierarchy or collapse:
+        df = index.enrich_hierarchy(gene_lists, alpha=alpha, collapse=collapse)
+    else:
+        df = index.enrich(gene_lists)
+    df.insert(0, 'list', names[df['query'].to_numpy()])
+    return df.drop(columns=['query', 'pathway_code'])
+
+
+def _init_worker(index: EnrichmentIndex) -> None:
+    global _worker_index
+    _worker_index = index
+
+
+def _score_in_worker(batch: List[GeneList], hierarchy: bool, alpha: float, collapse: bool) -> pd.DataFrame:
+    return _score(_worker_index, batch, hierarchy, alpha, collapse)
+
+
+def iter_scored_batches(
+    index: EnrichmentIndex,
+    gene_lists: Iterable[GeneList],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    hierarchy: bool = False,
+    alpha: float = 0.05,
+    collapse: bool = False,
+) -> Iterable[Tuple[int, pd.DataFrame]]:
+    """Score the gene lists in batches, in a pool of worker processes, keeping the order of the lists.
+
+    At most two batches per worker are in flight, so the gene lists are read lazily.
+
+    :param index: The enrichment index, built once and copied to each worker
+    :param gene_lists: Named gene lists, like from :func:`iter_gene_list_directory` or :func:`iter_gmt`
+    :param batch_size: The number of gene lists scored at a time
+    :param workers: The number of worker processes. With one, the lists are scored in this process.
+    :param hierarchy: If true, annotate the results with the hierarchy, which the index needs to have
+    :param alpha: The p-value at or below which a pathway is significant, for the hierarchy annotations
+    :param collapse: If true, keep only the leaf-most significant pathways of each list
+    :return: The number of gene lists and the results of each batch, with the columns of
+     :meth:`bio2bel_reactome.enrichment.EnrichmentIndex.enrich` where ``list`` names the gene list instead of
+     ``query`` and ``pathway_code``
+    """
+    batches = iter_chunks(gene_lists, batch_size)
+    if workers <= 1:
+        for batch in batches:
+            yield len(batch), _score(index, batch, hierarchy, alpha, collapse)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index,)) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append((len(batch), executor.submit(_score_in_worker, batch, hierarchy, alpha, collapse)))
+            if len(pending) >= 2 * workers:
+                count, future = pending.popleft()
+                yield count, future.result()
+        while pending:
+            count, future = pending.popleft()
+            yield count, future.result()
+
+
+def write_enrichment_tsv(batches: Iterable[Tuple[int, pd.DataFrame]], file: TextIO) -> Tuple[int, int]:
+    """Write the results of each batch to a TSV file as soon as it is scored.
+
+    :param batches: The results of :func:`iter_scored_batches`
+    :param file: A file opened for writing, like standard output
+    :return: The number of gene lists and the number of rows written
+    """
+    lists = rows = 0
+    for count, df in batches:
+        df.to_csv(file, sep='\t', index=False, header=not lists)
+        file.flush()
+        lists += count
+        rows += len(df.index)
+    return lists, rows
+
+
+def write_enrichment_parquet(batches: Iterable[Tuple[int, pd.DataFrame]], path: str) -> Tuple[int, int]:
+    """Write the results of each batch to a Parquet file as a row group, as soon as it is scored.
+
+    This needs :mod:`pyarrow`, which comes with the ``cache`` extra. No file is written if there are no gene lists.
+
+    :param batches: The results of :func:`iter_scored_batches`
+    :param path: The path of the Parquet file
+    :return: The number of gene lists and the number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    lists = rows = 0
+    writer = None
+    try:
+        for count, df in batches:
+            if writer is None:
+                # the first batch may have no rows, so the types can not be inferred from the values
+                schema = pa.schema([
+                    (column, getattr(pa, RESULT_COLUMN_TYPES[column])())
+                    for column in df.columns
+                ])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            lists += count
+            rows += len(df.index)
+    finally:
+        if writer is not None:
+            writer.close()
+    return lists, rows
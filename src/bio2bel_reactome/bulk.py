@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for loading the Reactome tables with batched SQLAlchemy Core statements.
+
+The ORM populate path builds one Python object per row and lets the session work out the insert order. For the
+full Reactome release this means millions of objects and instrumented collections. The functions in this module
+instead write plain dictionaries with pre-assigned primary keys through ``executemany``, in chunks of a fixed size.
+"""
+
+import logging
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Set
+
+import pandas as pd
+from sqlalchemy import Index, Table, and_, bindparam, inspect, text
+
+__all__ = [
+    'DEFAULT_CHUNKSIZE',
+    'MAX_PARAMETERS',
+    'get_max_parameters',
+    'iter_chunks',
+    'bulk_insert',
+    'bulk_update',
+    'bulk_delete',
+    'drop_indexes',
+    'create_indexes',
+    'reset_sequences',
+    'none_if_nan',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The number of rows sent to the database per ``executemany`` call
+DEFAULT_CHUNKSIZE = 10_000
+
+#: The maximum number of bound parameters in one statement for each SQLAlchemy dialect. SQLite before 3.32 allows 999.
+MAX_PARAMETERS = {
+    'sqlite': 999,
+    'postgresql': 32_767,
+    'mysql': 65_535,
+    'mssql': 2_100,
+    'oracle': 1_000,  # the limit on the length of an expression list, which is what ``IN`` runs into
+}
+
+
+def get_max_parameters(dialect_name: str, reserved: int = 10) -> int:
+    """Get the number of values that can be bound in an ``IN (...)`` clause of a statement on the given dialect.
+
+    :param dialect_name: The name of a SQLAlchemy dialect, like ``sqlite``
+    :param reserved: The number of parameters kept for the rest of the statement, like a ``LIMIT``
+    """
+    return MAX_PARAMETERS.get(dialect_name, min(MAX_PARAMETERS.values())) - reserved
+
+
+def iter_chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    """Iterate over lists of at most ``size`` elements from the iterable.
+
+    :param iterable: Any iterable
+    :param size: The maximum number of elements per chunk
+    """
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert_ignoring_duplicates(connection, table: Table):
+    """Make an insert statement that skips rows whose primary key is already in the table."""
+    dialect_name = connection.dialect.name
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+
+        return insert(table).on_conflict_do_nothing()
+    if dialect_name == 'sqlite':
+        return table.insert().prefix_with('OR IGNORE')
+    if dialect_name == 'mysql':
+        return table.insert().prefix_with('IGNORE')
+    raise NotImplementedError(f'can not skip duplicate rows on {dialect_name}')
+
+
+def bulk_insert(
+    connection,
+    table: Table,
+    rows: Iterable[Mapping[str, Any]],
+    chunksize: Optional[int] = None,
+    ignore_duplicates: bool = False,
+) -> int:
+    """Insert the rows into the table with one ``executemany`` per chunk.
+
+    :param connection: A SQLAlchemy connection, preferably inside a transaction
+    :param table: The table (use ``Model.__table__`` for declarative models)
+    :param rows: Dictionaries mapping column names to values
+    :param chunksize: The number of rows per ``executemany``. Defaults to :data:`DEFAULT_CHUNKSIZE`.
+    :param ignore_duplicates: If true, skip the rows whose primary key is already in the table, with
+     ``ON CONFLICT DO NOTHING`` on PostgreSQL and ``INSERT OR IGNORE`` on SQLite
+    :return: The number of rows sent for insertion
+    """
+    statement = _insert_ignoring_duplicates(connection, table) if ignore_duplicates else table.insert()
+    count = 0
+    for chunk in iter_chunks(rows, chunksize or DEFAULT_CHUNKSIZE):
+        connection.execute(statement, chunk)
+        count += len(chunk)
+    logger.debug('inserted %d rows into %s', count, table.name)
+    return count
+
+
+def bulk_update(
+    connection,
+    table: Table,
+    values: Mapping[str, str],
+    rows: Iterable[Mapping[str, Any]],
+    chunksize: Optional[int] = None,
+) -> int:
+    """Update rows of the table, matched on their ``id`` column, with one ``executemany`` per chunk.
+
+    :param connection: A SQLAlchemy connection, preferably inside a transaction
+    :param table: The table (use ``Model.__table__`` for declarative models)
+    :param values: A mapping from the column to update to the key in each row holding its new value
+    :param rows: Dictionaries containing a ``_id`` key and the keys named in ``values``
+    :param chunksize: The number of rows per ``executemany``. Defaults to :data:`DEFAULT_CHUNKSIZE`.
+    :return: The number of updated rows
+    """
+    statement = (
+        table.update()
+        .where(table.c.id == bindparam('_id'))
+        .values({column: bindparam(key) for column, key in values.items()})
+    )
+    count = 0
+    for chunk in iter_chunks(rows, chunksize or DEFAULT_CHUNKSIZE):
+        connection.execute(statement, chunk)
+        count += len(chunk)
+    logger.debug('updated %d rows in %s', count, table.name)
+    return count
+
+
+def bulk_delete(
+    connection,
+    table: Table,
+    columns: Sequence[str],
+    rows: Iterable[Mapping[str, Any]],
+    chunksize: Optional[int] = None,
+) -> int:
+    """Delete rows of the table, matched on the given columns, with one ``executemany`` per chunk.
+
+    :param connection: A SQLAlchemy connection, preferably inside a transaction
+    :param table: The table (use ``Model.__table__`` for declarative models)
+    :param columns: The columns to match on
+    :param rows: Dictionaries holding the value to match for each column under its name prefixed with ``_``
+    :param chunksize: The number of rows per ``executemany``. Defaults to :data:`DEFAULT_CHUNKSIZE`.
+    :return: The number of rows sent for deletion
+    """
+    statement = table.delete().where(and_(*(
+        table.c[column] == bindparam(f'_{column}')
+        for column in columns
+    )))
+    count = 0
+    for chunk in iter_chunks(rows, chunksize or DEFAULT_CHUNKSIZE):
+        connection.execute(statement, chunk)
+        count += len(chunk)
+    logger.debug('deleted %d rows from %s', count, table.name)
+    return count
+
+
+def _get_index_names(connection, indexes: Iterable[Index]) -> Set[str]:
+    """Get the names of the indexes that exist on the tables of the given indexes."""
+    inspector = inspect(connection)
+    return {
+        index['name']
+        for table_name in {index.table.name for index in indexes}
+        for index in inspector.get_indexes(table_name)
+    }
+
+
+def drop_indexes(connection, indexes: Sequence[Index]) -> List[Index]:
+    """Drop the indexes that exist, so that a bulk load does not maintain them row by row.
+
+    :param connection: A SQLAlchemy connection, preferably inside a transaction
+    :param indexes: The indexes to drop
+    :return: The dropped indexes
+    """
+    existing = _get_index_names(connection, indexes)
+    rv = [index for index in indexes if index.name in existing]
+    for index in rv:
+        index.drop(connection)
+    logger.debug('dropped %d indexes', len(rv))
+    return rv
+
+
+def create_indexes(connection, indexes: Sequence[Index]) -> List[Index]:
+    """Create the indexes that are missing, for example after a bulk load or on a database made by an older version.
+
+    :param connection: A SQLAlchemy connection, preferably inside a transaction
+    :param indexes: The indexes to create
+    :return: The created indexes
+    """
+    existing = _get_index_names(connection, indexes)
+    rv = [index for index in indexes if index.name not in existing]
+    for index in rv:
+        index.create(connection)
+    logger.debug('created %d indexes', len(rv))
+    return rv
+
+
+def reset_sequences(connection, tables: Iterable[Table]) -> List[Table]:
+    """Move the sequences behind the ``id`` columns past the largest key, after rows were inserted with their keys.
+
+    Rows inserted with pre-assigned keys do not advance the sequence of a PostgreSQL ``SERIAL`` column, so the next
+    row inserted without a key would get one that is taken. Other databases assign keys from the current maximum, so
+    nothing is done on them.
+
+    :param connection: A SQLAlchemy connection, preferably inside the transaction that inserted the rows
+    :param tables: The tables with an autoincrementing ``id`` column
+    :return: The tables whose sequence was reset
+    """
+    if connection.dialect.name != 'postgresql':
+        return []
+
+    preparer = connection.dialect.identifier_preparer
+    rv = list(tables)
+    for table in rv:
+        # an empty table gets its sequence back to the start, so its next key is 1
+        statement = text(
+            "SELECT setval(pg_get_serial_sequence(:table_name, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL)"
+            f' FROM {preparer.format_table(table)}',
+        )
+        connection.execute(statement, table_name=table.fullname)
+    logger.debug('reset %d sequences', len(rv))
+    return rv
+
+
+def none_if_nan(value):
+    """Replace pandas' missing values with None so they are stored as NULL."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
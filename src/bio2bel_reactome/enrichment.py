@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+
+"""An in-memory index of the pathway memberships for batched enrichment analysis.
+
+:meth:`bio2bel.compath.CompathManager.query_hgnc_symbols` goes back to the database for every gene list and then
+loads each hit pathway with its proteins. The :class:`EnrichmentIndex` reads the memberships once, codes pathways
+and genes (or chemicals) as integers, and keeps them as a sparse matrix in compressed sparse row layout, in both
+orientations. Overlaps for many query sets are then counted with a handful of vectorized NumPy operations and scored
+with the one-sided Fisher's exact test, which is the upper tail of the hypergeometric distribution.
+
+>>> from bio2bel_reactome import Manager
+>>> from bio2bel_reactome.enrichment import EnrichmentIndex
+>>> index = EnrichmentIndex.from_manager(Manager(), species='Homo sapiens')
+>>> index.enrich([{'PFKM', 'CNNM1'}, {'SFTPD'}])  # doctest: +SKIP
+
+Since the membership files list each protein in every ancestor of its pathways, a significant pathway usually drags
+its ancestors along. With the pathway hierarchy attached (``hierarchy=True``), :meth:`EnrichmentIndex.enrich_hierarchy`
+flags those redundant ancestors and can collapse the results to the leaf-most significant pathways.
+"""
+
+import logging
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+
+from .hierarchy import PathwayHierarchy
+from .models import Chemical, Pathway, Protein, Species, chemical_pathway, protein_pathway
+
+__all__ = [
+    'EnrichmentIndex',
+    'hypergeometric_sf',
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _to_csr(rows: np.ndarray, columns: np.ndarray, data: np.ndarray, n_rows: int) -> Tuple[np.ndarray, ...]:
+    """Sort coordinates into compressed sparse row layout.
+
+    :return: The row pointers, the column indices, and the values
+    """
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, columns[order], data[order]
+
+
+def _expand_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenate ``range(start, start + length)`` for each pair, without a Python loop."""
+    total = int(lengths.sum())
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + np.arange(total, dtype=np.int64) - offsets
+
+
+def hypergeometric_sf(k: np.ndarray, n_universe: int, n_pathway: np.ndarray, n_query: np.ndarray) -> np.ndarray:
+    """Get the probability of an overlap of at least ``k`` for each triple, vectorized.
+
+    This is the p-value of the one-sided (enrichment) Fisher's exact test on the 2x2 table of the query and the
+    pathway within the universe.
+
+    :param k: The observed overlaps, at least one
+    :param n_universe: The number of genes in the universe
+    :param n_pathway: The number of genes in each pathway
+    :param n_query: The number of genes of each query found in the universe
+    """
+    k, n_pathway, n_query = (np.asarray(a, dtype=np.int64) for a in (k, n_pathway, n_query))
+    if not len(k):
+        return np.zeros(0)
+
+    log_factorial = np.zeros(n_universe + 1)
+    np.cumsum(np.log(np.arange(1, n_universe + 1)), out=log_factorial[1:])
+
+    def _log_binomial(a, b):
+        return log_factorial[a] - log_factorial[b] - log_factorial[a - b]
+
+    lengths = np.minimum(n_pathway, n_query) - k + 1
+    i = _expand_ranges(k, lengths)
+    pathway_sizes, query_sizes = np.repeat(n_pathway, lengths), np.repeat(n_query, lengths)
+    log_pmf = (
+        _log_binomial(pathway_sizes, i)
+        + _log_binomial(n_universe - pathway_sizes, query_sizes - i)
+        - _log_binomial(n_universe, query_sizes)
+    )
+    starts = np.cumsum(lengths) - lengths
+    return np.minimum(np.add.reduceat(np.exp(log_pmf), starts), 1.0)
+
+
+class EnrichmentIndex:
+    """A sparse pathway by gene (or chemical) membership matrix for batched enrichment.
+
+    Each stored value is the number of proteins of the pathway that carry the gene symbol, so that the number of
+    mapped proteins matches :meth:`bio2bel.compath.CompathManager.query_hgnc_symbols`. The universe of the tests is
+    the set of genes in the index.
+    """
+
+    def __init__(
+        self,
+        pathway_ids: Sequence[str],
+        pathway_names: Sequence[str],
+        entities: Sequence[str],
+        pathway_codes: np.ndarray,
+        entity_codes: np.ndarray,
+        counts: Optional[np.ndarray] = None,
+    ) -> None:
+        """Build the index from the coordinates of the memberships.
+
+        :param pathway_ids: The Reactome identifiers of the pathways, by code
+        :param pathway_names: The names of the pathways, by code
+        :param entities: The gene symbols (or ChEBI identifiers), by code
+        :param pathway_codes: The pathway code of each membership
+        :param entity_codes: The entity code of each membership
+        :param counts: The number of proteins behind each membership. Defaults to one.
+        """
+        self.pathway_ids = list(pathway_ids)
+        self.pathway_names = list(pathway_names)
+        self.entities = list(entities)
+        self.entity_to_code = {entity: code for code, entity in enumerate(self.entities)}
+
+        pathway_codes = np.asarray(pathway_codes, dtype=np.int64)
+        entity_codes = np.asarray(entity_codes, dtype=np.int64)
+        counts = np.ones(len(pathway_codes), dtype=np.int64) if counts is None else np.asarray(counts, np.int64)
+
+        self.pathway_indptr, self.pathway_indices, _ = _to_csr(
+            pathway_codes, entity_codes, counts, len(self.pathway_ids),
+        )
+        self.entity_indptr, self.entity_indices, self.entity_counts = _to_csr(
+            entity_codes, pathway_codes, counts, len(self.entities),
+        )
+        self.pathway_sizes = np.diff(self.pathway_indptr)
+        self._pathway_gene_sets = None
+
+        #: The depth and the identifier of the root of each pathway, and its ancestors in compressed sparse row
+        #: layout, all set by :meth:`set_hierarchy`
+        self.pathway_depths = None
+        self.pathway_root_ids = None
+        self.ancestor_indptr, self.ancestor_indices = None, None
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f'EnrichmentIndex({len(self.pathway_ids)} pathways, {len(self.entities)} entities)'
+
+    @classmethod
+    def from_manager(
+        cls,
+        manager,
+        *,
+        chemicals: bool = False,
+        species: Optional[str] = None,
+        hierarchy: bool = False,
+    ) -> 'EnrichmentIndex':
+        """Build the index from the association tables with a single query.
+
+        :param manager: A populated :class:`bio2bel_reactome.Manager`
+        :param chemicals: If true, index the ChEBI identifiers of the chemicals instead of the HGNC gene symbols
+        :param species: The name of the species whose pathways are indexed. Defaults to all.
+        :param hierarchy: If true, also load the pathway hierarchy with a second query, for
+         :meth:`enrich_hierarchy`
+        """
+        if chemicals:
+            entity, link_table = Chemical.chebi_id, chemical_pathway
+            join_on = link_table.c.chemical_id == Chemical.id
+        else:
+            entity, link_table = Protein.hgnc_symbol, protein_pathway
+            join_on = link_table.c.protein_id == Protein.id
+
+        query = (
+            manager.session.query(Pathway.identifier, Pathway.name, entity, func.count())
+            .join(link_table, link_table.c.pathway_id == Pathway.id)
+            .join(entity.class_, join_on)
+            .filter(entity.isnot(None))
+        )
+        if species is not None:
+            query = query.join(Species, Pathway.species_id == Species.id).filter(Species.name == species)
+        query = query.group_by(Pathway.identifier, Pathway.name, entity)
+
+        df = pd.DataFrame(query.all(), columns=['pathway_id', 'pathway_name', 'entity', 'count'])
+        pathway_codes, pathway_ids = pd.factorize(df['pathway_id'], sort=True)
+        entity_codes, entities = pd.factorize(df['entity'], sort=True)
+        pathway_names = df.drop_duplicates('pathway_id').set_index('pathway_id')['pathway_name']
+
+        rv = cls(
+            pathway_ids=pathway_ids,
+            pathway_names=pathway_names.reindex(pathway_ids).tolist(),
+            entities=entities,
+            pathway_codes=pathway_codes,
+            entity_codes=entity_codes,
+            counts=df['count'].to_numpy(),
+        )
+        if hierarchy:
+            rv.set_hierarchy(manager.get_hierarchy(species=species))
+        logger.info('built %r', rv)
+        return rv
+
+    def set_hierarchy(self, hierarchy: PathwayHierarchy) -> None:
+        """Precompute the depth, the root, and the ancestors of each pathway from the hierarchy.
+
+        The depth and the root follow the tree of :meth:`bio2bel_reactome.hierarchy.PathwayHierarchy.get_parent_array`,
+        like the parent references of the pathway table. The ancestors follow all parents, from
+        :meth:`bio2bel_reactome.hierarchy.PathwayHierarchy.get_transitive_closure`. Pathways missing from the hierarchy
+        are their own roots.
+
+        :param hierarchy: The hierarchy of the indexed pathways
+        """
+        n_pathways = len(self.pathway_ids)
+        hierarchy_ids = np.array(hierarchy.identifiers, dtype=object)
+        # the code of each pathway of the hierarchy in this index, or -1 for the ones without members. The extra last
+        # slot takes the writes of the indexed pathways missing from the hierarchy.
+        to_code = np.full(len(hierarchy) + 1, -1, dtype=np.int64)
+        to_code[pd.Index(hierarchy.identifiers).get_indexer(self.pathway_ids)] = np.arange(n_pathways)
+        to_code = to_code[:-1]
+
+        # the deepest row of the tree closure of a pathway goes up to its root
+        ancestors, descendants, depths = hierarchy.get_closure()
+        descendant_codes = to_code[descendants]
+        order = np.lexsort((depths, descendant_codes))
+        is_last = np.append(descendant_codes[order][1:] != descendant_codes[order][:-1], True)
+        last = order[is_last & (descendant_codes[order] >= 0)]
+        self.pathway_depths = np.zeros(n_pathways, dtype=np.int64)
+        self.pathway_depths[descendant_codes[last]] = depths[last]
+        self.pathway_root_ids = np.array(self.pathway_ids, dtype=object)
+        self.pathway_root_ids[descendant_codes[last]] = hierarchy_ids[ancestors[last]]
+
+        ancestors, descendants, distances = hierarchy.get_transitive_closure()
+        ancestor_codes, descendant_codes = to_code[ancestors], to_code[descendants]
+        is_ancestor = (distances > 0) & (ancestor_codes >= 0) & (descendant_codes >= 0)
+        self.ancestor_indptr, self.ancestor_indices, _ = _to_csr(
+            descendant_codes[is_ancestor], ancestor_codes[is_ancestor], distances[is_ancestor], n_pathways,
+        )
+
+    def get_pathway_gene_set(self, code: int) -> frozenset:
+        """Get the genes (or chemicals) of the pathway with the given code."""
+        if self._pathway_gene_sets is None:
+            self._pathway_gene_sets = [
+                frozenset(self.entities[i] for i in self.pathway_indices[start:end])
+                for start, end in zip(self.pathway_indptr[:-1], self.pathway_indptr[1:])
+            ]
+        return self._pathway_gene_sets[code]
+
+    def _encode(self, queries: Sequence[Iterable[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Code the queries' entities found in the index.
+
+        :return: The query and entity code of each (query, entity) pair, and the number of entities of each query
+        """
+        query_codes, entity_codes = [], []
+        query_sizes = np.zeros(len(queries), dtype=np.int64)
+        for i, query in enumerate(queries):
+            codes = {self.entity_to_code[entity] for entity in query if entity in self.entity_to_code}
+            query_sizes[i] = len(codes)
+            query_codes.extend([i] * len(codes))
+            entity_codes.extend(codes)
+        return np.array(query_codes, dtype=np.int64), np.array(entity_codes, dtype=np.int64), query_sizes
+
+    def enrich(self, queries: Sequence[Iterable[str]]) -> pd.DataFrame:
+        """Count and score the overlaps of many queries with all pathways at once.
+
+        :param queries: Sets of HGNC gene symbols (or ChEBI identifiers)
+        :return: One row per query and overlapping pathway, with the columns ``query`` (position in the input),
+         ``pathway_id``, ``pathway_name``, ``pathway_code``, ``overlap`` (distinct genes), ``mapped_proteins``,
+         ``pathway_size``, ``query_size`` (genes found in the index), and ``p_value``
+        """
+        query_codes, entity_codes, query_sizes = self._encode(queries)
+
+        starts = self.entity_indptr[entity_codes]
+        lengths = self.entity_indptr[entity_codes + 1] - starts
+        positions = _expand_ranges(starts, lengths)
+        keys = np.repeat(query_codes, lengths) * len(self.pathway_ids) + self.entity_indices[positions]
+
+        keys, inverse = np.unique(keys, return_inverse=True)
+        overlap = np.bincount(inverse, minlength=len(keys))
+        mapped = np.bincount(inverse, weights=self.entity_counts[positions], minlength=len(keys)).astype(np.int64)
+        query_index, pathway_codes = np.divmod(keys, len(self.pathway_ids))
+
+        pathway_sizes = self.pathway_sizes[pathway_codes]
+        return pd.DataFrame({
+            'query': query_index,
+            'pathway_id': np.array(self.pathway_ids, dtype=object)[pathway_codes],
+            'pathway_name': np.array(self.pathway_names, dtype=object)[pathway_codes],
+            'pathway_code': pathway_codes,
+            'overlap': overlap,
+            'mapped_proteins': mapped,
+            'pathway_size': pathway_sizes,
+            'query_size': query_sizes[query_index],
+            'p_value': hypergeometric_sf(overlap, len(self.entities), pathway_sizes, query_sizes[query_index]),
+        })
+
+    def annotate_hierarchy(self, df: pd.DataFrame, alpha: float = 0.05) -> pd.DataFrame:
+        """Annotate enrichment results with the place of their pathways in the hierarchy, in one vectorized pass.
+
+        :param df: Results of :meth:`enrich`
+        :param alpha: The p-value at or below which a pathway is significant
+        :return: The results with the added columns ``depth`` (the number of levels above the pathway),
+         ``root_id`` (the Reactome identifier of the top of its hierarchy), ``is_root``, ``significant``, and
+         ``redundant``, which marks significant pathways that are ancestors of another significant pathway of the
+         same query
+        :raises ValueError: If no hierarchy was set with :meth:`set_hierarchy`
+        """
+        if self.pathway_depths is None:
+            raise ValueError('set a hierarchy first, for example with EnrichmentIndex.from_manager(hierarchy=True)')
+
+        n_pathways = len(self.pathway_ids)
+        query_index, pathway_codes = df['query'].to_numpy(), df['pathway_code'].to_numpy()
+        significant = df['p_value'].to_numpy() <= alpha
+
+        starts = self.ancestor_indptr[pathway_codes[significant]]
+        lengths = self.ancestor_indptr[pathway_codes[significant] + 1] - starts
+        ancestor_keys = (
+            np.repeat(query_index[significant], lengths) * n_pathways
+            + self.ancestor_indices[_expand_ranges(starts, lengths)]
+        )
+        depths = self.pathway_depths[pathway_codes]
+        return df.assign(
+            depth=depths,
+            root_id=self.pathway_root_ids[pathway_codes],
+            is_root=depths == 0,
+            significant=significant,
+            redundant=significant & np.isin(query_index * n_pathways + pathway_codes, ancestor_keys),
+        )
+
+    def enrich_hierarchy(
+        self,
+        queries: Sequence[Iterable[str]],
+        alpha: float = 0.05,
+        collapse: bool = False,
+    ) -> pd.DataFrame:
+        """Enrich many queries and annotate the results with the hierarchy, see :meth:`annotate_hierarchy`.
+
+        :param queries: Sets of HGNC gene symbols (or ChEBI identifiers)
+        :param alpha: The p-value at or below which a pathway is significant
+        :param collapse: If true, keep only the leaf-most significant pathways, which are the significant ones that
+         are not redundant
+        """
+        df = self.annotate_hierarchy(self.enrich(queries), alpha=alpha)
+        if collapse:
+            df = df[df['significant'] & ~df['redundant']].reset_index(drop=True)
+        return df
+
+    def query_many(self, queries: Sequence[Iterable[str]]) -> List[Mapping[str, Mapping]]:
+        """Enrich many queries, with results shaped like :meth:`bio2bel.compath.CompathManager.query_hgnc_symbols`.
+
+        Each result also has the ``p_value`` of the one-sided Fisher's exact test.
+
+        :param queries: Sets of HGNC gene symbols (or ChEBI identifiers)
+        """
+        rv = [{} for _ in queries]
+        df = self.enrich(queries)
+        for query, pathway_id, pathway_name, code, mapped, size, p_value in df[[
+            'query', 'pathway_id', 'pathway_name', 'pathway_code', 'mapped_proteins', 'pathway_size', 'p_value',
+        ]].itertuples(index=False):
+            rv[query][pathway_id] = {
+                'pathway_id': pathway_id,
+                'pathway_name': pathway_name,
+                'mapped_proteins': int(mapped),
+                'pathway_size': int(size),
+                'pathway_gene_set': self.get_pathway_gene_set(code),
+                'p_value': float(p_value),
+            }
+        return rv
+
+    def query(self, hgnc_symbols: Iterable[str]) -> Mapping[str, Mapping]:
+        """Enrich a single query, like :meth:`bio2bel.compath.CompathManager.query_hgnc_symbols`."""
+        return self.query_many([hgnc_symbols])[0]
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+"""Export the pathway memberships as BEL or as gene sets without building the ORM instances.
+
+:meth:`bio2bel.compath.CompathManager.to_bel` walks every pathway, lazily loads its proteins, and calls
+``to_pybel()`` on each of them, so the full Reactome release costs one query per pathway and one PyBEL node per
+membership. This module instead reads the pathways with one query and streams each association table with one more,
+ordered by member, so the node of each protein and chemical is built once. The edges can be added to a
+:class:`pybel.BELGraph` or written straight to a BEL script or a node-link JSON file, keeping only the nodes in memory.
+
+The gene sets are streamed the same way, ordered by pathway, to GMT files for GSEA or to TSV files with the identifiers
+of every member. Only the members of the current pathway are kept in memory.
+
+>>> from bio2bel_reactome import Manager
+>>> from bio2bel_reactome.export import write_bel_script
+>>> manager = Manager()
+>>> with open('reactome.bel', 'w') as file:  # doctest: +SKIP
+...     write_bel_script(manager, file, species='Homo sapiens', chemicals=True)
+"""
+
+import heapq
+import itertools as itt
+import json
+import logging
+from operator import itemgetter
+from typing import Callable, Iterable, Mapping, Optional, Sequence, TextIO, Tuple
+
+import pybel
+from pybel.constants import (
+    CITATION_TYPE_PUBMED, PART_OF, PYBEL_AUTOEVIDENCE, PYBEL_PUBMED, RELATION, SET_CITATION_FMT,
+)
+from pybel.dsl import BaseEntity
+from pybel.utils import hash_edge
+from sqlalchemy import Table
+
+from .manager import Manager
+from .models import Chemical, Pathway, Protein, chemical_pathway, protein_pathway
+
+__all__ = [
+    'iter_part_of_edges',
+    'to_bel_graph',
+    'write_bel_script',
+    'write_nodelink',
+    'GENE_SET_TSV_COLUMNS',
+    'iter_membership_rows',
+    'write_gmt',
+    'write_gene_set_tsv',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The number of association rows fetched from the database at a time
+DEFAULT_FETCH_SIZE = 10_000
+
+Edge = Tuple[BaseEntity, BaseEntity]
+
+#: The columns of the TSV gene set export. The name is the HGNC symbol of a protein or the name of a chemical.
+GENE_SET_TSV_COLUMNS = ('reactome_id', 'pathway_name', 'type', 'identifier', 'name', 'hgnc_id')
+
+#: A membership as (pathway primary key, reactome_id, pathway_name, type, identifier, name, hgnc_id)
+MembershipRow = Tuple[int, str, str, str, str, Optional[str], Optional[str]]
+
+
+def _make_graph() -> pybel.BELGraph:
+    return pybel.BELGraph(
+        name='Pathway Definitions from bio2bel_reactome',
+        version='1.0.0',
+    )
+
+
+def _get_pathway_nodes(manager: Manager, species: Optional[str]) -> Mapping[int, BaseEntity]:
+    """Get the nodes of the pathways by their primary key, with a single query."""
+    query = manager.session.query(Pathway.id, Pathway.identifier, Pathway.name)
+    return {
+        pathway_pk: Pathway.make_node(identifier, name)
+        for pathway_pk, identifier, name in manager._filter_species(query, species)
+    }
+
+
+def _iter_member_edges(
+    manager: Manager,
+    table: Table,
+    member_column: str,
+    model,
+    columns: Sequence,
+    make_node: Callable[..., BaseEntity],
+    pathway_nodes: Mapping[int, BaseEntity],
+    species: Optional[str],
+    fetch_size: int,
+) -> Iterable[Edge]:
+    """Stream the rows of an association table with the columns of the members, ordered by these columns.
+
+    The rows of a member are consecutive, so its node is built once and only the current one is kept. Members sharing
+    a node, like two UniProt entries of the same HGNC gene, are consecutive too, so their duplicate edges are skipped
+    while keeping only the pathways of the current node.
+    """
+    query = (
+        manager.session.query(table.c.pathway_id, *columns)
+        .join(model, table.c[member_column] == model.id)
+    )
+    if species is not None:
+        query = manager._filter_species(query.join(Pathway, table.c.pathway_id == Pathway.id), species)
+    query = query.order_by(*columns).yield_per(fetch_size)
+
+    current_values, current_node, pathway_pks = None, None, set()
+    for pathway_pk, *values in query:
+        if values != current_values:
+            current_values = values
+            node = make_node(*values)
+            if node != current_node:
+                current_node, pathway_pks = node, set()
+        if pathway_pk in pathway_pks:
+            continue
+        pathway_pks.add(pathway_pk)
+        yield current_node, pathway_nodes[pathway_pk]
+
+
+def iter_part_of_edges(
+    manager: Manager,
+    species: Optional[str] = None,
+    chemicals: bool = False,
+    fetch_size: Optional[int] = None,
+) -> Iterable[Edge]:
+    """Iterate over the (member, pathway) node pairs of the ``partOf`` edges, with one query per table.
+
+    :param manager: A populated manager
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, also export the chemicals in the pathways
+    :param fetch_size: The number of rows fetched from the database at a time
+    """
+    fetch_size = fetch_size or DEFAULT_FETCH_SIZE
+    pathway_nodes = _get_pathway_nodes(manager, species)
+    # ordered by HGNC first, so the UniProt entries of a gene come one after the other
+    yield from _iter_member_edges(
+        manager, protein_pathway, 'protein_id', Protein,
+        [Protein.hgnc_id, Protein.hgnc_symbol, Protein.uniprot_id],
+        lambda hgnc_id, hgnc_symbol, uniprot_id: Protein.make_node(uniprot_id, hgnc_symbol, hgnc_id),
+        pathway_nodes, species, fetch_size,
+    )
+    if chemicals:
+        yield from _iter_member_edges(
+            manager, chemical_pathway, 'chemical_id', Chemical,
+            [Chemical.chebi_id, Chemical.name], Chemical.make_node,
+            pathway_nodes, species, fetch_size,
+        )
+
+
+def to_bel_graph(manager: Manager, species: Optional[str] = None, chemicals: bool = False) -> pybel.BELGraph:
+    """Build a BEL graph of the pathway memberships.
+
+    Without chemicals, this is the same graph as the one made by :meth:`bio2bel.compath.CompathManager.to_bel`.
+
+    :param manager: A populated manager
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, also export the chemicals in the pathways
+    """
+    graph = _make_graph()
+    for member, pathway in iter_part_of_edges(manager, species=species, chemicals=chemicals):
+        graph.add_part_of(member, pathway)
+    return graph
+
+
+def _iter_bel_edges(
+    manager: Manager,
+    species: Optional[str],
+    chemicals: bool,
+    use_identifiers: bool = True,
+) -> Iterable[Tuple[BaseEntity, str, BaseEntity, str]]:
+    """Iterate over the edges with the BEL strings of their nodes, making each string once."""
+    # the member of an edge is usually the one of the previous edge, and the pathway nodes live as long as the
+    # iteration, so they can be told apart by their identity
+    last_member, last_member_bel, pathway_bels = None, None, {}
+    for member, pathway in iter_part_of_edges(manager, species=species, chemicals=chemicals):
+        if member is not last_member:
+            last_member, last_member_bel = member, member.as_bel(use_identifiers=use_identifiers)
+        pathway_bel = pathway_bels.get(id(pathway))
+        if pathway_bel is None:
+            pathway_bel = pathway_bels[id(pathway)] = pathway.as_bel(use_identifiers=use_identifiers)
+        yield member, last_member_bel, pathway, pathway_bel
+
+
+def write_bel_script(
+    manager: Manager,
+    file: TextIO,
+    species: Optional[str] = None,
+    chemicals: bool = False,
+    use_identifiers: bool = True,
+) -> int:
+    """Write the pathway memberships as a BEL script, one edge at a time.
+
+    The lines are the ones :func:`pybel.to_bel_script` writes for the graph of :func:`to_bel_graph`, except that the
+    edges are in the order of the database.
+
+    :param manager: A populated manager
+    :param file: A file opened for writing text
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, also export the chemicals in the pathways
+    :param use_identifiers: Enables extended BEP-0008 syntax
+    :return: The number of written edges
+    """
+    for line in pybel.to_bel_script_lines(_make_graph(), use_identifiers=use_identifiers):
+        print(line, file=file)  # noqa:T001
+
+    count = 0
+    for _, member_bel, _, pathway_bel in _iter_bel_edges(manager, species, chemicals, use_identifiers):
+        if count == 0:
+            print('###############################################\n', file=file)  # noqa:T001
+            print(SET_CITATION_FMT.format(CITATION_TYPE_PUBMED, PYBEL_PUBMED), file=file)  # noqa:T001
+            print(f'SET SupportingText = "{PYBEL_AUTOEVIDENCE}"', file=file)  # noqa:T001
+        print(member_bel, PART_OF, pathway_bel, file=file)  # noqa:T001
+        count += 1
+
+    if count:
+        print('UNSET SupportingText', file=file)  # noqa:T001
+        print('UNSET Citation', file=file)  # noqa:T001
+    return count
+
+
+def write_nodelink(
+    manager: Manager,
+    file: TextIO,
+    species: Optional[str] = None,
+    chemicals: bool = False,
+) -> int:
+    """Write the pathway memberships as node-link JSON, readable with :func:`pybel.from_nodelink_file`.
+
+    The nodes are collected in a first pass over the association tables and written sorted like
+    :func:`pybel.to_nodelink_file` does, then the links are written while the tables are streamed again. Only the
+    nodes are kept in memory.
+
+    :param manager: A populated manager
+    :param file: A file opened for writing text
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, also export the chemicals in the pathways
+    :return: The number of written links
+    """
+    nodes = {}
+    for member, member_bel, pathway, pathway_bel in _iter_bel_edges(manager, species, chemicals):
+        nodes[member_bel] = member
+        nodes[pathway_bel] = pathway
+    bel_to_index = {bel: i for i, bel in enumerate(sorted(nodes))}
+
+    graph = pybel.to_nodelink(_make_graph())['graph']
+    file.write(f'{{"directed": true, "multigraph": true, "graph": {json.dumps(graph, ensure_ascii=False)}, ')
+    file.write('"nodes": [')
+    for bel, i in bel_to_index.items():
+        node = nodes[bel]
+        file.write(('' if i == 0 else ', ') + json.dumps(dict(node, id=node.md5, bel=bel), ensure_ascii=False))
+    file.write('], "links": [')
+    del nodes
+
+    data = {RELATION: PART_OF}
+    count = 0
+    for member, member_bel, pathway, pathway_bel in _iter_bel_edges(manager, species, chemicals):
+        link = {
+            RELATION: PART_OF,
+            'source': bel_to_index[member_bel],
+            'target': bel_to_index[pathway_bel],
+            'key': hash_edge(member, pathway, data),
+        }
+        file.write(('' if count == 0 else ', ') + json.dumps(link))
+        count += 1
+    file.write(']}')
+    return count
+
+
+def _iter_typed_rows(
+    manager: Manager,
+    table: Table,
+    member_column: str,
+    model,
+    member_type: str,
+    columns: Sequence,
+    species: Optional[str],
+    fetch_size: int,
+) -> Iterable[MembershipRow]:
+    """Stream the memberships of one association table with a server-side cursor, ordered by pathway.
+
+    :param columns: The identifier and name columns of the members, and optionally their HGNC identifier column
+    """
+    query = (
+        manager.session.query(Pathway.id, Pathway.identifier, Pathway.name, *columns)
+        .join(table, table.c.pathway_id == Pathway.id)
+        .join(model, table.c[member_column] == model.id)
+    )
+    query = manager._filter_species(query, species).order_by(Pathway.id, columns[0]).yield_per(fetch_size)
+    for pathway_pk, reactome_id, pathway_name, identifier, name, *hgnc_id in query:
+        yield pathway_pk, reactome_id, pathway_name, member_type, identifier, name, hgnc_id[0] if hgnc_id else None
+
+
+def iter_membership_rows(
+    manager: Manager,
+    species: Optional[str] = None,
+    chemicals: bool = False,
+    fetch_size: Optional[int] = None,
+) -> Iterable[MembershipRow]:
+    """Iterate over the memberships ordered by pathway, the proteins of a pathway before its chemicals.
+
+    The protein and chemical tables are each read with one query whose rows are fetched ``fetch_size`` at a time,
+    which uses a server-side cursor on the backends that support it, and merged on the fly.
+
+    :param manager: A populated manager
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, also export the chemicals in the pathways
+    :param fetch_size: The number of rows fetched from the database at a time
+    """
+    fetch_size = fetch_size or DEFAULT_FETCH_SIZE
+    proteins = _iter_typed_rows(
+        manager, protein_pathway, 'protein_id', Protein, 'protein',
+        [Protein.uniprot_id, Protein.hgnc_symbol, Protein.hgnc_id], species, fetch_size,
+    )
+    if not chemicals:
+        return proteins
+    rows = _iter_typed_rows(
+        manager, chemical_pathway, 'chemical_id', Chemical, 'chemical',
+        [Chemical.chebi_id, Chemical.name], species, fetch_size,
+    )
+    return heapq.merge(proteins, rows, key=itemgetter(0))
+
+
+def write_gmt(
+    manager: Manager,
+    file: TextIO,
+    species: Optional[str] = None,
+    chemicals: bool = False,
+) -> int:
+    """Write the gene sets in the GMT format, one line per pathway with members as soon as its rows are read.
+
+    Each line has the name of the pathway, its Reactome identifier, then the sorted HGNC symbols of its proteins and,
+    if asked, the ChEBI CURIEs of its chemicals. Pathways without any are skipped.
+
+    :param manager: A populated manager
+    :param file: A file opened for writing text
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, add the chemicals to the gene sets
+    :return: The number of written gene sets
+    """
+    count = 0
+    rows = iter_membership_rows(manager, species=species, chemicals=chemicals)
+    for (_, reactome_id, pathway_name), group in itt.groupby(rows, key=itemgetter(0, 1, 2)):
+        members = sorted({
+            name if member_type == 'protein' else f'CHEBI:{identifier}'
+            for _, _, _, member_type, identifier, name, _ in group
+            if member_type == 'chemical' or name
+        })
+        if not members:
+            continue
+        print(pathway_name, reactome_id, *members, sep='\t', file=file)  # noqa:T001
+        count += 1
+        if count == 1:  # send the first line out right away
+            file.flush()
+    return count
+
+
+def write_gene_set_tsv(
+    manager: Manager,
+    file: TextIO,
+    species: Optional[str] = None,
+    chemicals: bool = False,
+) -> int:
+    """Write the memberships as TSV, one row per member with the columns of :data:`GENE_SET_TSV_COLUMNS`.
+
+    :param manager: A populated manager
+    :param file: A file opened for writing text
+    :param species: The name of the species whose pathways are exported. Defaults to all.
+    :param chemicals: If true, also write the chemicals in the pathways
+    :return: The number of written rows, without the header
+    """
+    print(*GENE_SET_TSV_COLUMNS, sep='\t', file=file)  # noqa:T001
+    file.flush()
+    count = 0
+    for _, *values in iter_membership_rows(manager, species=species, chemicals=chemicals):
+        print(*('' if value is None else value for value in values), sep='\t', file=file)  # noqa:T001
+        count += 1
+    return count
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""An in-memory engine over the pathway hierarchy for fast in-process traversal.
+
+The pathways are numbered from zero and the parent-child edges are kept as integer arrays in compressed sparse row
+layout, once by parent and once by child. A level by level variant of Kahn's algorithm gives the topological order,
+the depth of each pathway (its longest distance from a root), and the pathways on or below a cycle, in time linear in
+the number of pathways and edges. Edges whose parent or child is not a known pathway are set aside as orphans.
+
+>>> from bio2bel_reactome import Manager
+>>> hierarchy = Manager().get_hierarchy(species='Homo sapiens')
+>>> hierarchy.get_ancestors('R-HSA-389357')  # doctest: +SKIP
+['R-HSA-389356', 'R-HSA-388841']
+"""
+
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .parsers.pathway_hierarchy import parse_pathway_hierarchy_arrays
+
+__all__ = [
+    'PathwayHierarchy',
+]
+
+
+def _to_csr(sources: np.ndarray, targets: np.ndarray, n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Group the targets of the edges by source.
+
+    :return: The pointers into the targets of each source, and the targets
+    """
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+    return indptr, targets[np.argsort(sources, kind='stable')]
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Concatenate the neighbors of the nodes, without a Python loop."""
+    starts, lengths = indptr[nodes], indptr[nodes + 1] - indptr[nodes]
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return indices[np.repeat(starts, lengths) + np.arange(int(lengths.sum()), dtype=np.int64) - offsets]
+
+
+def _unique_in_order(nodes: np.ndarray, marks: np.ndarray) -> np.ndarray:
+    """Drop the repeated nodes, keeping one of each, in time linear in the number of nodes.
+
+    :param marks: A scratch array with one slot per node, overwritten
+    """
+    positions = np.arange(len(nodes), dtype=np.int64)
+    # exactly one of the positions of a repeated node is written last
+    marks[nodes] = positions
+    return nodes[marks[nodes] == positions]
+
+
+def _sort_levels(parents: np.ndarray, children: np.ndarray, n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sort the nodes topologically with Kahn's algorithm, one level of the hierarchy at a time.
+
+    :return: The nodes in topological order, and the depth of each node, which is -1 for nodes on or below a cycle
+    """
+    child_indptr, child_indices = _to_csr(parents, children, n_nodes)
+    in_degree = np.bincount(children, minlength=n_nodes)
+    marks = np.empty(n_nodes, dtype=np.int64)
+    depths = np.full(n_nodes, -1, dtype=np.int64)
+
+    levels = []
+    frontier = np.flatnonzero(in_degree == 0)
+    while len(frontier):
+        depths[frontier] = len(levels)
+        levels.append(frontier)
+        successors = _gather(child_indptr, child_indices, frontier)
+        np.subtract.at(in_degree, successors, 1)
+        frontier = _unique_in_order(successors[in_degree[successors] == 0], marks)
+
+    order = np.concatenate(levels) if levels else np.zeros(0, dtype=np.int64)
+    return order, depths
+
+
+class PathwayHierarchy:
+    """The parent-child relations between pathways, as integer adjacency arrays.
+
+    Pathways are given as their identifiers, which are usually Reactome identifiers, but can be any hashable value,
+    like the primary keys of the pathway table.
+    """
+
+    def __init__(self, identifiers: Sequence[Hashable], parents: np.ndarray, children: np.ndarray) -> None:
+        """Build the engine from the edges, given as indices into the identifiers.
+
+        :param identifiers: The distinct identifiers of the pathways
+        :param parents: The index of the parent of each edge, or -1 if the parent is not a known pathway
+        :param children: The index of the child of each edge, or -1 if the child is not a known pathway
+        """
+        self.identifiers = list(identifiers)
+        self.identifier_to_index = {identifier: index for index, identifier in enumerate(self.identifiers)}
+        n_nodes = len(self.identifiers)
+
+        parents = np.asarray(parents, dtype=np.int64)
+        children = np.asarray(children, dtype=np.int64)
+        is_known = (parents >= 0) & (children >= 0)
+        #: The positions of the edges whose parent or child is not a known pathway
+        self.orphan_edges = np.flatnonzero(~is_known)
+        #: The index of the parent and of the child of each edge between known pathways, in the given order
+        self.parents, self.children = parents[is_known], children[is_known]
+
+        self.child_indptr, self.child_indices = _to_csr(self.parents, self.children, n_nodes)
+        self.parent_indptr, self.parent_indices = _to_csr(self.children, self.parents, n_nodes)
+        # the order leaves out the pathways on or below a cycle, whose depth is -1
+        self.order, self.depths = _sort_levels(self.parents, self.children, n_nodes)
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        pathway_dataframe: pd.DataFrame,
+        identifiers: Optional[Sequence[str]] = None,
+    ) -> 'PathwayHierarchy':
+        """Build the engine from the dataframe of the pathway hierarchy file.
+
+        :param pathway_dataframe: Parent - child pathway relationships
+        :param identifiers: The Reactome identifiers of the known pathways. Defaults to the ones in the edges.
+        """
+        arrays = parse_pathway_hierarchy_arrays(pathway_dataframe, identifiers=identifiers)
+        return cls(arrays.identifiers, arrays.parents, arrays.children)
+
+    @classmethod
+    def from_parent_links(
+        cls,
+        identifiers: Sequence[Hashable],
+        parent_identifiers: Sequence[Optional[Hashable]],
+    ) -> 'PathwayHierarchy':
+        """Build the engine from the parent of each pathway, like the parent references of the pathway table.
+
+        :param identifiers: The distinct identifiers of the pathways
+        :param parent_identifiers: The identifier of the parent of each pathway, or None for pathways without one
+        """
+        parent_identifiers = pd.Series(parent_identifiers, dtype=object)
+        children = np.flatnonzero(parent_identifiers.notna().to_numpy())
+        parents = pd.Index(identifiers).get_indexer(parent_identifiers.iloc[children])
+        return cls(identifiers, parents, children)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.identifiers)
+
+    def __contains__(self, identifier) -> bool:  # noqa: D105
+        return identifier in self.identifier_to_index
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f'PathwayHierarchy(pathways={len(self)}, edges={len(self.parents)})'
+
+    def _get_identifiers(self, indices: np.ndarray) -> List[Hashable]:
+        return [self.identifiers[index] for index in indices.tolist()]
+
+    def _traverse(self, identifier: Hashable, indptr: np.ndarray, indices: np.ndarray) -> List[Hashable]:
+        """Get the pathways reachable from a pathway, breadth first, nearest first."""
+        n_nodes = len(self)
+        marks = np.empty(n_nodes, dtype=np.int64)
+        visited = np.zeros(n_nodes, dtype=bool)
+        frontier = np.array([self.identifier_to_index[identifier]], dtype=np.int64)
+        visited[frontier] = True
+
+        levels = []
+        while len(frontier):
+            neighbors = _gather(indptr, indices, frontier)
+            frontier = _unique_in_order(neighbors[~visited[neighbors]], marks)
+            visited[frontier] = True
+            levels.append(frontier)
+        return self._get_identifiers(np.concatenate(levels))
+
+    def get_children(self, identifier: Hashable) -> List[Hashable]:
+        """Get the children of a pathway."""
+        index = self.identifier_to_index[identifier]
+        return self._get_identifiers(self.child_indices[self.child_indptr[index]:self.child_indptr[index + 1]])
+
+    def get_parents(self, identifier: Hashable) -> List[Hashable]:
+        """Get the parents of a pathway."""
+        index = self.identifier_to_index[identifier]
+        return self._get_identifiers(self.parent_indices[self.parent_indptr[index]:self.parent_indptr[index + 1]])
+
+    def get_descendants(self, identifier: Hashable) -> List[Hashable]:
+        """Get the pathways below a pathway, nearest first."""
+        return self._traverse(identifier, self.child_indptr, self.child_indices)
+
+    def get_ancestors(self, identifier: Hashable) -> List[Hashable]:
+        """Get the pathways above a pathway, nearest first."""
+        return self._traverse(identifier, self.parent_indptr, self.parent_indices)
+
+    def get_depth(self, identifier: Hashable) -> Optional[int]:
+        """Get the longest distance from a root to a pathway, or None if it is on or below a cycle."""
+        depth = int(self.depths[self.identifier_to_index[identifier]])
+        return None if depth < 0 else depth
+
+    def get_roots(self) -> List[Hashable]:
+        """Get the pathways without a parent."""
+        return self._get_identifiers(np.flatnonzero(np.diff(self.parent_indptr) == 0))
+
+    def get_leaves(self) -> List[Hashable]:
+        """Get the pathways without a child."""
+        return self._get_identifiers(np.flatnonzero(np.diff(self.child_indptr) == 0))
+
+    def get_cycle_pathways(self) -> List[Hashable]:
+        """Get the pathways on a cycle, or below one, which have no topological order."""
+        return self._get_identifiers(np.flatnonzero(self.depths < 0))
+
+    def topological_sort(self) -> List[Hashable]:
+        """Get the pathways so that each comes after all of its parents, leaving out the ones on or below a cycle."""
+        return self._get_identifiers(self.order)
+
+    def get_edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the distinct edges between known pathways, in the order they were first given.
+
+        :return: The index of the parent and the index of the child of each edge
+        """
+        _, first = np.unique(self.parents * max(len(self), 1) + self.children, return_index=True)
+        first.sort()
+        return self.parents[first], self.children[first]
+
+    def get_transitive_closure(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the transitive closure of the hierarchy over all parents, with each pathway its own ancestor.
+
+        All pathways are walked up at once, breadth first, one level per step, so each pair is found at its shortest
+        distance. Pairs already found are not walked again, which also stops the walk on cycles.
+
+        :return: The index of the ancestor, the index of the descendant, and the shortest distance between the two, of
+         each row
+        """
+        n_nodes = len(self)
+        descendants = np.arange(n_nodes, dtype=np.int64)
+        ancestors = descendants
+        # each (descendant, ancestor) pair is coded as a single integer, in sorted order
+        seen = descendants * n_nodes + ancestors
+
+        chunks = []
+        distance = 0
+        while len(descendants):
+            chunks.append((ancestors, descendants, np.full(len(descendants), distance, dtype=np.int64)))
+            lengths = self.parent_indptr[ancestors + 1] - self.parent_indptr[ancestors]
+            keys = np.unique(
+                np.repeat(descendants, lengths) * n_nodes + _gather(self.parent_indptr, self.parent_indices, ancestors),
+            )
+            keys = keys[~np.isin(keys, seen, assume_unique=True)]
+            seen = np.union1d(seen, keys)
+            descendants, ancestors = np.divmod(keys, n_nodes)
+            distance += 1
+
+        if not chunks:
+            return tuple(np.zeros(0, dtype=np.int64) for _ in range(3))
+        return tuple(np.concatenate(columns) for columns in zip(*chunks))
+
+    def get_parent_array(self) -> np.ndarray:
+        """Get the index of one parent of each pathway, or -1 for roots.
+
+        The last parent listed for a pathway wins, like with repeated ``parent.children.append(child)``.
+        """
+        rv = np.full(len(self), -1, dtype=np.int64)
+        _, last_reversed = np.unique(self.children[::-1], return_index=True)
+        last = len(self.children) - 1 - last_reversed
+        rv[self.children[last]] = self.parents[last]
+        return rv
+
+    def get_closure(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the transitive closure of the tree given by :meth:`get_parent_array`, with each pathway its own ancestor.
+
+        Pathways on or below a cycle of that tree get their ancestors up to the first one that repeats.
+
+        :return: The index of the ancestor, the index of the descendant, and the depth between the two, of each row
+        """
+        parent = self.get_parent_array()
+        has_parent = np.flatnonzero(parent >= 0)
+        _, tree_depths = _sort_levels(parent[has_parent], has_parent, len(self))
+
+        chunks = []
+        descendants = np.flatnonzero(tree_depths >= 0)
+        ancestors = descendants
+        depth = 0
+        while len(descendants):
+            chunks.append((ancestors, descendants, np.full(len(descendants), depth, dtype=np.int64)))
+            ancestors = parent[ancestors]
+            is_known = ancestors >= 0
+            ancestors, descendants, depth = ancestors[is_known], descendants[is_known], depth + 1
+
+        for descendant in np.flatnonzero(tree_depths < 0).tolist():
+            ancestor, depth, visited = descendant, 0, set()
+            while ancestor >= 0 and ancestor not in visited:
+                visited.add(ancestor)
+                chunks.append(([ancestor], [descendant], [depth]))
+                ancestor, depth = int(parent[ancestor]), depth + 1
+
+        if not chunks:
+            return tuple(np.zeros(0, dtype=np.int64) for _ in range(3))
+        return tuple(np.concatenate(columns).astype(np.int64) for columns in zip(*chunks))
@@ -3,26 +3,118 @@
 """This module populates the tables of bio2bel_reactome."""
 
 import logging
-from collections import defaultdict
-from typing import Dict, List, Mapping, Optional, Set
-
+import os
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+from typing import (
+    Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, TYPE_CHECKING, TextIO, Tuple,
+    Type,
+)
+
+import click
+import numpy as np
 import pandas as pd
+from more_click import verbose_option
+from sqlalchemy import exists, func, inspect, select
+from sqlalchemy.orm import aliased, joinedload, selectinload
 from tqdm import tqdm
 
 from bio2bel.compath import CompathManager
-from pyobo import get_name_id_mapping
-from .constants import MODULE_NAME, SPECIES_REMAPPING
-from .models import Base, Chemical, Pathway, Protein, Species, chemical_pathway, protein_pathway
-from .parsers.entity_pathways import get_procesed_chemical_pathways_df, get_procesed_proteins_pathways_df
-from .parsers.pathway_hierarchy import get_pathway_hierarchy_df, parse_pathway_hierarchy
-from .parsers.pathway_names import get_pathway_names_df, parse_pathway_names
+from .bulk import (
+    bulk_delete, bulk_insert, bulk_update, create_indexes, drop_indexes, get_max_parameters, iter_chunks, none_if_nan,
+    reset_sequences,
+)
+from .constants import MODULE_NAME, PATHWAY_NAMES_PATH, SPECIES_REMAPPING
+from .models import (
+    Base, Chemical, LOOKUP_INDEXES, Pathway, Protein, Species, chemical_pathway, database_metadata, pathway_closure,
+    pathway_hierarchy, protein_pathway,
+)
+from .utils import StatementCounter, iter_in_background
+
+if TYPE_CHECKING:
+    import pybel
+
+    from .enrichment import EnrichmentIndex
+    from .hierarchy import PathwayHierarchy
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     'Manager',
+    'PathwayRow',
 ]
 
+#: Columns of the preprocessed protein-pathway dataframe that are stored in the protein table
+PROTEIN_ATTRIBUTES = {
+    'uniprot_id': 'uniprot_id',
+    'uniprot_accession': 'uniprot_accession',
+    'hgnc_id': 'hgnc_id',
+    'hgnc_symbol': 'hgnc_symbol',
+}
+
+#: The key of the version stamp in the metadata table
+VERSION_STAMP_KEY = 'version_stamp'
+
+#: Columns of the preprocessed chemical-pathway dataframe that are stored in the chemical table
+CHEMICAL_ATTRIBUTES = {
+    'chebi_id': 'chebi_id',
+    'chebi_name': 'name',
+}
+
+#: The tables whose new rows get their primary keys from the loaders, not from the database
+KEYED_TABLES = [Species.__table__, Pathway.__table__, Protein.__table__, Chemical.__table__]
+
+
+#: The functions making the loader options of each eager loading strategy
+LOAD_STRATEGIES = {
+    'joined': joinedload,
+    'selectin': selectinload,
+}
+
+
+class PathwayRow(NamedTuple):
+    """A pathway read as a plain row, without building an ORM instance."""
+
+    identifier: str
+    name: str
+    species: Optional[str]
+    parent_identifier: Optional[str]
+
+
+def _get_load_options(model: Type[Base], load: Iterable[str], strategy: str = 'joined', parent=None) -> List:
+    """Get the options eagerly loading the given relationships of the model.
+
+    The ``joined`` strategy loads them in the same query. The ``selectin`` strategy loads each relationship with
+    one extra ``SELECT ... WHERE id IN (...)`` for all instances, which is better for collections of many rows.
+
+    :param model: A declarative model
+    :param load: Names of relationships of the model. Dotted paths like ``pathways.species`` load nested ones.
+    :param strategy: The eager loading strategy, a key of :data:`LOAD_STRATEGIES`
+    :param parent: A loader option of the relationship leading to the model, to chain the options from
+    :raises ValueError: if the strategy is unknown or a name is not a relationship
+    """
+    if strategy not in LOAD_STRATEGIES:
+        raise ValueError(f'unknown loading strategy {strategy}. Use one of {", ".join(LOAD_STRATEGIES)}')
+
+    rv = []
+    for path in load:
+        current_model, option = model, parent
+        for name in path.split('.'):
+            relationships = inspect(current_model).relationships
+            if name not in relationships:
+                raise ValueError(f'{current_model.__name__} has no relationship {name}')
+            attribute = getattr(current_model, name)
+            if option is None:
+                option = LOAD_STRATEGIES[strategy](attribute)
+            else:
+                option = getattr(option, f'{strategy}load')(attribute)
+            current_model = relationships[name].mapper.class_
+        rv.append(option)
+    return rv
+
 
 class Manager(CompathManager):
     """Protein-pathway and chemical-pathway memberships."""
@@ -41,6 +133,12 @@ class Manager(CompathManager):
         # Global dictionary
         self.uniprot_id_to_protein: Dict[str, Protein] = {}
         self.chebi_id_to_chemical: Dict[str, Chemical] = {}
+        # Reactome stable identifier to pathway primary key, built once per load
+        self.reactome_id_to_pk: Dict[str, int] = {}
+        # Reactome stable identifiers of the pathways left out by a species filter
+        self.excluded_reactome_ids: Set[str] = set()
+        # Number of statements sent to the database by the last call to populate
+        self.populate_round_trips: Optional[int] = None
 
     def summarize(self) -> Mapping[str, int]:
         """Summarize the database."""
@@ -59,23 +157,122 @@ class Manager(CompathManager):
         """Count the species in the database."""
         return self.session.query(Species).count()
 
-    def get_gene_sets(self, only_human: bool = False) -> Mapping[str, Set[str]]:
-        """Return pathway - genesets mapping."""
-        if only_human:
-            pathways = self.get_human_pathways()
-        else:
-            pathways = self.list_pathways()
+    def _filter_human(self, query, only_human: bool):
+        """Restrict a query over pathways to human pathways, if asked."""
+        return self._filter_species(query, 'Homo sapiens' if only_human else None)
+
+    @staticmethod
+    def _filter_species(query, species_name: Optional[str]):
+        """Restrict a query over pathways to the pathways of the given species, if any."""
+        if species_name is None:
+            return query
+        return query.join(Species, Pathway.species_id == Species.id).filter(Species.name == species_name)
+
+    def get_gene_sets(self, only_human: bool = False, species: Optional[str] = None) -> Mapping[str, Set[str]]:
+        """Return pathway - genesets mapping.
+
+        Only pathways with proteins are included. Reads (pathway, HGNC symbol) pairs with a single query.
+
+        :param only_human: If true, only include human pathways
+        :param species: The name of the species whose pathways are included. Defaults to all.
+        """
+        query = (
+            self.session.query(Pathway.id, Pathway.name, Protein.hgnc_symbol)
+            .join(protein_pathway, protein_pathway.c.pathway_id == Pathway.id)
+            .join(Protein, protein_pathway.c.protein_id == Protein.id)
+        )
+        query = self._filter_species(self._filter_human(query, only_human), species).order_by(Pathway.id)
+
+        pathway_pk_to_name, gene_sets = {}, defaultdict(set)
+        for pathway_pk, name, hgnc_symbol in query:
+            pathway_pk_to_name[pathway_pk] = name
+            if hgnc_symbol:
+                gene_sets[pathway_pk].add(hgnc_symbol)
 
         return {
-            pathway.name: {
-                protein.hgnc_symbol
-                for protein in pathway.proteins
-                if protein.hgnc_symbol
-            }
-            for pathway in pathways
-            if pathway.proteins
+            name: gene_sets[pathway_pk]
+            for pathway_pk, name in pathway_pk_to_name.items()
         }
 
+    def write_gene_sets(
+        self,
+        file: TextIO,
+        fmt: str = 'gmt',
+        species: Optional[str] = None,
+        chemicals: bool = False,
+    ) -> int:
+        """Stream the gene sets to a file, one pathway at a time, see :mod:`bio2bel_reactome.export`.
+
+        >>> with open('reactome.gmt', 'w') as file:  # doctest: +SKIP
+        ...     manager.write_gene_sets(file, species='Homo sapiens')
+
+        :param file: A file opened for writing text
+        :param fmt: ``gmt`` for one line of HGNC symbols per pathway, or ``tsv`` for one row with the identifiers of
+         each member
+        :param species: The name of the species whose pathways are exported. Defaults to all.
+        :param chemicals: If true, also export the chemicals in the pathways
+        :return: The number of written gene sets for GMT, or of written rows for TSV
+        :raises ValueError: if the format is unknown
+        """
+        from .export import write_gene_set_tsv, write_gmt
+
+        if fmt == 'gmt':
+            return write_gmt(self, file, species=species, chemicals=chemicals)
+        if fmt == 'tsv':
+            return write_gene_set_tsv(self, file, species=species, chemicals=chemicals)
+        raise ValueError(f'unknown gene set format {fmt}. Use gmt or tsv')
+
+    def get_enrichment_index(
+        self,
+        *,
+        chemicals: bool = False,
+        species: Optional[str] = None,
+        hierarchy: bool = False,
+    ) -> 'EnrichmentIndex':
+        """Build an in-memory index of the pathway memberships for batched enrichment.
+
+        :param chemicals: If true, index the ChEBI identifiers of the chemicals instead of the HGNC gene symbols
+        :param species: The name of the species whose pathways are indexed. Defaults to all.
+        :param hierarchy: If true, also load the pathway hierarchy, for hierarchy-aware enrichment
+        """
+        from .enrichment import EnrichmentIndex
+
+        return EnrichmentIndex.from_manager(self, chemicals=chemicals, species=species, hierarchy=hierarchy)
+
+    def enrich_with_hierarchy(
+        self,
+        queries: Sequence[Iterable[str]],
+        *,
+        alpha: float = 0.05,
+        collapse: bool = False,
+        chemicals: bool = False,
+        species: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Enrich many queries, with the depth, the root, and the redundant ancestors of the pathways flagged.
+
+        This reads the memberships and the hierarchy with two queries, however many queries and hits there are. Keep
+        the index of :meth:`get_enrichment_index` around to enrich more queries later.
+
+        :param queries: Sets of HGNC gene symbols (or ChEBI identifiers)
+        :param alpha: The p-value at or below which a pathway is significant
+        :param collapse: If true, keep only the leaf-most significant pathways
+        :param chemicals: If true, enrich ChEBI identifiers of chemicals instead of HGNC gene symbols
+        :param species: The name of the species whose pathways are tested. Defaults to all.
+        :return: See :meth:`bio2bel_reactome.enrichment.EnrichmentIndex.annotate_hierarchy`
+        """
+        index = self.get_enrichment_index(chemicals=chemicals, species=species, hierarchy=True)
+        return index.enrich_hierarchy(queries, alpha=alpha, collapse=collapse)
+
+    def to_bel(self, species: Optional[str] = None, chemicals: bool = False) -> 'pybel.BELGraph':
+        """Build a BEL graph of the pathway memberships with one query per table, see :mod:`bio2bel_reactome.export`.
+
+        :param species: The name of the species whose pathways are exported. Defaults to all.
+        :param chemicals: If true, also export the chemicals in the pathways
+        """
+        from .export import to_bel_graph
+
+        return to_bel_graph(self, species=species, chemicals=chemicals)
+
     def get_or_create_pathway(
         self,
         *,
@@ -175,15 +372,8 @@ class Manager(CompathManager):
 
         :rtype: dict[str,str]
         """
-        if only_human:
-            pathways = self.get_human_pathways()
-        else:
-            pathways = self.list_pathways()
-
-        return {
-            pathway.name: pathway.identifier
-            for pathway in pathways
-        }
+        query = self.session.query(Pathway.name, Pathway.identifier)
+        return dict(self._filter_human(query, only_human).order_by(Pathway.id))
 
     def get_pathway_parent_by_id(self, reactome_id: str) -> Optional[Pathway]:
         """Get parent pathway by its reactome id.
@@ -200,38 +390,290 @@ class Manager(CompathManager):
     def get_top_hiearchy_parent_by_id(self, reactome_id: str) -> Optional[Pathway]:
         """Get the oldest pathway at the top of the hierarchy a pathway by its reactome id.
 
+        This is a single root, see :meth:`get_pathway_root`. Use :meth:`get_pathway_roots` to get all of them.
+
         :param reactome_id: reactome identifier
         """
-        pathway = self.get_pathway_by_id(reactome_id)
+        return self.get_pathway_root(reactome_id)
+
+    def _query_closure(self, reactome_id: str, *, ancestors: bool):
+        """Query the pathways related to a pathway through the hierarchy closure.
+
+        :param reactome_id: reactome identifier
+        :param ancestors: If true, get the ancestors of the pathway, otherwise its descendants
+        """
+        other = aliased(Pathway)
+        if ancestors:
+            join_on, filter_on = pathway_closure.c.ancestor_id, pathway_closure.c.descendant_id
+        else:
+            join_on, filter_on = pathway_closure.c.descendant_id, pathway_closure.c.ancestor_id
+
+        return (
+            self.session.query(Pathway)
+            .join(pathway_closure, join_on == Pathway.id)
+            .join(other, filter_on == other.id)
+            .filter(other.identifier == reactome_id)
+        )
+
+    def get_pathway_ancestors(
+        self,
+        reactome_id: str,
+        load: Sequence[str] = (),
+        strategy: str = 'selectin',
+    ) -> List[Pathway]:
+        """Get the ancestors of a pathway, from its parent up to the top of the hierarchy.
+
+        :param reactome_id: reactome identifier
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        return (
+            self._query_closure(reactome_id, ancestors=True)
+            .options(*_get_load_options(Pathway, load, strategy))
+            .filter(pathway_closure.c.depth > 0)
+            .order_by(pathway_closure.c.depth)
+            .all()
+        )
+
+    def get_pathway_descendants(
+        self,
+        reactome_id: str,
+        load: Sequence[str] = (),
+        strategy: str = 'selectin',
+    ) -> List[Pathway]:
+        """Get the descendants of a pathway, from its children down to the bottom of the hierarchy.
+
+        :param reactome_id: reactome identifier
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        return (
+            self._query_closure(reactome_id, ancestors=False)
+            .options(*_get_load_options(Pathway, load, strategy))
+            .filter(pathway_closure.c.depth > 0)
+            .order_by(pathway_closure.c.depth)
+            .all()
+        )
+
+    def get_pathway_root(self, reactome_id: str) -> Optional[Pathway]:
+        """Get the pathway at the top of the hierarchy of a pathway, which is itself if it has no parent.
+
+        A pathway with more than one parent can have several roots. This returns the farthest one, and the first by
+        identifier among the ones as far. Use :meth:`get_pathway_roots` to get all of them.
+
+        :param reactome_id: reactome identifier
+        """
+        has_parent = exists().where(pathway_hierarchy.c.child_id == Pathway.id)
+        return (
+            self._query_closure(reactome_id, ancestors=True)
+            .filter(~has_parent)
+            .order_by(pathway_closure.c.depth.desc(), Pathway.identifier)
+            .first()
+        )
+
+    def get_pathway_depth(self, reactome_id: str) -> Optional[int]:
+        """Get the number of levels between a pathway and the top of its hierarchy, or None if it is not stored.
+
+        With more than one parent, this is the distance to the farthest root, along the shortest path to each.
+
+        :param reactome_id: reactome identifier
+        """
+        return (
+            self.session.query(func.max(pathway_closure.c.depth))
+            .join(Pathway, pathway_closure.c.descendant_id == Pathway.id)
+            .filter(Pathway.identifier == reactome_id)
+            .scalar()
+        )
+
+    def _query_hierarchy(self, reactome_id: str, *, ancestors: bool):
+        """Query a pathway and all pathways related to it through the hierarchy edges, with a recursive CTE.
+
+        Like the closure, this follows every parent of pathways with more than one, but needs no closure table. Each
+        pathway is reached once, so cycles end the recursion.
+
+        :param reactome_id: reactome identifier
+        :param ancestors: If true, follow the edges up to the parents, otherwise down to the children
+        """
+        pathway_table = Pathway.__table__
+        if ancestors:
+            source, target = pathway_hierarchy.c.child_id, pathway_hierarchy.c.parent_id
+        else:
+            source, target = pathway_hierarchy.c.parent_id, pathway_hierarchy.c.child_id
+
+        reachable = (
+            select([pathway_table.c.id.label('pathway_id')])
+            .where(pathway_table.c.identifier == reactome_id)
+            .cte('reachable', recursive=True)
+        )
+        # a UNION, rather than a UNION ALL, drops the pathways that are reached again
+        reachable = reachable.union(select([target]).where(source == reachable.c.pathway_id))
+        return self.session.query(Pathway).join(reachable, reachable.c.pathway_id == Pathway.id)
 
-        if not pathway.parent:
-            return pathway
+    def get_pathway_parents(
+        self,
+        reactome_id: str,
+        load: Sequence[str] = (),
+        strategy: str = 'selectin',
+    ) -> List[Pathway]:
+        """Get all parents of a pathway, including the ones besides its parent reference.
+
+        :param reactome_id: reactome identifier
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        child = aliased(Pathway)
+        return (
+            self.session.query(Pathway)
+            .options(*_get_load_options(Pathway, load, strategy))
+            .join(pathway_hierarchy, pathway_hierarchy.c.parent_id == Pathway.id)
+            .join(child, pathway_hierarchy.c.child_id == child.id)
+            .filter(child.identifier == reactome_id)
+            .order_by(Pathway.identifier)
+            .all()
+        )
+
+    def get_all_pathway_ancestors(
+        self,
+        reactome_id: str,
+        load: Sequence[str] = (),
+        strategy: str = 'selectin',
+    ) -> List[Pathway]:
+        """Get the pathways above a pathway through all of its parents, with a single recursive query.
+
+        :param reactome_id: reactome identifier
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        return (
+            self._query_hierarchy(reactome_id, ancestors=True)
+            .options(*_get_load_options(Pathway, load, strategy))
+            .filter(Pathway.identifier != reactome_id)
+            .order_by(Pathway.identifier)
+            .all()
+        )
+
+    def get_all_pathway_descendants(
+        self,
+        reactome_id: str,
+        load: Sequence[str] = (),
+        strategy: str = 'selectin',
+    ) -> List[Pathway]:
+        """Get the pathways below a pathway through all of their parents, with a single recursive query.
+
+        :param reactome_id: reactome identifier
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        return (
+            self._query_hierarchy(reactome_id, ancestors=False)
+            .options(*_get_load_options(Pathway, load, strategy))
+            .filter(Pathway.identifier != reactome_id)
+            .order_by(Pathway.identifier)
+            .all()
+        )
+
+    def get_pathway_roots(self, reactome_id: str) -> List[Pathway]:
+        """Get the pathways at the top of all hierarchies of a pathway, with a single recursive query.
+
+        A pathway without parents is its own root.
 
-        return self.get_top_hiearchy_parent_by_id(pathway.parent.identifier)
+        :param reactome_id: reactome identifier
+        """
+        has_parent = exists().where(pathway_hierarchy.c.child_id == Pathway.id)
+        return (
+            self._query_hierarchy(reactome_id, ancestors=True)
+            .filter(~has_parent)
+            .order_by(Pathway.identifier)
+            .all()
+        )
 
-    def get_all_top_hierarchy_pathways(self) -> List[Pathway]:
-        """Get all pathways without a parent (top hierarchy)."""
-        all_pathways = self.list_pathways()
+    def get_all_top_hierarchy_pathways(self, load: Sequence[str] = (), strategy: str = 'selectin') -> List[Pathway]:
+        """Get all pathways without a parent (top hierarchy).
 
-        return [
-            pathway
-            for pathway in all_pathways
-            if not pathway.parent_id
-        ]
+        :param load: Names of relationships loaded with the pathways, like ``children`` or ``proteins``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        return (
+            self.session.query(Pathway)
+            .options(*_get_load_options(Pathway, load, strategy))
+            .filter(Pathway.parent_id.is_(None))
+            .all()
+        )
 
-    def get_human_pathways(self) -> List[Pathway]:
-        """Get human pathways."""
-        return self.get_pathways_by_species('Homo sapiens')
+    def get_human_pathways(self, load: Sequence[str] = (), strategy: str = 'selectin') -> List[Pathway]:
+        """Get human pathways.
 
-    def get_pathways_by_species(self, species_name: str) -> Optional[List[Pathway]]:
-        """Get pathways by species."""
-        filtered_species = self.session.query(Species).filter(Species.name == species_name).one_or_none()
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        return self.get_pathways_by_species('Homo sapiens', load=load, strategy=strategy)
+
+    def get_pathways_by_species(
+        self,
+        species_name: str,
+        load: Sequence[str] = (),
+        strategy: str = 'selectin',
+    ) -> Optional[List[Pathway]]:
+        """Get pathways by species.
+
+        The species and its pathways are read with two queries, and each relationship in ``load`` with one more, so
+        iterating over all pathways of a species with their members takes a constant number of queries.
+
+        >>> pathways = manager.get_pathways_by_species('Homo sapiens', load=['proteins', 'parent'])  # doctest: +SKIP
+
+        :param species_name: The name of the species, like ``Homo sapiens``
+        :param load: Names of relationships loaded with the pathways, like ``proteins`` or ``chemicals``
+        :param strategy: The eager loading strategy of the relationships, ``selectin`` or ``joined``
+        """
+        pathways_option = selectinload(Species.pathways)
+        filtered_species = (
+            self.session.query(Species)
+            .options(pathways_option, *_get_load_options(Pathway, load, strategy, parent=pathways_option))
+            .filter(Species.name == species_name)
+            .one_or_none()
+        )
 
         if not filtered_species:
             return None
 
         return filtered_species.pathways
 
+    def get_pathway_rows(self, species_name: Optional[str] = None) -> List[PathwayRow]:
+        """Get the identifier, name, species name, and parent identifier of each pathway with a single query.
+
+        This is much faster than building the ORM instances when only these attributes are needed.
+
+        :param species_name: The name of the species whose pathways are returned. Defaults to all.
+        """
+        parent = aliased(Pathway)
+        query = (
+            self.session.query(Pathway.identifier, Pathway.name, Species.name, parent.identifier)
+            .outerjoin(Species, Pathway.species_id == Species.id)
+            .outerjoin(parent, Pathway.parent_id == parent.id)
+            .order_by(Pathway.id)
+        )
+        if species_name is not None:
+            query = query.filter(Species.name == species_name)
+        return [PathwayRow(*row) for row in query]
+
+    def get_hierarchy(self, species: Optional[str] = None) -> 'PathwayHierarchy':
+        """Load the pathway hierarchy, with all parents of each pathway, into an in-memory engine with a single query.
+
+        :param species: The name of the species whose pathways are included. Defaults to all. Edges to the pathways
+         of other species are kept as orphans.
+        """
+        from .hierarchy import PathwayHierarchy
+
+        parent = aliased(Pathway)
+        query = (
+            self.session.query(parent.identifier, Pathway.identifier)
+            .outerjoin(pathway_hierarchy, pathway_hierarchy.c.child_id == Pathway.id)
+            .outerjoin(parent, pathway_hierarchy.c.parent_id == parent.id)
+            .order_by(Pathway.id, parent.id)
+        )
+        df = pd.DataFrame(self._filter_species(query, species).all(), columns=[0, 1])
+        return PathwayHierarchy.from_dataframe(df[df[0].notna()], identifiers=df[1].unique())
+
     def get_chemical_by_chebi_id(self, chebi_id: str) -> Optional[Chemical]:
         """Get chemical by ChEBI id."""
         return self.session.query(Chemical).filter(Chemical.chebi_id == chebi_id).one_or_none()
@@ -240,142 +682,950 @@ class Manager(CompathManager):
         """Get protein by UniProt id."""
         return self.session.query(Protein).filter(Protein.uniprot_id == uniprot_id).one_or_none()
 
+    def _get_by_keys(
+        self,
+        model: Type[Base],
+        column,
+        keys: Iterable[str],
+        load: Sequence[str] = (),
+        strategy: str = 'joined',
+    ) -> Dict[str, Any]:
+        """Get the instances of the model by a unique column, with one query per chunk of keys.
+
+        The keys are chunked to stay under the number of parameters the database accepts in one statement.
+
+        :param model: A declarative model
+        :param column: A unique column of the model
+        :param keys: The values of the column to look up. Duplicates and missing values are skipped.
+        :param load: Names of the relationships loaded with the instances, see :func:`_get_load_options`
+        :param strategy: The eager loading strategy of the relationships
+        :return: The found instances by their key
+        """
+        keys = list(dict.fromkeys(key for key in keys if key is not None))
+        options = _get_load_options(model, load, strategy)
+
+        rv = {}
+        for chunk in iter_chunks(keys, get_max_parameters(self.engine.dialect.name)):
+            for instance in self.session.query(model).options(*options).filter(column.in_(chunk)):
+                rv[getattr(instance, column.key)] = instance
+        return rv
+
+    def get_proteins_by_uniprot_ids(
+        self,
+        uniprot_ids: Iterable[str],
+        load: Sequence[str] = (),
+        strategy: str = 'joined',
+    ) -> Dict[str, Protein]:
+        """Get proteins by their UniProt identifiers, with one query per few hundred identifiers.
+
+        >>> manager.get_proteins_by_uniprot_ids(['P08237', 'Q9UHC3'], load=['pathways.species'])  # doctest: +SKIP
+
+        :param uniprot_ids: UniProt identifiers
+        :param load: Names of relationships to load in the same query, like ``pathways``
+        :param strategy: The eager loading strategy of the relationships, ``joined`` or ``selectin``
+        :return: The found proteins by their UniProt identifier
+        """
+        return self._get_by_keys(Protein, Protein.uniprot_id, uniprot_ids, load=load, strategy=strategy)
+
+    def get_chemicals_by_chebi_ids(
+        self,
+        chebi_ids: Iterable[str],
+        load: Sequence[str] = (),
+        strategy: str = 'joined',
+    ) -> Dict[str, Chemical]:
+        """Get chemicals by their ChEBI identifiers, with one query per few hundred identifiers.
+
+        :param chebi_ids: ChEBI identifiers
+        :param load: Names of relationships to load in the same query, like ``pathways``
+        :param strategy: The eager loading strategy of the relationships, ``joined`` or ``selectin``
+        :return: The found chemicals by their ChEBI identifier
+        """
+        return self._get_by_keys(Chemical, Chemical.chebi_id, chebi_ids, load=load, strategy=strategy)
+
+    def get_pathways_by_ids(
+        self,
+        reactome_ids: Iterable[str],
+        load: Sequence[str] = (),
+        strategy: str = 'joined',
+    ) -> Dict[str, Pathway]:
+        """Get pathways by their Reactome identifiers, with one query per few hundred identifiers.
+
+        :param reactome_ids: Reactome identifiers
+        :param load: Names of relationships to load in the same query, like ``species`` or ``proteins``
+        :param strategy: The eager loading strategy of the relationships, ``joined`` or ``selectin``
+        :return: The found pathways by their Reactome identifier
+        """
+        return self._get_by_keys(Pathway, Pathway.identifier, reactome_ids, load=load, strategy=strategy)
+
+    def get_species_by_names(
+        self,
+        species_names: Iterable[str],
+        load: Sequence[str] = (),
+        strategy: str = 'joined',
+    ) -> Dict[str, Species]:
+        """Get species by their names, with one query per few hundred names.
+
+        :param species_names: Species names, like ``Homo sapiens``
+        :param load: Names of relationships to load in the same query, like ``pathways``
+        :param strategy: The eager loading strategy of the relationships, ``joined`` or ``selectin``
+        :return: The found species by their name
+        """
+        return self._get_by_keys(Species, Species.name, species_names, load=load, strategy=strategy)
+
     """Custom Methods to Populate the DB"""
 
-    def _populate_pathways(
+    def _get_next_id(self, model, connection=None) -> int:
+        """Get the next free primary key of the model.
+
+        New models get their keys assigned up front so the session can flush them with a single ``executemany``. The
+        sequences of the tables in :data:`KEYED_TABLES` are moved past them with
+        :func:`bio2bel_reactome.bulk.reset_sequences` at the end of the load.
+
+        :param model: A declarative model
+        :param connection: The connection to query, to see rows inserted in its transaction. Defaults to the session.
+        """
+        return ((connection or self.session).scalar(select([func.max(model.__table__.c.id)])) or 0) + 1
+
+    def get_version_stamp(self, connection=None) -> Optional[str]:
+        """Get the stamp written by the last populate or update that changed the database, if any.
+
+        :param connection: The connection to read with. Defaults to the session.
+        """
+        statement = select([database_metadata.c.value]).where(database_metadata.c.key == VERSION_STAMP_KEY)
+        return (connection or self.session).scalar(statement)
+
+    @staticmethod
+    def _write_version_stamp(connection) -> str:
+        """Write a new version stamp, so readers caching query results know that the content changed."""
+        stamp = uuid.uuid4().hex
+        connection.execute(database_metadata.delete().where(database_metadata.c.key == VERSION_STAMP_KEY))
+        connection.execute(database_metadata.insert(), {'key': VERSION_STAMP_KEY, 'value': stamp})
+        logger.debug('wrote version stamp %s', stamp)
+        return stamp
+
+    def _build_pathway_index(self) -> None:
+        """Build the index from Reactome stable identifiers to pathway primary keys with a single query."""
+        self.reactome_id_to_pk = dict(self.session.query(Pathway.identifier, Pathway.id))
+
+    @staticmethod
+    def _resolve_species(species: Optional[Iterable[str]], pathways_path: Optional[str]) -> Optional[Set[str]]:
+        """Resolve species names and NCBI taxonomy identifiers to the species names used in the database.
+
+        Both are looked up among the species of the pathway table file, so only its species are mapped to taxonomy
+        identifiers.
+
+        :param species: Names or NCBI taxonomy identifiers of species
+        :param pathways_path: The path of the pathway table file. Defaults to the cached download.
+        :raises ValueError: if a name or a taxonomy identifier is not one of a species of the pathway table file
+        """
+        from .parsers.mappings import get_species_name_to_id
+        from .parsers.pathway_names import get_pathway_names_df
+
+        if species is None:
+            return None
+
+        species_names = {
+            SPECIES_REMAPPING.get(species_name, species_name)
+            for species_name in get_pathway_names_df(url=pathways_path)[2].unique().tolist()
+        }
+        rv = set()
+        taxonomy_id_to_name = None
+        for entry in species:
+            entry = str(entry).strip()
+            if entry.isdigit():
+                if taxonomy_id_to_name is None:
+                    species_name_to_id = get_species_name_to_id(pathways_path or PATHWAY_NAMES_PATH)
+                    taxonomy_id_to_name = {
+                        species_name_to_id[species_name]: species_name
+                        for species_name in species_names
+                        if species_name in species_name_to_id
+                    }
+                if entry not in taxonomy_id_to_name:
+                    raise ValueError(f'unknown NCBI taxonomy identifier: {entry}')
+                entry = taxonomy_id_to_name[entry]
+            entry = SPECIES_REMAPPING.get(entry, entry)
+            if entry not in species_names:
+                raise ValueError(f'unknown species: {entry}')
+            rv.add(entry)
+        return rv
+
+    def _get_pathway_names(
         self,
-        chemical_mapping: Mapping[str, List[Chemical]],
         url: Optional[str] = None,
-    ) -> None:
-        """Populate the pathway table.
+        species: Optional[Set[str]] = None,
+    ) -> Tuple[Mapping[str, Tuple[str, str]], Set[str]]:
+        """Get the pathways with their remapped species names, optionally keeping only some species.
+
+        The identifiers of the pathways that are left out are kept in :data:`excluded_reactome_ids` so the later
+        stages can skip rows referring to them without warning.
+
+        :param url: url from pathway table file
+        :param species: The names of the species to keep
+        :return: A dictionary of reactome_id: (name, species) and the set of species names
+        """
+        from .parsers.pathway_names import get_pathway_names_df, parse_pathway_names
+
+        pathways_dict, _ = parse_pathway_names(get_pathway_names_df(url=url))
+        pathways_dict = {
+            reactome_id: (name, SPECIES_REMAPPING.get(species_name, species_name))
+            for reactome_id, (name, species_name) in pathways_dict.items()
+        }
+
+        if species is not None:
+            self.excluded_reactome_ids = {
+                reactome_id
+                for reactome_id, (_, species_name) in pathways_dict.items()
+                if species_name not in species
+            }
+            pathways_dict = {
+                reactome_id: value
+                for reactome_id, value in pathways_dict.items()
+                if reactome_id not in self.excluded_reactome_ids
+            }
+
+        return pathways_dict, {species_name for _, species_name in pathways_dict.values()}
+
+    def _populate_pathways(self, url: Optional[str] = None, species: Optional[Set[str]] = None) -> None:
+        """Populate the species and pathway tables.
 
         :param url: url from pathway table file
+        :param species: The names of the species to load. Defaults to all.
         """
-        df = get_pathway_names_df(url=url)
-        pathways_dict, species_set = parse_pathway_names(df)
+        from .parsers.mappings import get_species_name_to_id
+
+        pathways_dict, species_set = self._get_pathway_names(url=url, species=species)
 
-        species_name_to_id = get_name_id_mapping('ncbitaxon')
-        species_name_to_model = {}
+        species_name_to_id = get_species_name_to_id(url or PATHWAY_NAMES_PATH)
+        species_name_to_model = {species.name: species for species in self.session.query(Species)}
 
-        for species_name in tqdm(species_set, desc='populating species'):
-            species_name = SPECIES_REMAPPING.get(species_name, species_name)
-            species_name_to_model[species_name] = self.get_or_create_species(
+        next_id = self._get_next_id(Species)
+        for species_name in tqdm(sorted(species_set), desc='populating species'):
+            if species_name in species_name_to_model:
+                continue
+            species_name_to_model[species_name] = Species(
+                id=next_id,
                 name=species_name,
                 taxonomy_id=species_name_to_id[species_name],
             )
+            self.session.add(species_name_to_model[species_name])
+            next_id += 1
 
-        for reactome_id, (name, species_name) in tqdm(pathways_dict.items(), desc='populating pathways'):
-            species_name = SPECIES_REMAPPING.get(species_name, species_name)
+        existing_reactome_ids = {reactome_id for reactome_id, in self.session.query(Pathway.identifier)}
 
-            pathway = self.get_or_create_pathway(
-                reactome_id=reactome_id,
+        next_id = self._get_next_id(Pathway)
+        for reactome_id, (name, species_name) in tqdm(pathways_dict.items(), desc='populating pathways'):
+            if reactome_id in existing_reactome_ids:
+                continue
+            self.session.add(Pathway(
+                id=next_id,
+                identifier=reactome_id,
                 name=name,
                 species=species_name_to_model[species_name],
-                chemicals=chemical_mapping.get(reactome_id, []),
-            )
-            self.session.add(pathway)
+            ))
+            next_id += 1
 
         self.session.commit()
 
+    def _resolve_hierarchy(
+        self,
+        pathways_hierarchy_df: pd.DataFrame,
+    ) -> Tuple[Dict[int, int], List[Tuple[int, int]]]:
+        """Resolve the Reactome identifiers of the hierarchy to primary keys through the pathway index.
+
+        The parent reference of a child is the last parent listed for it, like with repeated
+        ``parent.children.append(child)``. The edges keep all of them.
+
+        :param pathways_hierarchy_df: The (parent, child) Reactome identifier pairs of the hierarchy file
+        :return: A mapping from the primary key of each child to the one of its parent reference, and the distinct
+         (parent, child) primary key pairs of the edges
+        """
+        from .hierarchy import PathwayHierarchy
+
+        hierarchy = PathwayHierarchy.from_dataframe(pathways_hierarchy_df, identifiers=list(self.reactome_id_to_pk))
+        orphans = pathways_hierarchy_df.iloc[hierarchy.orphan_edges, :2]
+        for parent_id, child_id in orphans.itertuples(index=False, name=None):
+            if parent_id in self.excluded_reactome_ids or child_id in self.excluded_reactome_ids:
+                continue
+            logger.warning('pathway hierarchy: could not find reactome:%s or reactome:%s', parent_id, child_id)
+
+        cycle_ids = hierarchy.get_cycle_pathways()
+        if cycle_ids:
+            logger.warning(
+                'pathway hierarchy: %d pathways are on or below a cycle, like reactome:%s',
+                len(cycle_ids),
+                cycle_ids[0],
+            )
+
+        pks = np.fromiter(self.reactome_id_to_pk.values(), dtype=np.int64, count=len(self.reactome_id_to_pk))
+        parent_array = hierarchy.get_parent_array()
+        children = np.flatnonzero(parent_array >= 0)
+        edge_parents, edge_children = hierarchy.get_edges()
+        return (
+            dict(zip(pks[children].tolist(), pks[parent_array[children]].tolist())),
+            list(zip(pks[edge_parents].tolist(), pks[edge_children].tolist())),
+        )
+
+    def _build_closure(self, connection, chunksize: Optional[int] = None) -> int:
+        """Rebuild the transitive closure of the pathway hierarchy from the stored edges, through all parents.
+
+        The depth of each row is the shortest distance between the two pathways.
+
+        :param connection: A SQLAlchemy connection, preferably inside a transaction
+        :param chunksize: The number of rows per ``executemany``
+        :return: The number of rows in the closure table
+        """
+        from .hierarchy import PathwayHierarchy
+
+        pathway_pks = pd.Index([pk for pk, in connection.execute(select([Pathway.__table__.c.id]))])
+        edges = connection.execute(select([pathway_hierarchy.c.parent_id, pathway_hierarchy.c.child_id])).fetchall()
+        hierarchy = PathwayHierarchy(
+            pathway_pks,
+            pathway_pks.get_indexer([parent_pk for parent_pk, _ in edges]),
+            pathway_pks.get_indexer([child_pk for _, child_pk in edges]),
+        )
+        cycle_pks = hierarchy.get_cycle_pathways()
+        if cycle_pks:
+            logger.warning('pathway hierarchy: cycle through pathway %d', cycle_pks[0])
+
+        pks = np.asarray(hierarchy.identifiers, dtype=np.int64)
+        ancestors, descendants, depths = hierarchy.get_transitive_closure()
+        connection.execute(pathway_closure.delete())
+        return bulk_insert(
+            connection,
+            pathway_closure,
+            (
+                {'ancestor_id': ancestor_pk, 'descendant_id': descendant_pk, 'depth': depth}
+                for ancestor_pk, descendant_pk, depth in zip(
+                    pks[ancestors].tolist(), pks[descendants].tolist(), depths.tolist(),
+                )
+            ),
+            chunksize=chunksize,
+        )
+
     def _pathway_hierarchy(self, url: Optional[str] = None) -> None:
         """Links pathway models through hierarchy.
 
         :param url: url from pathway hierarchy file
         """
-        df = get_pathway_hierarchy_df(url=url)
-        pathways_hierarchy = parse_pathway_hierarchy(df)
+        from .parsers.pathway_hierarchy import get_pathway_hierarchy_df
 
-        for parent_id, child_id in tqdm(pathways_hierarchy, desc='populating pathway hierarchy'):
-            if parent_id is None:
-                logger.warning('parent id is None')
-                continue
+        child_pk_to_parent_pk, edges = self._resolve_hierarchy(get_pathway_hierarchy_df(url=url))
 
-            if child_id is None:
-                logger.warning('child id is None')
-                continue
+        bulk_insert(
+            self.session.connection(),
+            pathway_hierarchy,
+            ({'parent_id': parent_pk, 'child_id': child_pk} for parent_pk, child_pk in edges),
+        )
+        bulk_update(
+            self.session.connection(),
+            Pathway.__table__,
+            {'parent_id': '_parent_id'},
+            (
+                {'_id': child_pk, '_parent_id': parent_pk}
+                for child_pk, parent_pk in child_pk_to_parent_pk.items()
+            ),
+        )
+        self._build_closure(self.session.connection())
+        self.session.commit()
 
-            parent = self.get_pathway_by_id(parent_id)
-            child = self.get_pathway_by_id(child_id)
+    @staticmethod
+    def _iter_entity_dfs(
+        iter_dfs: Callable[..., Iterable[pd.DataFrame]],
+        url: Optional[str],
+        chunksize: Optional[int],
+        species: Optional[Set[str]],
+        background: bool,
+    ) -> Iterable[pd.DataFrame]:
+        """Iterate over the preprocessed chunks of an entity file, optionally parsed ahead in a background thread.
+
+        :param iter_dfs: :func:`iter_procesed_proteins_pathways_dfs` or :func:`iter_procesed_chemical_pathways_dfs`
+        :param url: url from the entity file
+        :param chunksize: The number of lines of the file processed at a time
+        :param species: The names of the species to load. Defaults to all.
+        :param background: If true, parse the next chunk while the current one is written
+        """
+        dfs = iter_dfs(url=url, chunksize=chunksize, species=species)
+        if background:
+            return iter_in_background(dfs)
+        return dfs
 
-            parent.children.append(child)
+    def _iter_resolved_chunks(
+        self,
+        dfs: Iterable[pd.DataFrame],
+        columns: Mapping[str, str],
+        identifier_to_pk: Dict[str, int],
+        next_id: int,
+        desc: str,
+        links: Optional[Set[Tuple[int, int]]] = None,
+    ) -> Iterable[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Tuple[int, int]]]]:
+        """Resolve chunks of an entity-pathway file against the pathway index.
+
+        :param dfs: Preprocessed chunks of the entity-pathway file
+        :param columns: A mapping from dataframe columns to model attributes. The first one identifies the entity.
+        :param identifier_to_pk: The primary keys of the entities already stored. Updated in place.
+        :param next_id: The primary key given to the next new entity
+        :param desc: The description of the progress bar
+        :param links: The (entity, pathway) primary key pairs seen so far, which are left out. Updated in place. If
+         None, the links are only de-duplicated within each chunk, so memory does not grow with the file, and those
+         repeated across chunks have to be skipped by the primary key of the link table when they are inserted.
+        :return: For each chunk, the rows of the new entities, the rows of the stored entities seen for the first
+         time, and the links
+        """
+        key = next(iter(columns))
+        first_new_id = next_id
+        seen_stored_pks = set()
+        missing_reactome_ids = set()
+        progress = tqdm(desc=desc, unit='row', unit_scale=True)
+
+        for df in dfs:
+            progress.update(len(df.index))
+            df = df[df[key].notna()].drop_duplicates([key, 'reactome_id'])
+
+            entities, stored_entities, new_links = [], [], []
+            for reactome_id, identifier, *values in df[['reactome_id', *columns]].values:
+                pathway_pk = self.reactome_id_to_pk.get(reactome_id)
+                if pathway_pk is None:
+                    if reactome_id in self.excluded_reactome_ids:
+                        continue
+                    if reactome_id not in missing_reactome_ids:
+                        progress.write(f'{desc}: could not find reactome:{reactome_id}')
+                    missing_reactome_ids.add(reactome_id)
+                    continue
+
+                entity_pk = identifier_to_pk.get(identifier)
+                if entity_pk is None:
+                    entity_pk = identifier_to_pk[identifier] = next_id
+                    next_id += 1
+                    entity = dict(zip(columns.values(), (identifier, *map(none_if_nan, values))))
+                    entity['id'] = entity_pk
+                    entities.append(entity)
+                elif entity_pk < first_new_id and entity_pk not in seen_stored_pks:
+                    seen_stored_pks.add(entity_pk)
+                    entity = dict(zip(columns.values(), (identifier, *map(none_if_nan, values))))
+                    entity['id'] = entity_pk
+                    stored_entities.append(entity)
+
+                # the chunk has no repeated pairs, so only the links of earlier chunks can be repeats
+                link = entity_pk, pathway_pk
+                if links is None:
+                    new_links.append(link)
+                elif link not in links:
+                    links.add(link)
+                    new_links.append(link)
+
+            yield entities, stored_entities, new_links
+
+        progress.close()
 
-        self.session.commit()
+        if missing_reactome_ids:
+            logger.warning('%s: missing %d reactome ids', desc, len(missing_reactome_ids))
 
-    def _pathway_protein(self, url: Optional[str] = None) -> None:
+    def _pathway_protein(
+        self,
+        url: Optional[str] = None,
+        chunksize: Optional[int] = None,
+        species: Optional[Set[str]] = None,
+        background: bool = False,
+    ) -> None:
         """Populate UniProt tables.
 
         :param url: url from pathway protein file
+        :param chunksize: The number of lines of the file processed at a time
+        :param species: The names of the species to load. Defaults to all.
+        :param background: If true, parse the next chunk of the file while the current one is written
         """
-        pathways_proteins_df = get_procesed_proteins_pathways_df(url=url)
+        from .parsers.entity_pathways import iter_procesed_proteins_pathways_dfs
 
-        missing_reactome_ids = set()
-        missing_hgnc_info = set()
-
-        protein_info_df = pathways_proteins_df[
-            ['uniprot_id', 'uniprot_accession', 'hgnc_id', 'hgnc_symbol']].drop_duplicates()
-        it = tqdm(protein_info_df.values, total=len(protein_info_df.index), desc='populating proteins')
-        for uniprot_id, uniprot_accession, hgnc_id, hgnc_symbol in it:
-            self.uniprot_id_to_protein[uniprot_id] = Protein(
-                uniprot_id=uniprot_id,
-                uniprot_accession=uniprot_accession,
-                hgnc_id=hgnc_id,
-                hgnc_symbol=hgnc_symbol,
-            )
-
-        it = tqdm(
-            pathways_proteins_df[['uniprot_id', 'reactome_id']].values,
-            total=len(pathways_proteins_df.index),
+        chunks = self._iter_resolved_chunks(
+            self._iter_entity_dfs(iter_procesed_proteins_pathways_dfs, url, chunksize, species, background),
+            columns=PROTEIN_ATTRIBUTES,
+            identifier_to_pk=dict(self.session.query(Protein.uniprot_id, Protein.id)),
+            next_id=self._get_next_id(Protein),
             desc='populating proteins-pathway relations',
         )
-        for uniprot_id, reactome_id in it:
-            if uniprot_id is None:
-                logger.debug('uniprot_id is none')
-                continue
+        for proteins, _, links in chunks:
+            self.session.add_all(Protein(**protein) for protein in proteins)
+            self.session.flush()
+            bulk_insert(
+                self.session.connection(),
+                protein_pathway,
+                ({'protein_id': protein_pk, 'pathway_id': pathway_pk} for protein_pk, pathway_pk in links),
+                chunksize=chunksize,
+                ignore_duplicates=True,
+            )
 
-            protein = self.uniprot_id_to_protein[uniprot_id]
-            pathway = self.get_pathway_by_id(reactome_id)
-            if pathway is None:
-                if reactome_id not in missing_reactome_ids:
-                    it.write(f'protein/pathway mapping: could not find reactome:{reactome_id}')
-                missing_reactome_ids.add(reactome_id)
-                continue
+        self.session.commit()
 
-            if pathway not in protein.pathways:
-                protein.pathways.append(pathway)
+    def _pathway_chemical(
+        self,
+        url: Optional[str] = None,
+        chunksize: Optional[int] = None,
+        species: Optional[Set[str]] = None,
+        background: bool = False,
+    ) -> None:
+        """Populate ChEBI tables.
+
+        :param url: url from pathway chemical file
+        :param chunksize: The number of lines of the file processed at a time
+        :param species: The names of the species to load. Defaults to all.
+        :param background: If true, parse the next chunk of the file while the current one is written
+        """
+        from .parsers.entity_pathways import iter_procesed_chemical_pathways_dfs
+
+        chunks = self._iter_resolved_chunks(
+            self._iter_entity_dfs(iter_procesed_chemical_pathways_dfs, url, chunksize, species, background),
+            columns=CHEMICAL_ATTRIBUTES,
+            identifier_to_pk=dict(self.session.query(Chemical.chebi_id, Chemical.id)),
+            next_id=self._get_next_id(Chemical),
+            desc='populating chemical/reactome',
+        )
+        for chemicals, _, links in chunks:
+            self.session.add_all(Chemical(**chemical) for chemical in chemicals)
+            self.session.flush()
+            bulk_insert(
+                self.session.connection(),
+                chemical_pathway,
+                ({'chemical_id': chemical_pk, 'pathway_id': pathway_pk} for chemical_pk, pathway_pk in links),
+                chunksize=chunksize,
+                ignore_duplicates=True,
+            )
 
         self.session.commit()
 
-        if missing_reactome_ids:
-            logger.warning('missing %d reactome ids', len(missing_reactome_ids))
+    def _populate_bulk(
+        self,
+        sources: Mapping[str, Future],
+        chunksize: Optional[int] = None,
+        species: Optional[Set[str]] = None,
+        background: bool = False,
+    ) -> None:
+        """Populate all tables with batched inserts and pre-assigned primary keys.
 
-        if missing_hgnc_info:
-            logger.warning('missing %d hgncs', len(missing_hgnc_info))
+        This produces the same content as the ORM-based loading, but never instantiates models. It assumes that the
+        tables are empty. The lookup indexes are dropped first and built once all rows are inserted, and the sequences
+        of the primary keys are moved past the inserted rows.
 
-    def _get_chemical_mapping(self, url: Optional[str] = None) -> Mapping[str, List[Chemical]]:
-        """Populate ChEBI tables.
+        :param sources: Futures of the source files, from :func:`prefetch_sources`
+        :param chunksize: The number of lines of the entity files processed at a time and rows per ``executemany``
+        :param species: The names of the species to load. Defaults to all.
+        :param background: If true, parse the next chunk of the entity files while the current one is written
+        """
+        from .parsers.entity_pathways import iter_procesed_chemical_pathways_dfs, iter_procesed_proteins_pathways_dfs
+        from .parsers.mappings import get_species_name_to_id
+        from .parsers.pathway_hierarchy import get_pathway_hierarchy_df
+
+        pathways_path = sources['pathways'].result()
+        pathways_dict, species_set = self._get_pathway_names(url=pathways_path, species=species)
+        species_name_to_id = get_species_name_to_id(pathways_path or PATHWAY_NAMES_PATH)
+
+        species_name_to_pk = {}
+        species_rows = []
+        for species_name in sorted(species_set):
+            species_name_to_pk[species_name] = len(species_rows) + 1
+            species_rows.append({
+                'id': species_name_to_pk[species_name],
+                'taxonomy_id': species_name_to_id[species_name],
+                'name': species_name,
+            })
+
+        reactome_id_to_pk = self.reactome_id_to_pk = {}
+        pathway_rows = []
+        for reactome_id, (name, species_name) in pathways_dict.items():
+            reactome_id_to_pk[reactome_id] = len(pathway_rows) + 1
+            pathway_rows.append({
+                'id': reactome_id_to_pk[reactome_id],
+                'identifier': reactome_id,
+                'name': name,
+                'species_id': species_name_to_pk[species_name],
+            })
+
+        child_pk_to_parent_pk, edges = self._resolve_hierarchy(
+            get_pathway_hierarchy_df(url=sources['hierarchy'].result()),
+        )
 
-        :param url: url from pathway chemical file
+        with self.engine.begin() as connection:
+            drop_indexes(connection, LOOKUP_INDEXES)
+            bulk_insert(connection, Species.__table__, species_rows, chunksize=chunksize)
+            bulk_insert(connection, Pathway.__table__, pathway_rows, chunksize=chunksize)
+            bulk_insert(
+                connection,
+                pathway_hierarchy,
+                ({'parent_id': parent_pk, 'child_id': child_pk} for parent_pk, child_pk in edges),
+                chunksize=chunksize,
+            )
+            bulk_update(
+                connection,
+                Pathway.__table__,
+                {'parent_id': '_parent_id'},
+                (
+                    {'_id': child_pk, '_parent_id': parent_pk}
+                    for child_pk, parent_pk in child_pk_to_parent_pk.items()
+                ),
+                chunksize=chunksize,
+            )
+            self._build_closure(connection, chunksize=chunksize)
+
+            chemical_chunks = self._iter_resolved_chunks(
+                self._iter_entity_dfs(
+                    iter_procesed_chemical_pathways_dfs, sources['chemicals'].result(), chunksize, species, background,
+                ),
+                columns=CHEMICAL_ATTRIBUTES,
+                identifier_to_pk={},
+                next_id=1,
+                desc='loading chemicals',
+            )
+            for chemical_rows, _, links in chemical_chunks:
+                bulk_insert(connection, Chemical.__table__, chemical_rows, chunksize=chunksize)
+                bulk_insert(
+                    connection,
+                    chemical_pathway,
+                    ({'chemical_id': chemical_pk, 'pathway_id': pathway_pk} for chemical_pk, pathway_pk in links),
+                    chunksize=chunksize,
+                    ignore_duplicates=True,
+                )
+
+            protein_chunks = self._iter_resolved_chunks(
+                self._iter_entity_dfs(
+                    iter_procesed_proteins_pathways_dfs, sources['proteins'].result(), chunksize, species, background,
+                ),
+                columns=PROTEIN_ATTRIBUTES,
+                identifier_to_pk={},
+                next_id=1,
+                desc='loading proteins',
+            )
+            for protein_rows, _, links in protein_chunks:
+                bulk_insert(connection, Protein.__table__, protein_rows, chunksize=chunksize)
+                bulk_insert(
+                    connection,
+                    protein_pathway,
+                    ({'protein_id': protein_pk, 'pathway_id': pathway_pk} for protein_pk, pathway_pk in links),
+                    chunksize=chunksize,
+                    ignore_duplicates=True,
+                )
+
+            create_indexes(connection, LOOKUP_INDEXES)
+            reset_sequences(connection, KEYED_TABLES)
+
+        logger.info('bulk loaded %d species and %d pathways', len(species_rows), len(pathway_rows))
+
+    def _update_pathways(
+        self,
+        connection,
+        pathways_dict: Mapping[str, Tuple[str, str]],
+        species_set: Set[str],
+        changes: Counter,
+        chunksize: Optional[int] = None,
+        pathways_path: Optional[str] = None,
+    ) -> Tuple[List[int], List[int]]:
+        """Insert the new species and pathways, update the renamed pathways, and rebuild the pathway index.
+
+        :param connection: The connection holding the update transaction
+        :param pathways_dict: A dictionary of reactome_id: (name, species) from the new release
+        :param species_set: The names of the species in the new release
+        :param changes: The number of changed rows per table and operation. Updated in place.
+        :param chunksize: The number of rows per ``executemany``
+        :param pathways_path: The pathway table file, whose species the taxonomy mapping is trimmed to
+        :return: The primary keys of the stored species and pathways missing from the new release
         """
-        chemical_pathways_df = get_procesed_chemical_pathways_df(url=url)
-        chemicals_df = chemical_pathways_df[['chebi_id', 'chebi_name']].drop_duplicates()
-        it = tqdm(chemicals_df.values, total=len(chemicals_df.index), desc='populating chemicals')
-        chebi_id_to_chemical = {}
-        for chebi_id, chebi_name in it:
-            if pd.isna(chebi_id):
+        from .parsers.mappings import get_species_name_to_id
+
+        species_table, pathway_table = Species.__table__, Pathway.__table__
+
+        species_name_to_pk = dict(connection.execute(select([species_table.c.name, species_table.c.id])).fetchall())
+        removed_species_pks = [pk for name, pk in species_name_to_pk.items() if name not in species_set]
+
+        new_species = sorted(species_set - set(species_name_to_pk))
+        species_rows = []
+        if new_species:
+            species_name_to_id = get_species_name_to_id(pathways_path or PATHWAY_NAMES_PATH)
+            next_id = self._get_next_id(Species, connection)
+            for species_name in new_species:
+                species_name_to_pk[species_name] = next_id
+                species_rows.append({
+                    'id': next_id,
+                    'taxonomy_id': species_name_to_id[species_name],
+                    'name': species_name,
+                })
+                next_id += 1
+        changes[f'{species_table.name}_inserted'] = bulk_insert(
+            connection, species_table, species_rows, chunksize=chunksize,
+        )
+
+        stored = {
+            identifier: (pk, name, species_pk)
+            for pk, identifier, name, species_pk in connection.execute(select([
+                pathway_table.c.id, pathway_table.c.identifier, pathway_table.c.name, pathway_table.c.species_id,
+            ]))
+        }
+        removed_pathway_pks = [pk for identifier, (pk, _, _) in stored.items() if identifier not in pathways_dict]
+
+        reactome_id_to_pk = self.reactome_id_to_pk = {}
+        next_id = self._get_next_id(Pathway, connection)
+        pathway_rows, renamed_rows = [], []
+        for reactome_id, (name, species_name) in pathways_dict.items():
+            species_pk = species_name_to_pk[species_name]
+            if reactome_id not in stored:
+                reactome_id_to_pk[reactome_id] = next_id
+                pathway_rows.append({
+                    'id': next_id,
+                    'identifier': reactome_id,
+                    'name': name,
+                    'species_id': species_pk,
+                })
+                next_id += 1
                 continue
-            chebi_id_to_chemical[chebi_id] = Chemical(chebi_id=chebi_id, name=chebi_name)
 
-        rv = defaultdict(list)
-        _slim_chemical_pathways_df = chemical_pathways_df[['chebi_id', 'reactome_id']].drop_duplicates()
-        it = tqdm(
-            _slim_chemical_pathways_df.values,
-            total=len(_slim_chemical_pathways_df.index),
-            desc='populating chemical/reactome',
+            pk, stored_name, stored_species_pk = stored[reactome_id]
+            reactome_id_to_pk[reactome_id] = pk
+            if (name, species_pk) != (stored_name, stored_species_pk):
+                renamed_rows.append({'_id': pk, '_name': name, '_species_id': species_pk})
+
+        changes[f'{pathway_table.name}_inserted'] = bulk_insert(
+            connection, pathway_table, pathway_rows, chunksize=chunksize,
+        )
+        changes[f'{pathway_table.name}_updated'] = bulk_update(
+            connection,
+            pathway_table,
+            {'name': '_name', 'species_id': '_species_id'},
+            renamed_rows,
+            chunksize=chunksize,
+        )
+
+        return removed_species_pks, removed_pathway_pks
+
+    def _update_hierarchy(
+        self,
+        connection,
+        pathways_hierarchy_df: pd.DataFrame,
+        changes: Counter,
+        chunksize: Optional[int] = None,
+    ) -> None:
+        """Update the parents and hierarchy edges that changed, and unlink the pathways missing from the new release.
+
+        :param connection: The connection holding the update transaction
+        :param pathways_hierarchy_df: The (parent, child) Reactome identifier pairs of the new release
+        :param changes: The number of changed rows per table and operation. Updated in place.
+        :param chunksize: The number of rows per ``executemany``
+        """
+        pathway_table = Pathway.__table__
+        child_pk_to_parent_pk, edges = self._resolve_hierarchy(pathways_hierarchy_df)
+
+        stored_edges = {
+            tuple(row)
+            for row in connection.execute(select([pathway_hierarchy.c.parent_id, pathway_hierarchy.c.child_id]))
+        }
+        changes[f'{pathway_hierarchy.name}_deleted'] = bulk_delete(
+            connection,
+            pathway_hierarchy,
+            ['parent_id', 'child_id'],
+            (
+                {'_parent_id': parent_pk, '_child_id': child_pk}
+                for parent_pk, child_pk in stored_edges.difference(edges)
+            ),
+            chunksize=chunksize,
+        )
+        changes[f'{pathway_hierarchy.name}_inserted'] = bulk_insert(
+            connection,
+            pathway_hierarchy,
+            (
+                {'parent_id': parent_pk, 'child_id': child_pk}
+                for parent_pk, child_pk in edges
+                if (parent_pk, child_pk) not in stored_edges
+            ),
+            chunksize=chunksize,
         )
-        for chebi_id, reactome_id in it:
-            chemical = chebi_id_to_chemical[chebi_id]
-            rv[reactome_id].append(chemical)
-        return dict(rv)
+
+        changes[f'{pathway_table.name}_parent_id_updated'] = bulk_update(
+            connection,
+            pathway_table,
+            {'parent_id': '_parent_id'},
+            [
+                {'_id': pk, '_parent_id': child_pk_to_parent_pk.get(pk)}
+                for pk, parent_pk in connection.execute(select([pathway_table.c.id, pathway_table.c.parent_id]))
+                if parent_pk != child_pk_to_parent_pk.get(pk)
+            ],
+            chunksize=chunksize,
+        )
+
+    def _update_entities(
+        self,
+        connection,
+        dfs: Iterable[pd.DataFrame],
+        model,
+        link_table,
+        columns: Mapping[str, str],
+        changes: Counter,
+        chunksize: Optional[int] = None,
+    ) -> None:
+        """Apply the differences between the stored entities and their pathway links and the new release.
+
+        :param connection: The connection holding the update transaction
+        :param dfs: Preprocessed chunks of the entity-pathway file of the new release
+        :param model: The entity model, :class:`Protein` or :class:`Chemical`
+        :param link_table: The association table between the entity model and pathways
+        :param columns: A mapping from dataframe columns to model attributes. The first one identifies the entity.
+        :param changes: The number of changed rows per table and operation. Updated in place.
+        :param chunksize: The number of rows per ``executemany``
+        """
+        table = model.__table__
+        attributes = list(columns.values())
+        entity_column = next(column.name for column in link_table.c if column.name != 'pathway_id')
+
+        stored = {
+            pk: tuple(values)
+            for pk, *values in connection.execute(select([table.c.id, *(table.c[a] for a in attributes)]))
+        }
+        stored_links = {
+            tuple(row)
+            for row in connection.execute(select([link_table.c[entity_column], link_table.c.pathway_id]))
+        }
+
+        seen_pks, links = set(), set()
+        chunks = self._iter_resolved_chunks(
+            dfs,
+            columns=columns,
+            identifier_to_pk={values[0]: pk for pk, values in stored.items()},
+            links=links,
+            next_id=self._get_next_id(model, connection),
+            desc=f'updating {table.name}',
+        )
+        for entity_rows, stored_entity_rows, _ in chunks:
+            changes[f'{table.name}_inserted'] += bulk_insert(connection, table, entity_rows, chunksize=chunksize)
+            seen_pks.update(row['id'] for row in stored_entity_rows)
+            changes[f'{table.name}_updated'] += bulk_update(
+                connection,
+                table,
+                {attribute: f'_{attribute}' for attribute in attributes[1:]},
+                [
+                    {'_id': row['id'], **{f'_{attribute}': row[attribute] for attribute in attributes[1:]}}
+                    for row in stored_entity_rows
+                    if tuple(row[attribute] for attribute in attributes) != stored[row['id']]
+                ],
+                chunksize=chunksize,
+            )
+
+        changes[f'{link_table.name}_deleted'] = bulk_delete(
+            connection,
+            link_table,
+            [entity_column, 'pathway_id'],
+            (
+                {f'_{entity_column}': entity_pk, '_pathway_id': pathway_pk}
+                for entity_pk, pathway_pk in sorted(stored_links - links)
+            ),
+            chunksize=chunksize,
+        )
+        changes[f'{link_table.name}_inserted'] = bulk_insert(
+            connection,
+            link_table,
+            (
+                {entity_column: entity_pk, 'pathway_id': pathway_pk}
+                for entity_pk, pathway_pk in sorted(links - stored_links)
+            ),
+            chunksize=chunksize,
+        )
+        changes[f'{table.name}_deleted'] = bulk_delete(
+            connection,
+            table,
+            ['id'],
+            ({'_id': pk} for pk in sorted(stored.keys() - seen_pks)),
+            chunksize=chunksize,
+        )
+
+    def update(
+        self,
+        pathways_path: Optional[str] = None,
+        pathways_hierarchy_path: Optional[str] = None,
+        pathways_proteins_path: Optional[str] = None,
+        pathways_chemicals_path: Optional[str] = None,
+        chunksize: Optional[int] = None,
+        species: Optional[Iterable[str]] = None,
+        prefetch: bool = True,
+        force_download: bool = True,
+    ) -> Mapping[str, int]:
+        """Update a populated database to a new Reactome release without dropping it.
+
+        The stored pathways, hierarchy, proteins, chemicals, and links are compared with the new files. Only the
+        differences are written, as batched inserts, updates, and deletes in a single transaction, so other
+        connections keep seeing the previous release until it commits. Afterwards, the database has the same
+        content as one populated from the new files with the same ``species``.
+
+        :param pathways_path: url from pathway table file
+        :param pathways_hierarchy_path: url from pathway hierarchy file
+        :param pathways_proteins_path: url from pathway protein file
+        :param pathways_chemicals_path: url from pathway chemical file
+        :param chunksize: The number of lines of the protein and chemical files processed at a time, which is also
+         the number of rows sent per ``executemany``
+        :param species: Names or NCBI taxonomy identifiers of the species to keep. Defaults to all.
+        :param prefetch: If true, prepare the four files concurrently and parse the entity files ahead of the writes
+        :param force_download: If true, download the files that are not given again, instead of comparing the
+         database with the cached files it was likely populated from
+        :return: The number of inserted, updated, and deleted rows, keyed by table name and operation
+        :raises ValueError: If a species is not one of the species of the pathway table file
+        """
+        from .parsers.entity_pathways import iter_procesed_chemical_pathways_dfs, iter_procesed_proteins_pathways_dfs
+        from .parsers.pathway_hierarchy import get_pathway_hierarchy_df
+        from .parsers.prefetch import prefetch_sources
+
+        self.excluded_reactome_ids = set()
+        sources = prefetch_sources(
+            pathways_path=pathways_path,
+            pathways_hierarchy_path=pathways_hierarchy_path,
+            pathways_proteins_path=pathways_proteins_path,
+            pathways_chemicals_path=pathways_chemicals_path,
+            parallel=prefetch,
+            force_download=force_download,
+        )
+        species = self._resolve_species(species, sources['pathways'].result())
+
+        pathways_path = sources['pathways'].result()
+        pathways_dict, species_set = self._get_pathway_names(url=pathways_path, species=species)
+        pathways_hierarchy_df = get_pathway_hierarchy_df(url=sources['hierarchy'].result())
+
+        changes = Counter()
+        with StatementCounter(self.engine) as counter, self.engine.begin() as connection:
+            removed_species_pks, removed_pathway_pks = self._update_pathways(
+                connection, pathways_dict, species_set, changes, chunksize=chunksize, pathways_path=pathways_path,
+            )
+            self._update_hierarchy(connection, pathways_hierarchy_df, changes, chunksize=chunksize)
+            self._update_entities(
+                connection,
+                self._iter_entity_dfs(
+                    iter_procesed_chemical_pathways_dfs, sources['chemicals'].result(), chunksize, species, prefetch,
+                ),
+                model=Chemical,
+                link_table=chemical_pathway,
+                columns=CHEMICAL_ATTRIBUTES,
+                changes=changes,
+                chunksize=chunksize,
+            )
+            self._update_entities(
+                connection,
+                self._iter_entity_dfs(
+                    iter_procesed_proteins_pathways_dfs, sources['proteins'].result(), chunksize, species, prefetch,
+                ),
+                model=Protein,
+                link_table=protein_pathway,
+                columns=PROTEIN_ATTRIBUTES,
+                changes=changes,
+                chunksize=chunksize,
+            )
+            # Links to and parent references of the removed pathways are gone at this point
+            connection.execute(pathway_closure.delete())
+            changes[f'{Pathway.__tablename__}_deleted'] = bulk_delete(
+                connection, Pathway.__table__, ['id'], ({'_id': pk} for pk in removed_pathway_pks), chunksize=chunksize,
+            )
+            changes[f'{Species.__tablename__}_deleted'] = bulk_delete(
+                connection, Species.__table__, ['id'], ({'_id': pk} for pk in removed_species_pks), chunksize=chunksize,
+            )
+            self._build_closure(connection, chunksize=chunksize)
+            reset_sequences(connection, KEYED_TABLES)
+            if any(changes.values()):
+                self._write_version_stamp(connection)
+
+        # The session may hold models of the previous release
+        self.session.expire_all()
+        logger.info('update made %d round trips to the database', counter.count)
+        return dict(changes)
 
     def populate(
         self,
@@ -383,6 +1633,10 @@ class Manager(CompathManager):
         pathways_hierarchy_path: Optional[str] = None,
         pathways_proteins_path: Optional[str] = None,
         pathways_chemicals_path: Optional[str] = None,
+        bulk: bool = False,
+        chunksize: Optional[int] = None,
+        species: Optional[Iterable[str]] = None,
+        prefetch: bool = True,
     ) -> None:
         """Populate all tables.
 
@@ -390,11 +1644,308 @@ class Manager(CompathManager):
         :param pathways_hierarchy_path: url from pathway hierarchy file
         :param pathways_proteins_path: url from pathway protein file
         :param pathways_chemicals_path: url from pathway chemical file
+        :param bulk: If true, load with batched inserts instead of through the ORM. Requires an empty database.
+        :param chunksize: The number of lines of the protein and chemical files processed at a time, which is also
+         the number of rows sent per ``executemany``. Bounds the memory used by the load.
+        :param species: Names or NCBI taxonomy identifiers of the species to load. Defaults to all. Lines of other
+         species are dropped while parsing.
+        :param prefetch: If true, download (or find in the cache) the four files and load the lookup tables of their
+         parsers concurrently. Each stage then only waits for its own file, and the entity files are parsed ahead of
+         the writes in a background thread.
+        :raises ValueError: If a species is not one of the species of the pathway table file, or if loading in bulk
+         into a populated database
         """
-        chemical_mapping = self._get_chemical_mapping(url=pathways_chemicals_path)
-        self._populate_pathways(url=pathways_path, chemical_mapping=chemical_mapping)
-        self._pathway_hierarchy(url=pathways_hierarchy_path)
-        self._pathway_protein(url=pathways_proteins_path)
+        from .parsers.prefetch import prefetch_sources
+
+        if bulk and self.is_populated():
+            raise ValueError('can not load in bulk into a populated database. Drop it first, or use update')
+
+        self.excluded_reactome_ids = set()
+        sources = prefetch_sources(
+            pathways_path=pathways_path,
+            pathways_hierarchy_path=pathways_hierarchy_path,
+            pathways_proteins_path=pathways_proteins_path,
+            pathways_chemicals_path=pathways_chemicals_path,
+            parallel=prefetch,
+        )
+        species = self._resolve_species(species, sources['pathways'].result())
+
+        with StatementCounter(self.engine) as counter:
+            if bulk:
+                self._populate_bulk(sources, chunksize=chunksize, species=species, background=prefetch)
+            else:
+                self._populate_pathways(url=sources['pathways'].result(), species=species)
+                self._build_pathway_index()
+                self._pathway_hierarchy(url=sources['hierarchy'].result())
+                self._pathway_chemical(
+                    url=sources['chemicals'].result(), chunksize=chunksize, species=species, background=prefetch,
+                )
+                self._pathway_protein(
+                    url=sources['proteins'].result(), chunksize=chunksize, species=species, background=prefetch,
+                )
+                with self.engine.begin() as connection:
+                    # databases made by older versions lack the lookup indexes
+                    create_indexes(connection, LOOKUP_INDEXES)
+                    reset_sequences(connection, KEYED_TABLES)
+
+        self.populate_round_trips = counter.count
+        logger.info('populate made %d round trips to the database', counter.count)
+
+        with self.engine.begin() as connection:
+            self._write_version_stamp(connection)
+
+    @staticmethod
+    def _cli_add_populate(main: click.Group) -> click.Group:  # noqa: D202
+        """Add a ``populate`` command that can also load in bulk."""
+
+        @main.command()
+        @click.option('-r', '--reset', is_flag=True, help='Nuke database first')
+        @click.option('-f', '--force', is_flag=True, help='Force overwrite if already populated')
+        @click.option(
+            '--bulk', is_flag=True,
+            help='Load with batched inserts instead of the ORM. With --force, the database is reset first.',
+        )
+        @click.option('--chunksize', type=int, help='Lines of the entity files processed at a time')
+        @click.option(
+            '--prefetch/--no-prefetch', default=True, show_default=True,
+            help='Prepare the source files concurrently',
+        )
+        @click.option(
+            '-s', '--species', multiple=True,
+            help='Name or NCBI taxonomy identifier of a species to load. Can be given several times. Defaults to all.',
+        )
+        @verbose_option
+        @click.pass_obj
+        def populate(
+            manager: Manager,
+            reset: bool,
+            force: bool,
+            bulk: bool,
+            chunksize: Optional[int],
+            prefetch: bool,
+            species: Tuple[str, ...],
+        ):
+            """Populate the database."""
+            if bulk and force and not reset and manager.is_populated():
+                # a bulk load needs empty tables
+                reset = True
+
+            if reset:
+                click.echo('Deleting the previous instance of the database')
+                manager.drop_all()
+                click.echo('Creating new models')
+                manager.create_all()
+
+            if manager.is_populated() and not force:
+                click.echo('Database already populated. Use --force to overwrite')
+                sys.exit(0)
+
+            manager.populate(bulk=bulk, chunksize=chunksize, species=species or None, prefetch=prefetch)
+
+        return main
+
+    @staticmethod
+    def _cli_add_update(main: click.Group) -> click.Group:  # noqa: D202
+        """Add an ``update`` command that applies a new release to a populated database."""
+
+        @main.command()
+        @click.option('--chunksize', type=int, help='Lines of the entity files processed at a time')
+        @click.option(
+            '--prefetch/--no-prefetch', default=True, show_default=True,
+            help='Prepare the source files concurrently',
+        )
+        @click.option(
+            '--download/--no-download', default=True, show_default=True,
+            help='Download the latest release instead of using the cached files',
+        )
+        @click.option('--pathways-path', type=click.Path(exists=True, dir_okay=False), help='Pathway names file')
+        @click.option('--hierarchy-path', type=click.Path(exists=True, dir_okay=False), help='Pathway hierarchy file')
+        @click.option('--proteins-path', type=click.Path(exists=True, dir_okay=False), help='UniProt mapping file')
+        @click.option('--chemicals-path', type=click.Path(exists=True, dir_okay=False), help='ChEBI mapping file')
+        @click.option(
+            '-s', '--species', multiple=True,
+            help='Name or NCBI taxonomy identifier of a species to keep. Can be given several times. Defaults to all.',
+        )
+        @verbose_option
+        @click.pass_obj
+        def update(
+            manager: Manager,
+            chunksize: Optional[int],
+            prefetch: bool,
+            download: bool,
+            pathways_path: Optional[str],
+            hierarchy_path: Optional[str],
+            proteins_path: Optional[str],
+            chemicals_path: Optional[str],
+            species: Tuple[str, ...],
+        ):
+            """Update the database to the latest Reactome release."""
+            if not manager.is_populated():
+                click.echo('Database is not populated. Use populate instead')
+                sys.exit(1)
+
+            changes = manager.update(
+                pathways_path=pathways_path,
+                pathways_hierarchy_path=hierarchy_path,
+                pathways_proteins_path=proteins_path,
+                pathways_chemicals_path=chemicals_path,
+                chunksize=chunksize,
+                species=species or None,
+                prefetch=prefetch,
+                force_download=download,
+            )
+            for key, count in sorted(changes.items()):
+                if count:
+                    click.echo(f'{key}: {count}')
+
+        return main
+
+    @staticmethod
+    def _add_cli_export(main: click.Group) -> click.Group:  # noqa: D202
+        """Add an ``export-gene-sets`` command that streams the gene sets to a GMT or TSV file."""
+
+        @main.command()
+        @click.option(
+            '-d', '--directory', default=os.getcwd(), help='Defaults to CWD',
+            type=click.Path(dir_okay=True, exists=True, file_okay=False),
+        )
+        @click.option(
+            '-o', '--output', type=click.Path(dir_okay=False, allow_dash=True),
+            help='A file, or - for standard output. Overrides --directory.',
+        )
+        @click.option('-f', '--fmt', default='gmt', type=click.Choice(['gmt', 'tsv', 'xlsx']), show_default=True)
+        @click.option('-s', '--species', help='Name of the species whose pathways are exported. Defaults to all.')
+        @click.option('--chemicals', is_flag=True, help='Also export the chemicals in the pathways')
+        @verbose_option
+        @click.pass_obj
+        def export_gene_sets(
+            manager: Manager,
+            directory: str,
+            output: Optional[str],
+            fmt: str,
+            species: Optional[str],
+            chemicals: bool,
+        ):
+            """Export the gene sets of the pathways as GMT, as TSV with the identifiers of the members, or as Excel."""
+            path = output or os.path.join(directory, f'{manager.module_name}_gene_sets.{fmt}')
+            if fmt == 'xlsx':
+                # an Excel sheet can not be written incrementally
+                from bio2bel.compath.utils import write_dict
+
+                write_dict(manager.get_gene_sets(species=species), path)
+                return
+
+            with click.open_file(path, 'w') as file:
+                count = manager.write_gene_sets(file, fmt=fmt, species=species, chemicals=chemicals)
+            click.echo(f'wrote {count:,} {"gene sets" if fmt == "gmt" else "rows"}', err=True)
+
+        return main
+
+    @staticmethod
+    def _cli_add_export_bel(main: click.Group) -> click.Group:  # noqa: D202
+        """Add an ``export-bel`` command that streams the pathway memberships to a file."""
+
+        @main.command('export-bel')
+        @click.option('-o', '--output', type=click.File('w'), default='-', help='Defaults to standard output')
+        @click.option('-f', '--fmt', type=click.Choice(['bel', 'nodelink']), default='bel', show_default=True)
+        @click.option('-s', '--species', help='Name of the species whose pathways are exported. Defaults to all.')
+        @click.option('--chemicals', is_flag=True, help='Also export the chemicals in the pathways')
+        @verbose_option
+        @click.pass_obj
+        def export_bel(manager: Manager, output, fmt: str, species: Optional[str], chemicals: bool):
+            """Export the pathway memberships as a BEL script or node-link JSON."""
+            from .export import write_bel_script, write_nodelink
+
+            write = write_bel_script if fmt == 'bel' else write_nodelink
+            start = time.perf_counter()
+            count = write(manager, output, species=species, chemicals=chemicals)
+            elapsed = time.perf_counter() - start
+            click.echo(f'wrote {count:,} edges in {elapsed:.2f} s ({count / elapsed:,.0f} edges/s)', err=True)
+
+        return main
+
+    @staticmethod
+    def _cli_add_enrich(main: click.Group) -> click.Group:  # noqa: D202
+        """Add an ``enrich`` command that scores many gene lists in a process pool."""
+
+        @main.command()
+        @click.argument('source', type=click.Path(exists=True, allow_dash=True))
+        @click.option(
+            '-o', '--output', type=click.Path(dir_okay=False, allow_dash=True), default='-',
+            help='A file, or - for standard output (TSV only). Defaults to standard output.',
+        )
+        @click.option('-f', '--fmt', type=click.Choice(['tsv', 'parquet']), default='tsv', show_default=True)
+        @click.option('-s', '--species', help='Name of the species whose pathways are tested. Defaults to all.')
+        @click.option('--chemicals', is_flag=True, help='Score lists of ChEBI identifiers instead of HGNC symbols')
+        @click.option('-w', '--workers', type=int, default=os.cpu_count(), show_default=True, help='Worker processes')
+        @click.option('--batch-size', type=int, default=100, show_default=True, help='Gene lists per batch')
+        @click.option('--hierarchy', is_flag=True, help='Annotate the pathways with their place in the hierarchy')
+        @click.option('--collapse', is_flag=True, help='Keep only the leaf-most significant pathways of each list')
+        @click.option(
+            '--alpha', type=float, default=0.05, show_default=True,
+            help='p-value at or below which a pathway is significant, with --hierarchy or --collapse',
+        )
+        @verbose_option
+        @click.pass_obj
+        def enrich(
+            manager: Manager,
+            source: str,
+            output: str,
+            fmt: str,
+            species: Optional[str],
+            chemicals: bool,
+            workers: int,
+            batch_size: int,
+            hierarchy: bool,
+            collapse: bool,
+            alpha: float,
+        ):
+            """Score the gene lists of SOURCE, a directory with one file per list, a GMT file, or - for standard input.
+
+            The files of a directory hold one gene per line. GMT lines have the name of the list, a description, and
+            the genes, separated by tabs.
+            """
+            from .batch import iter_gene_lists, iter_scored_batches, write_enrichment_parquet, write_enrichment_tsv
+
+            if fmt == 'parquet' and output == '-':
+                raise click.UsageError('Parquet can not be written to standard output, give a file with --output')
+
+            start = time.perf_counter()
+            index = manager.get_enrichment_index(chemicals=chemicals, species=species, hierarchy=hierarchy or collapse)
+            click.echo(f'loaded {index!r} in {time.perf_counter() - start:.2f} s', err=True)
+
+            batches = iter_scored_batches(
+                index,
+                iter_gene_lists(source),
+                batch_size=batch_size,
+                workers=workers,
+                hierarchy=hierarchy,
+                alpha=alpha,
+                collapse=collapse,
+            )
+            start = time.perf_counter()
+            if fmt == 'parquet':
+                lists, rows = write_enrichment_parquet(batches, output)
+            else:
+                with click.open_file(output, 'w') as file:
+                    lists, rows = write_enrichment_tsv(batches, file)
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                f'scored {lists:,} lists ({rows:,} rows) in {elapsed:.2f} s ({lists / elapsed:,.1f} lists/s)',
+                err=True,
+            )
+
+        return main
+
+    @classmethod
+    def get_cli(cls) -> click.Group:
+        """Get the :mod:`click` main function, with additional ``update``, ``export-bel``, and ``enrich`` commands."""
+        main = super().get_cli()
+        cls._cli_add_update(main)
+        cls._cli_add_export_bel(main)
+        cls._cli_add_enrich(main)
+        return main
 
     def _add_admin(self, app, **kwargs):
         from flask_admin import Admin
@@ -4,9 +4,9 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import backref, relationship
 
@@ -20,18 +20,20 @@ Base = declarative_base()
 TABLE_PREFIX = 'reactome'
 PATHWAY_TABLE_NAME = f'{TABLE_PREFIX}_pathway'
 PATHWAY_TABLE_HIERARCHY = f'{TABLE_PREFIX}_pathway_hierarchy'
+PATHWAY_CLOSURE_TABLE = f'{TABLE_PREFIX}_pathway_closure'
 SPECIES_TABLE_NAME = f'{TABLE_PREFIX}_species'
 PROTEIN_TABLE_NAME = f'{TABLE_PREFIX}_protein'
 CHEMICAL_TABLE_NAME = f'{TABLE_PREFIX}_chemical'
 PROTEIN_PATHWAY_TABLE = f'{TABLE_PREFIX}_protein_pathway'
 CHEMICAL_PATHWAY_TABLE = f'{TABLE_PREFIX}_chemical_pathway'
 SPECIES_PATHWAY_TABLE = f'{TABLE_PREFIX}_species_pathway'
+METADATA_TABLE_NAME = f'{TABLE_PREFIX}_metadata'
 
 protein_pathway = Table(
     PROTEIN_PATHWAY_TABLE,
     Base.metadata,
-    Column('protein_id', Integer, ForeignKey(f'{PROTEIN_TABLE_NAME}.id')),
-    Column('pathway_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id')),
+    Column('protein_id', Integer, ForeignKey(f'{PROTEIN_TABLE_NAME}.id'), primary_key=True),
+    Column('pathway_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'), primary_key=True),
 )
 
 chemical_pathway = Table(
@@ -41,6 +43,33 @@ chemical_pathway = Table(
     Column('pathway_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'), primary_key=True),
 )
 
+#: The parent-child edges of the pathway hierarchy, including all parents of pathways with more than one
+pathway_hierarchy = Table(
+    PATHWAY_TABLE_HIERARCHY,
+    Base.metadata,
+    Column('parent_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'), primary_key=True),
+    Column('child_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'), primary_key=True),
+)
+
+#: The transitive closure of the pathway hierarchy through all parents, with the shortest distance of each pair as
+#: its depth. Each pathway is its own ancestor at depth 0.
+pathway_closure = Table(
+    PATHWAY_CLOSURE_TABLE,
+    Base.metadata,
+    Column('ancestor_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'), primary_key=True),
+    Column('descendant_id', Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'), primary_key=True),
+    Column('depth', Integer, nullable=False),
+    Index(f'ix_{PATHWAY_CLOSURE_TABLE}_descendant_depth', 'descendant_id', 'depth'),
+)
+
+#: Facts about the loaded content, like the version stamp that changes with each populate and update
+database_metadata = Table(
+    METADATA_TABLE_NAME,
+    Base.metadata,
+    Column('key', String(255), primary_key=True),
+    Column('value', String(255), nullable=False),
+)
+
 
 class Species(Base, SpeciesMixin):
     """Species Table."""
@@ -66,18 +95,23 @@ class Protein(Base, CompathProteinMixin):
 
     def to_pybel(self) -> pybel.dsl.Protein:
         """Serialize to PyBEL node data dictionary."""
-        if self.hgnc_symbol and self.hgnc_id:
+        return self.make_node(self.uniprot_id, self.hgnc_symbol, self.hgnc_id)
+
+    @staticmethod
+    def make_node(uniprot_id: str, hgnc_symbol: Optional[str], hgnc_id: Optional[str]) -> pybel.dsl.Protein:
+        """Make the PyBEL node of a protein from its columns, named by HGNC if possible."""
+        if hgnc_symbol and hgnc_id:
             return pybel.dsl.Protein(
                 namespace=HGNC,
-                identifier=self.hgnc_id,
-                name=self.hgnc_symbol,
+                identifier=hgnc_id,
+                name=hgnc_symbol,
             )
 
         else:
             return pybel.dsl.Protein(
                 namespace=UNIPROT,
-                identifier=self.uniprot_id,
-                name=self.uniprot_id,
+                identifier=uniprot_id,
+                name=uniprot_id,
             )
 
 
@@ -97,10 +131,15 @@ class Chemical(Base):
 
     def to_pybel(self) -> pybel.dsl.Abundance:
         """Serialize to PyBEL node data dictionary."""
+        return self.make_node(self.chebi_id, self.name)
+
+    @staticmethod
+    def make_node(chebi_id: str, name: Optional[str]) -> pybel.dsl.Abundance:
+        """Make the PyBEL node of a chemical from its columns."""
         return pybel.dsl.Abundance(
             namespace=CHEBI,
-            identifier=self.chebi_id,
-            name=self.name,
+            identifier=chebi_id,
+            name=name,
         )
 
 
@@ -114,11 +153,50 @@ class Pathway(Base, CompathPathwayMixin):
     identifier = Column(String(255), unique=True, nullable=False)
     name = Column(String(255))
 
+    #: The last parent listed for the pathway in the hierarchy file. See :attr:`parents` for all of them.
     parent_id = Column(Integer, ForeignKey(f'{PATHWAY_TABLE_NAME}.id'))
     children = relationship('Pathway', backref=backref('parent', remote_side=[id]))
 
+    #: All parents of the pathway. Read only, the edges are written in bulk by the manager.
+    parents = relationship(
+        'Pathway',
+        secondary=pathway_hierarchy,
+        primaryjoin=id == pathway_hierarchy.c.child_id,
+        secondaryjoin=id == pathway_hierarchy.c.parent_id,
+        viewonly=True,
+    )
+
     species = relationship(Species, backref='pathways')
     species_id = Column(Integer, ForeignKey(f'{Species.__tablename__}.id'))
 
     proteins = relationship(Protein, secondary=protein_pathway, backref='pathways')
     chemicals = relationship(Chemical, secondary=chemical_pathway, backref='pathways')
+
+    @staticmethod
+    def make_node(identifier: str, name: Optional[str]) -> pybel.dsl.BiologicalProcess:
+        """Make the PyBEL node of a pathway from its columns, like :meth:`to_pybel`."""
+        return pybel.dsl.BiologicalProcess(
+            namespace=REACTOME,
+            identifier=identifier,
+            name=name,
+        )
+
+
+#: Secondary indexes serving the lookups of the manager. They are created with the tables, dropped before a bulk load,
+#: and built again once the rows are in.
+LOOKUP_INDEXES = [
+    # reverse lookups from pathways to their members, the primary keys already serve the other direction
+    Index(f'ix_{PROTEIN_PATHWAY_TABLE}_pathway_id', protein_pathway.c.pathway_id),
+    Index(f'ix_{CHEMICAL_PATHWAY_TABLE}_pathway_id', chemical_pathway.c.pathway_id),
+    # children, pathways by species, and get_pathways_by_name
+    Index(f'ix_{PATHWAY_TABLE_NAME}_parent_id', Pathway.parent_id),
+    Index(f'ix_{PATHWAY_TABLE_NAME}_species_id', Pathway.species_id),
+    Index(f'ix_{PATHWAY_TABLE_NAME}_name', Pathway.name),
+    # all parents and roots, the primary key of the hierarchy edges already serves the children
+    Index(f'ix_{PATHWAY_TABLE_HIERARCHY}_child_id', pathway_hierarchy.c.child_id),
+    # get_protein_by_hgnc_symbol, get_protein_by_hgnc_id, and their batched versions
+    Index(f'ix_{PROTEIN_TABLE_NAME}_hgnc_symbol', Protein.hgnc_symbol),
+    Index(f'ix_{PROTEIN_TABLE_NAME}_hgnc_id', Protein.hgnc_id),
+    # get_species_by_name and get_pathways_by_species
+    Index(f'ix_{SPECIES_TABLE_NAME}_name', Species.name),
+]
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+"""This module caches the preprocessed entity dataframes on disk.
+
+Annotating the UniProt and ChEBI files with the HGNC, mnemonic, ChEBI name, and NCBI taxonomy lookups takes much
+longer than reading them back from a columnar file. The preprocessed chunks are stored as Parquet files in a
+directory below :data:`ARTIFACTS_DIR` whose name is derived from the SHA-256 checksum of the source file, the
+versions of the packages providing the lookups, and :data:`ARTIFACT_VERSION`. A new release or a new version of
+the mappings therefore gets a new directory, and stale directories can be removed with :func:`clear_artifacts`.
+
+Only the files downloaded to :data:`bio2bel_reactome.constants.DATA_DIR` are cached, and only if :mod:`pyarrow`
+is installed (``pip install bio2bel_reactome[cache]``).
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from importlib.util import find_spec
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from ..constants import DATA_DIR
+
+__all__ = [
+    'ARTIFACTS_DIR',
+    'ARTIFACT_VERSION',
+    'get_mapping_version',
+    'get_checksum',
+    'is_cacheable',
+    'get_artifact_path',
+    'has_artifact',
+    'read_artifact',
+    'iter_artifact',
+    'ArtifactWriter',
+    'clear_artifacts',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The directory holding the cached dataframes
+ARTIFACTS_DIR = os.path.join(DATA_DIR, 'artifacts')
+
+#: Only the source files in this directory are cached
+SOURCES_DIR = DATA_DIR
+
+#: Bump when the preprocessing changes, so the dataframes cached by earlier versions are not used
+ARTIFACT_VERSION = 1
+
+#: The packages whose lookup tables end up in the preprocessed dataframes
+MAPPING_PACKAGES = ('protmapper', 'pyobo')
+
+_COMPLETE = '_COMPLETE'
+
+_checksums = {}
+
+
+def _get_package_version(name: str) -> str:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # Python 3.7
+        from pkg_resources import DistributionNotFound as PackageNotFoundError, get_distribution
+
+        def version(distribution_name):
+            return get_distribution(distribution_name).version
+
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def get_mapping_version() -> str:
+    """Get a string identifying the versions of the lookup tables and of the preprocessing."""
+    return ';'.join([
+        f'artifact={ARTIFACT_VERSION}',
+        *(f'{name}={_get_package_version(name)}' for name in MAPPING_PACKAGES),
+    ])
+
+
+def get_checksum(path: str) -> str:
+    """Get the SHA-256 checksum of the file, computed once per modification of the file."""
+    stat = os.stat(path)
+    key = os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+    if key not in _checksums:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(2 ** 20), b''):
+                sha256.update(block)
+        _checksums[key] = sha256.hexdigest()
+    return _checksums[key]
+
+
+def is_cacheable(path: Optional[str]) -> bool:
+    """Check if the path is a file downloaded to the data directory, whose derived data can be cached."""
+    if path is None or '://' in path or not os.path.isfile(path):
+        return False
+    sources_dir = os.path.abspath(SOURCES_DIR)
+    return os.path.commonpath([os.path.abspath(path), sources_dir]) == sources_dir
+
+
+def get_artifact_path(name: str, path: str) -> Optional[str]:
+    """Get the directory caching the preprocessed dataframe of the source file.
+
+    :param name: The name of the dataframe, like ``proteins``
+    :param path: The URL or file path of the source file
+    :return: The path of the directory, or None if the source file is not cached
+    """
+    if find_spec('pyarrow') is None or not is_cacheable(path):
+        return None
+
+    key = hashlib.sha256(f'{get_checksum(path)};{get_mapping_version()}'.encode('utf-8')).hexdigest()
+    return os.path.join(ARTIFACTS_DIR, f'{name}-{key[:32]}')
+
+
+def has_artifact(artifact_path: Optional[str]) -> bool:
+    """Check if a complete dataframe is cached in the directory."""
+    return artifact_path is not None and os.path.exists(os.path.join(artifact_path, _COMPLETE))
+
+
+def _get_parts(artifact_path: str) -> List[str]:
+    return sorted(
+        os.path.join(artifact_path, name)
+        for name in os.listdir(artifact_path)
+        if name.endswith('.parquet')
+    )
+
+
+def read_artifact(artifact_path: str) -> pd.DataFrame:
+    """Read the whole cached dataframe, with the same categorical columns as when it was written."""
+    dfs = [pd.read_parquet(part) for part in _get_parts(artifact_path)]
+    categorical = [
+        column
+        for column, dtype in dfs[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+    df = pd.concat(dfs, ignore_index=True)
+    for column in categorical:
+        df[column] = df[column].astype('category')
+    logger.info('read %d cached rows from %s', len(df.index), artifact_path)
+    return df
+
+
+def iter_artifact(artifact_path: str, chunksize: int) -> Iterable[pd.DataFrame]:
+    """Iterate over chunks of at most ``chunksize`` rows of the cached dataframe."""
+    import pyarrow.parquet as pq
+
+    for part in _get_parts(artifact_path):
+        for batch in pq.ParquetFile(part).iter_batches(batch_size=chunksize):
+            df = batch.to_pandas()
+            for column, dtype in df.dtypes.items():
+                if isinstance(dtype, pd.CategoricalDtype):
+                    df[column] = df[column].cat.remove_unused_categories()
+            yield df
+
+
+class ArtifactWriter:
+    """Write the chunks of a preprocessed dataframe to a temporary directory, then move it in place when complete.
+
+    Readers never see a partially written dataframe, since the directory is only moved to its final path by
+    :meth:`commit`, after the last chunk.
+    """
+
+    def __init__(self, artifact_path: str) -> None:
+        """Start writing the dataframe cached at the given directory."""
+        self.artifact_path = artifact_path
+        self.temporary_path = f'{artifact_path}.{os.getpid()}.tmp'
+        shutil.rmtree(self.temporary_path, ignore_errors=True)
+        os.makedirs(self.temporary_path)
+        self.parts = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Write a chunk of the dataframe."""
+        df.to_parquet(os.path.join(self.temporary_path, f'part-{self.parts:05d}.parquet'), index=False)
+        self.parts += 1
+
+    def commit(self) -> None:
+        """Mark the dataframe as complete and move it to its final path."""
+        if not self.parts:
+            self.abort()
+            return
+        open(os.path.join(self.temporary_path, _COMPLETE), 'w').close()
+        try:
+            os.rename(self.temporary_path, self.artifact_path)
+        except OSError:  # another process cached the same dataframe first
+            self.abort()
+        else:
+            logger.info('cached %d chunks at %s', self.parts, self.artifact_path)
+
+    def abort(self) -> None:
+        """Remove the chunks written so far."""
+        shutil.rmtree(self.temporary_path, ignore_errors=True)
+
+
+def clear_artifacts() -> None:
+    """Remove all cached dataframes."""
+    shutil.rmtree(ARTIFACTS_DIR, ignore_errors=True)
@@ -14,15 +14,20 @@ Column 6) Species
 Column 4 and 6 are redundant since Reactome ID contains all info relative to species and event name
 """
 
+import io
 import logging
 from functools import lru_cache
+from typing import Collection, Iterable, List, Optional, Tuple
+from urllib.request import urlopen
 
 import pandas as pd
 from protmapper.api import hgnc_name_to_id
 from protmapper.uniprot_client import get_hgnc_id, get_mnemonic
 
-from bio2bel.downloading import make_df_getter
-from pyobo import get_id_name_mapping, get_name_id_mapping
+from bio2bel.downloading import make_df_getter, make_downloader
+from .artifacts import ArtifactWriter, get_artifact_path, has_artifact, iter_artifact, read_artifact
+from .mappings import get_chebi_id_to_name, get_species_name_to_id
+from ..bulk import iter_chunks
 from ..constants import (
     CHEBI_PATHWAYS_PATH, CHEBI_PATHWAYS_URL, SPECIES_REMAPPING, UNIPROT_PATHWAYS_PATH, UNIPROT_PATHWAYS_URL,
 )
@@ -32,22 +37,35 @@ __all__ = [
     'get_proteins_pathways_df',
     'get_procesed_proteins_pathways_df',
     'get_procesed_chemical_pathways_df',
+    'iter_procesed_proteins_pathways_dfs',
+    'iter_procesed_chemical_pathways_dfs',
+    'download_proteins_pathways',
+    'download_chemicals_pathways',
+    'load_protein_annotations',
+    'load_chemical_annotations',
+    'DEFAULT_CHUNKSIZE',
 ]
 
 logger = logging.getLogger(__name__)
 
+#: The number of lines read at a time by the streaming parsers
+DEFAULT_CHUNKSIZE = 200_000
+
+PROTEIN_COLUMNS = ['uniprot_id', 'reactome_id', 'reactome_link', 'reactome_name', 'evidence', 'species']
+CHEMICAL_COLUMNS = ['chebi_id', 'reactome_id', 'reactome_link', 'reactome_name', 'evidence', 'species']
+
+#: Columns 3-5 are redundant with the Reactome identifier, so the streaming parsers skip them
+USED_COLUMNS = [0, 1, 5]
+
 get_proteins_pathways_df = make_df_getter(
     UNIPROT_PATHWAYS_URL,
     UNIPROT_PATHWAYS_PATH,
     sep='\t',
     header=None,
-    names=['uniprot_id', 'reactome_id', 'reactome_link', 'reactome_name', 'evidence', 'species'],
+    names=PROTEIN_COLUMNS,
 )
 
-
-@lru_cache()
-def _chebi_id_to_name():
-    return get_id_name_mapping('chebi')
+download_proteins_pathways = make_downloader(UNIPROT_PATHWAYS_URL, UNIPROT_PATHWAYS_PATH)
 
 
 @lru_cache()
@@ -55,46 +73,255 @@ def _hgnc_id_to_name():
     return {v: k for k, v in hgnc_name_to_id.items()}
 
 
-@lru_cache()
-def _species_name_to_id():
-    return get_name_id_mapping('ncbitaxon')
+def load_protein_annotations(path: Optional[str] = None) -> None:
+    """Load the lookup tables used to annotate the proteins, so the first chunk does not wait for them.
+
+    :param path: The path of the proteins file, whose species mapping is trimmed to its species
+    """
+    get_mnemonic('P00000')
+    get_hgnc_id('P00000')
+    _hgnc_id_to_name()
+    get_species_name_to_id(path)
+
+
+def load_chemical_annotations(path: Optional[str] = None) -> None:
+    """Load the lookup tables used to annotate the chemicals, so the first chunk does not wait for them.
+
+    :param path: The path of the chemicals file, whose mappings are trimmed to its identifiers and species
+    """
+    get_chebi_id_to_name(path)
+    get_species_name_to_id(path)
+
+
+def _get_uniprot_annotations(uniprot_ids: pd.Series) -> pd.DataFrame:
+    """Look up the mnemonic and HGNC gene of each distinct UniProt identifier once.
+
+    :param uniprot_ids: A categorical series of UniProt identifiers
+    :return: A dataframe with one row per category, keyed by a ``uniprot_id`` column of the same dtype
+    """
+    categories = uniprot_ids.cat.categories
+    annotations = pd.DataFrame({'uniprot_id': pd.Categorical(categories, categories=categories)})
+    annotations['uniprot_accession'] = categories.map(get_mnemonic)
+    annotations['hgnc_id'] = categories.map(get_hgnc_id)
+    annotations['hgnc_symbol'] = annotations['hgnc_id'].map(_hgnc_id_to_name().get)
+    return annotations
+
+
+def _annotate_species(df: pd.DataFrame, path: Optional[str]) -> None:
+    """Remap the species names and add their NCBI taxonomy identifiers as categorical columns in place."""
+    df['species'] = df['species'].astype('category').map(lambda x: SPECIES_REMAPPING.get(x, x)).astype('category')
+    df['species_taxonomy_id'] = df['species'].map(get_species_name_to_id(path).get).astype('category')
+
+
+def _process_proteins_pathways_df(df: pd.DataFrame, path: Optional[str] = None) -> pd.DataFrame:
+    df['uniprot_id'] = df['uniprot_id'].astype('category')
+    df['reactome_id'] = df['reactome_id'].astype('category')
+    df = df.merge(_get_uniprot_annotations(df['uniprot_id']), on='uniprot_id', how='left', copy=False)
+
+    _annotate_species(df, path)
+    return df
+
+
+def get_procesed_proteins_pathways_df(
+    url: Optional[str] = None,
+    cache: bool = True,
+    force_download: bool = False,
+    artifacts: bool = True,
+) -> pd.DataFrame:
+    """Get preprocessed proteins dataframe.
+
+    The mappings to HGNC are looked up once per distinct UniProt identifier then merged back, since each
+    identifier appears once for every level of the pathway hierarchy.
+
+    :param url: The URL (or file path) to read. Defaults to the cached download of the current release.
+    :param cache: If true, the data is downloaded to the file system, else it is loaded from the internet
+    :param force_download: If true, overwrites a previously cached file
+    :param artifacts: If true, the preprocessed dataframe of a downloaded file is cached on disk
+    """
+    return _get_procesed_df(
+        'proteins', get_proteins_pathways_df, download_proteins_pathways, _process_proteins_pathways_df,
+        url=url, cache=cache, force_download=force_download, artifacts=artifacts,
+    )
+
+
+def iter_procesed_proteins_pathways_dfs(
+    url: Optional[str] = None,
+    chunksize: Optional[int] = None,
+    species: Optional[Collection[str]] = None,
+    artifacts: bool = True,
+) -> Iterable[pd.DataFrame]:
+    """Iterate over preprocessed chunks of the proteins dataframe.
 
+    Only the needed columns are read and at most ``chunksize`` lines are held in memory at a time.
 
-def get_procesed_proteins_pathways_df(*args, **kwargs) -> pd.DataFrame:
-    """Get preprocessed proteins dataframe."""
-    df = get_proteins_pathways_df(*args, **kwargs)
+    :param url: The URL (or file path) to read. Defaults to the cached download of the current release.
+    :param chunksize: The number of lines per chunk. Defaults to :data:`DEFAULT_CHUNKSIZE`.
+    :param species: If given, lines of other species are skipped before any processing
+    :param artifacts: If true, the preprocessed chunks of a downloaded file are cached on disk
+    """
+    yield from _iter_procesed_dfs(
+        'proteins', url or download_proteins_pathways(), PROTEIN_COLUMNS, _process_proteins_pathways_df,
+        chunksize=chunksize, species=species, artifacts=artifacts,
+    )
+
+
+def _get_procesed_df(
+    name: str,
+    get_df,
+    download,
+    process,
+    url: Optional[str],
+    cache: bool,
+    force_download: bool,
+    artifacts: bool,
+) -> pd.DataFrame:
+    """Read and preprocess the whole file, or read back its cached preprocessed dataframe."""
+    if url is None and cache:
+        url = download(force_download=force_download)
+
+    artifact_path = get_artifact_path(name, url) if artifacts and url is not None else None
+    if has_artifact(artifact_path):
+        return read_artifact(artifact_path)
+
+    df = get_df(url=url, cache=cache)
     del df['reactome_link']
     del df['reactome_name']
     del df['evidence']
+    df = process(df, path=url)
 
-    df['uniprot_accession'] = df['uniprot_id'].map(get_mnemonic)
-    df['hgnc_id'] = df['uniprot_id'].map(get_hgnc_id)
-    df['hgnc_symbol'] = df['hgnc_id'].map(_hgnc_id_to_name().get)
-
-    df['species'] = df['species'].map(lambda x: SPECIES_REMAPPING.get(x, x))
-    df['species_taxonomy_id'] = df['species'].map(_species_name_to_id().get)
+    if artifact_path is not None:
+        writer = ArtifactWriter(artifact_path)
+        writer.write(df)
+        writer.commit()
     return df
 
 
+def _iter_procesed_dfs(
+    name: str,
+    path: str,
+    names: List[str],
+    process,
+    chunksize: Optional[int],
+    species: Optional[Collection[str]],
+    artifacts: bool,
+) -> Iterable[pd.DataFrame]:
+    """Stream and preprocess the file, or stream back its cached preprocessed chunks.
+
+    The chunks are only cached when all species are kept, so that the cache holds the whole file.
+    """
+    artifact_path = get_artifact_path(name, path) if artifacts else None
+    if has_artifact(artifact_path):
+        for df in iter_artifact(artifact_path, chunksize or DEFAULT_CHUNKSIZE):
+            if species is not None:
+                df = df[df['species'].isna() | df['species'].isin(species)].reset_index(drop=True)
+                if df.empty:
+                    continue
+            yield df
+        return
+
+    writer = ArtifactWriter(artifact_path) if artifact_path is not None and species is None else None
+    try:
+        for df in _iter_chunks(path, names, chunksize, species=species):
+            df = process(df, path=path)
+            if writer is not None:
+                writer.write(df)
+            yield df
+    except BaseException:
+        # also reached when the consumer stops early, leaving an incomplete cache
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.commit()
+
+
+def _iter_rows(path: str) -> Iterable[Tuple[str, str, Optional[str]]]:
+    """Iterate over the entity identifier, Reactome identifier, and species of each line of an entity file."""
+    if '://' in path:
+        file = io.TextIOWrapper(urlopen(path), encoding='utf-8')  # noqa: S310
+    else:
+        file = open(path, encoding='utf-8')
+
+    with file:
+        for line in file:
+            fields = line.rstrip('\n').split('\t')
+            yield fields[0], fields[1], (fields[5] if len(fields) > 5 else None)
+
+
+def _iter_chunks(
+    path: str,
+    names: List[str],
+    chunksize: Optional[int],
+    species: Optional[Collection[str]] = None,
+) -> Iterable[pd.DataFrame]:
+    rows = _iter_rows(path)
+    if species is not None:
+        # Lines without a species can only be decided once their pathway is looked up, so they are kept
+        rows = (
+            row
+            for row in rows
+            if row[2] is None or SPECIES_REMAPPING.get(row[2], row[2]) in species
+        )
+
+    columns = [names[i] for i in USED_COLUMNS]
+    for chunk in iter_chunks(rows, chunksize or DEFAULT_CHUNKSIZE):
+        yield pd.DataFrame.from_records(chunk, columns=columns)
+
+
 get_chemicals_pathways_df = make_df_getter(
     CHEBI_PATHWAYS_URL,
     CHEBI_PATHWAYS_PATH,
     sep='\t',
     header=None,
-    names=['chebi_id', 'reactome_id', 'reactome_link', 'reactome_name', 'evidence', 'species'],
+    names=CHEMICAL_COLUMNS,
     dtype={'chebi_id': str},
 )
 
+download_chemicals_pathways = make_downloader(CHEBI_PATHWAYS_URL, CHEBI_PATHWAYS_PATH)
 
-def get_procesed_chemical_pathways_df(*args, **kwargs) -> pd.DataFrame:
-    """Get preprocessed chemicals dataframe."""
-    df = get_chemicals_pathways_df(*args, **kwargs)
-    del df['reactome_link']
-    del df['reactome_name']
-    del df['evidence']
 
-    df['chebi_name'] = df['chebi_id'].map(_chebi_id_to_name().get)
+def _process_chemical_pathways_df(df: pd.DataFrame, path: Optional[str] = None) -> pd.DataFrame:
+    df['chebi_id'] = df['chebi_id'].astype('category')
+    df['reactome_id'] = df['reactome_id'].astype('category')
+    df['chebi_name'] = df['chebi_id'].map(get_chebi_id_to_name(path).get)
 
-    df['species'] = df['species'].map(lambda x: SPECIES_REMAPPING.get(x, x))
-    df['species_taxonomy_id'] = df['species'].map(_species_name_to_id().get)
+    _annotate_species(df, path)
     return df
+
+
+def get_procesed_chemical_pathways_df(
+    url: Optional[str] = None,
+    cache: bool = True,
+    force_download: bool = False,
+    artifacts: bool = True,
+) -> pd.DataFrame:
+    """Get preprocessed chemicals dataframe.
+
+    :param url: The URL (or file path) to read. Defaults to the cached download of the current release.
+    :param cache: If true, the data is downloaded to the file system, else it is loaded from the internet
+    :param force_download: If true, overwrites a previously cached file
+    :param artifacts: If true, the preprocessed dataframe of a downloaded file is cached on disk
+    """
+    return _get_procesed_df(
+        'chemicals', get_chemicals_pathways_df, download_chemicals_pathways, _process_chemical_pathways_df,
+        url=url, cache=cache, force_download=force_download, artifacts=artifacts,
+    )
+
+
+def iter_procesed_chemical_pathways_dfs(
+    url: Optional[str] = None,
+    chunksize: Optional[int] = None,
+    species: Optional[Collection[str]] = None,
+    artifacts: bool = True,
+) -> Iterable[pd.DataFrame]:
+    """Iterate over preprocessed chunks of the chemicals dataframe.
+
+    :param url: The URL (or file path) to read. Defaults to the cached download of the current release.
+    :param chunksize: The number of lines per chunk. Defaults to :data:`DEFAULT_CHUNKSIZE`.
+    :param species: If given, lines of other species are skipped before any processing
+    :param artifacts: If true, the preprocessed chunks of a downloaded file are cached on disk
+    """
+    yield from _iter_procesed_dfs(
+        'chemicals', url or download_chemicals_pathways(), CHEMICAL_COLUMNS, _process_chemical_pathways_df,
+        chunksize=chunksize, species=species, artifacts=artifacts,
+    )
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""This module keeps the PyOBO lookup tables trimmed to the identifiers used by Reactome, in memory-mapped files.
+
+The NCBI taxonomy name mapping has millions of entries while Reactome uses fewer than 30 species, and only a few
+thousand of the ChEBI names are needed. The first time a downloaded file is used, the full mapping is loaded from
+PyOBO and the entries of the keys found in the file are written below :data:`MAPPINGS_DIR` as NumPy arrays of the
+sorted keys and of the UTF-8 encoded values. Later processes memory-map them and look keys up with a binary search
+in a few milliseconds, without loading the ontologies.
+
+Like the cached dataframes of :mod:`bio2bel_reactome.parsers.artifacts`, the trimmed mappings are keyed by the
+checksum of the source file and the versions of the mappings, and only made for the files in the data directory.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from functools import lru_cache, wraps
+from typing import Callable, Iterable, Iterator, Mapping, Optional, Set
+
+import numpy as np
+from pyobo import get_id_name_mapping, get_name_id_mapping
+
+from .artifacts import get_checksum, get_mapping_version, is_cacheable
+from ..constants import DATA_DIR, SPECIES_REMAPPING
+
+__all__ = [
+    'MAPPINGS_DIR',
+    'MappedDict',
+    'write_mapping',
+    'get_trimmed_mapping',
+    'get_chebi_id_to_name',
+    'get_species_name_to_id',
+    'clear_mappings',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The directory holding the trimmed mappings
+MAPPINGS_DIR = os.path.join(DATA_DIR, 'mappings')
+
+_KEYS, _OFFSETS, _VALUES = 'keys.npy', 'offsets.npy', 'values.npy'
+
+
+class MappedDict(Mapping[str, str]):
+    """A read-only string mapping backed by memory-mapped arrays written by :func:`write_mapping`."""
+
+    def __init__(self, directory: str) -> None:
+        """Memory-map the arrays in the directory."""
+        self.directory = directory
+        self._keys = np.load(os.path.join(directory, _KEYS), mmap_mode='r')
+        self._offsets = np.load(os.path.join(directory, _OFFSETS), mmap_mode='r')
+        self._values = np.load(os.path.join(directory, _VALUES), mmap_mode='r')
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f'MappedDict({self.directory!r}, {len(self)} entries)'
+
+    def __getitem__(self, key: str) -> str:  # noqa: D105
+        i = int(np.searchsorted(self._keys, key))
+        if i == len(self._keys) or self._keys[i] != key:
+            raise KeyError(key)
+        return bytes(self._values[self._offsets[i]:self._offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:  # noqa: D105
+        return (str(key) for key in self._keys)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._keys)
+
+
+def write_mapping(directory: str, mapping: Mapping[str, str]) -> None:
+    """Write the mapping as sorted keys, value offsets, and concatenated UTF-8 values for :class:`MappedDict`.
+
+    The arrays are written to a temporary directory that is then moved in place, so readers never see a partial
+    mapping.
+    """
+    keys = sorted(mapping)
+    values = [mapping[key].encode('utf-8') for key in keys]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+
+    temporary_directory = f'{directory}.{os.getpid()}.tmp'
+    shutil.rmtree(temporary_directory, ignore_errors=True)
+    os.makedirs(temporary_directory)
+    np.save(os.path.join(temporary_directory, _KEYS), np.array(keys, dtype=str))
+    np.save(os.path.join(temporary_directory, _OFFSETS), offsets)
+    np.save(os.path.join(temporary_directory, _VALUES), np.frombuffer(b''.join(values), dtype=np.uint8))
+    try:
+        os.rename(temporary_directory, directory)
+    except OSError:  # another process wrote the same mapping first
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+
+@lru_cache()
+def _open_mapping(directory: str) -> MappedDict:
+    return MappedDict(directory)
+
+
+def get_trimmed_mapping(
+    name: str,
+    path: Optional[str],
+    load: Callable[[], Mapping[str, str]],
+    get_keys: Callable[[], Iterable[str]],
+) -> Mapping[str, str]:
+    """Get the mapping trimmed to the keys used by the source file, writing it on first use.
+
+    :param name: The name of the mapping, like ``ncbitaxon``
+    :param path: The path of the source file. If it is not a file in the data directory, the full mapping is returned.
+    :param load: A function loading the full mapping
+    :param get_keys: A function getting the keys used by the source file
+    """
+    if not is_cacheable(path):
+        return load()
+
+    digest = hashlib.sha256(f'{get_checksum(path)};{get_mapping_version()}'.encode('utf-8')).hexdigest()
+    directory = os.path.join(MAPPINGS_DIR, f'{name}-{digest[:32]}')
+    if not os.path.exists(directory):
+        mapping = load()
+        trimmed = {key: mapping[key] for key in get_keys() if key in mapping}
+        write_mapping(directory, trimmed)
+        logger.info('trimmed the %s mapping from %d to %d entries for %s', name, len(mapping), len(trimmed), path)
+    return _open_mapping(directory)
+
+
+def _load_once(func):
+    """Cache the result of a function without arguments, loading it once even when called from several threads."""
+    lock = threading.Lock()
+    cached = lru_cache()(func)
+
+    @wraps(func)
+    def wrapper():
+        with lock:
+            return cached()
+
+    return wrapper
+
+
+@_load_once
+def _load_chebi_id_to_name() -> Mapping[str, str]:
+    return get_id_name_mapping('chebi')
+
+
+@_load_once
+def _load_species_name_to_id() -> Mapping[str, str]:
+    return get_name_id_mapping('ncbitaxon')
+
+
+def _get_column(path: str, column: int) -> Set[str]:
+    """Get the distinct values of a column of a tab-separated file."""
+    with open(path, encoding='utf-8') as file:
+        return {
+            line.rstrip('\n').split('\t')[column]
+            for line in file
+            if line.strip()
+        }
+
+
+def get_chebi_id_to_name(path: Optional[str] = None) -> Mapping[str, str]:
+    """Get the names of the ChEBI identifiers, trimmed to those of the given ChEBI to Reactome file."""
+    return get_trimmed_mapping('chebi', path, _load_chebi_id_to_name, lambda: _get_column(path, 0))
+
+
+def get_species_name_to_id(path: Optional[str] = None) -> Mapping[str, str]:
+    """Get the NCBI taxonomy identifiers of the species names, trimmed to the species of the given Reactome file.
+
+    The species are read from the last column, so this works for the pathway names and the entity files.
+    """
+    return get_trimmed_mapping('ncbitaxon', path, _load_species_name_to_id, lambda: {
+        SPECIES_REMAPPING.get(species, species)
+        for species in _get_column(path, -1)
+    })
+
+
+def clear_mappings() -> None:
+    """Remove all trimmed mappings."""
+    shutil.rmtree(MAPPINGS_DIR, ignore_errors=True)
+    _open_mapping.cache_clear()
@@ -8,14 +8,20 @@ The first column provides the parent pathway stable identifier, whereas the seco
 child pathway stable identifier.
 """
 
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
 
-from bio2bel.downloading import make_df_getter
+from bio2bel.downloading import make_df_getter, make_downloader
 from ..constants import PATHWAYS_HIERARCHY_PATH, PATHWAYS_HIERARCHY_URL
 
 __all__ = [
     'get_pathway_hierarchy_df',
+    'download_pathway_hierarchy',
     'parse_pathway_hierarchy',
+    'HierarchyArrays',
+    'parse_pathway_hierarchy_arrays',
 ]
 
 get_pathway_hierarchy_df = make_df_getter(
@@ -25,15 +31,56 @@ get_pathway_hierarchy_df = make_df_getter(
     header=None,
 )
 
+download_pathway_hierarchy = make_downloader(PATHWAYS_HIERARCHY_URL, PATHWAYS_HIERARCHY_PATH)
+
 
-def parse_pathway_hierarchy(pathway_dataframe: pd.DataFrame):
+def parse_pathway_hierarchy(pathway_dataframe: pd.DataFrame) -> List[Tuple[str, str]]:
     """Parse the pathway hierarchy dataframe.
 
     :param pathway_dataframe: Parent - child pathway relationships
-    :rtype: list[tuple]
-    :return Relationship representation (reactome_parent_id, reactome_child_id)
+    :return: Relationship representation (reactome_parent_id, reactome_child_id)
+    """
+    return list(zip(pathway_dataframe[0].tolist(), pathway_dataframe[1].tolist()))
+
+
+class HierarchyArrays(NamedTuple):
+    """The edges of the pathway hierarchy as parallel arrays of indices into an array of Reactome identifiers."""
+
+    #: The index of the parent of each edge
+    parents: np.ndarray
+    #: The index of the child of each edge
+    children: np.ndarray
+    #: The Reactome identifiers the indices point to
+    identifiers: np.ndarray
+
+
+def parse_pathway_hierarchy_arrays(
+    pathway_dataframe: pd.DataFrame,
+    identifiers: Optional[Sequence[str]] = None,
+) -> HierarchyArrays:
+    """Parse the pathway hierarchy dataframe to integer arrays, without a Python object per edge.
+
+    >>> arrays = parse_pathway_hierarchy_arrays(get_pathway_hierarchy_df())  # doctest: +SKIP
+    >>> first_parent_id = arrays.identifiers[arrays.parents[0]]  # doctest: +SKIP
+
+    :param pathway_dataframe: Parent - child pathway relationships
+    :param identifiers: The distinct Reactome identifiers to index into, like the ones of the pathway names file.
+     Identifiers of the edges that are not among them get the index -1. Defaults to the distinct identifiers of the
+     edges, in order of appearance. Missing identifiers get the index -1 in both cases.
     """
-    return [
-        (row[0], row[1])
-        for _, row in pathway_dataframe.iterrows()
-    ]
+    parent_ids, child_ids = pathway_dataframe[0], pathway_dataframe[1]
+    if identifiers is None:
+        # one factorization over both columns, so a pathway has the same index as a parent and as a child
+        codes, uniques = pd.factorize(pd.concat([parent_ids, child_ids], ignore_index=True))
+        return HierarchyArrays(
+            parents=codes[:len(parent_ids)],
+            children=codes[len(parent_ids):],
+            identifiers=np.asarray(uniques, dtype=object),
+        )
+
+    index = pd.Index(identifiers)
+    return HierarchyArrays(
+        parents=index.get_indexer(parent_ids),
+        children=index.get_indexer(child_ids),
+        identifiers=np.asarray(index, dtype=object),
+    )
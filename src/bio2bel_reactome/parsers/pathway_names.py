@@ -6,14 +6,20 @@ The "Complete list of pathways" file maps the Reactome Stable identifier (ST_ID)
 corresponding species.
 """
 
+from typing import Mapping, NamedTuple, Set, Tuple
+
+import numpy as np
 import pandas as pd
 
-from bio2bel.downloading import make_df_getter
+from bio2bel.downloading import make_df_getter, make_downloader
 from ..constants import PATHWAY_NAMES_PATH, PATHWAY_NAMES_URL
 
 __all__ = [
     'get_pathway_names_df',
+    'download_pathway_names',
     'parse_pathway_names',
+    'PathwayNameColumns',
+    'parse_pathway_names_columns',
 ]
 
 get_pathway_names_df = make_df_getter(
@@ -23,21 +29,35 @@ get_pathway_names_df = make_df_getter(
     header=None,
 )
 
+download_pathway_names = make_downloader(PATHWAY_NAMES_URL, PATHWAY_NAMES_PATH)
+
+
+class PathwayNameColumns(NamedTuple):
+    """The pathway names file as parallel arrays, one entry per pathway."""
+
+    reactome_ids: np.ndarray
+    names: np.ndarray
+    species: np.ndarray
 
-def parse_pathway_names(pathway_names_df: pd.DataFrame):
-    """Parse the pathway name dataframe.
 
-    :param pathway_names_df: Pathway hierarchy as dataframe
-    :rtype: dict
-    :return Object representation dictionary (reactome_id: (name, species))
-    :rtype: set
-    :return all species names
+def parse_pathway_names_columns(pathway_names_df: pd.DataFrame) -> PathwayNameColumns:
+    """Parse the pathway name dataframe to parallel arrays, stripping all names at once.
+
+    :param pathway_names_df: Pathway names as dataframe
     """
-    pathways = {}
-    species_set = set()
+    return PathwayNameColumns(
+        reactome_ids=pathway_names_df[0].to_numpy(dtype=object),
+        names=pathway_names_df[1].str.strip().to_numpy(dtype=object),
+        species=pathway_names_df[2].to_numpy(dtype=object),
+    )
+
 
-    for reactome_id, name, species in pathway_names_df.values:
-        pathways[reactome_id] = (name.strip(), species)
-        species_set.add(species)
+def parse_pathway_names(pathway_names_df: pd.DataFrame) -> Tuple[Mapping[str, Tuple[str, str]], Set[str]]:
+    """Parse the pathway name dataframe.
 
-    return pathways, species_set
+    :param pathway_names_df: Pathway names as dataframe
+    :return: Object representation dictionary (reactome_id: (name, species)) and all species names
+    """
+    columns = parse_pathway_names_columns(pathway_names_df)
+    pathways = dict(zip(columns.reactome_ids.tolist(), zip(columns.names.tolist(), columns.species.tolist())))
+    return pathways, set(pd.unique(columns.species).tolist())
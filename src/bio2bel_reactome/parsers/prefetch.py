@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""This module prepares the four Reactome source files concurrently.
+
+Downloading the files and loading the UniProt, HGNC, ChEBI, and NCBI taxonomy lookup tables dominate a cold start.
+None of them depend on each other, so they run in a thread pool and the loading stages wait only for the inputs
+they need.
+"""
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Mapping, Optional
+
+from .artifacts import get_artifact_path, has_artifact
+from .entity_pathways import (
+    download_chemicals_pathways, download_proteins_pathways, load_chemical_annotations, load_protein_annotations,
+)
+from .pathway_hierarchy import download_pathway_hierarchy
+from .pathway_names import download_pathway_names
+
+__all__ = [
+    'SOURCES',
+    'prefetch_sources',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The keys of the sources, in the order they are loaded
+SOURCES = ('pathways', 'hierarchy', 'chemicals', 'proteins')
+
+
+def _prepare(
+    key: str,
+    path: Optional[str],
+    download: Callable[[bool], str],
+    load: Optional[Callable[[str], None]] = None,
+    force_download: bool = False,
+) -> str:
+    """Download the file unless a path is given, then load the lookup tables its parser needs.
+
+    The lookup tables are not needed when the preprocessed dataframe of the file is already cached.
+    """
+    if path is None:
+        path = download(force_download=force_download)
+    if load is not None and not has_artifact(get_artifact_path(key, path)):
+        load(path)
+    logger.debug('prepared %s', path)
+    return path
+
+
+def prefetch_sources(
+    pathways_path: Optional[str] = None,
+    pathways_hierarchy_path: Optional[str] = None,
+    pathways_proteins_path: Optional[str] = None,
+    pathways_chemicals_path: Optional[str] = None,
+    parallel: bool = True,
+    force_download: bool = False,
+) -> Mapping[str, Future]:
+    """Start preparing the source files and return futures of their paths.
+
+    :param pathways_path: url from pathway table file. Defaults to the cached download.
+    :param pathways_hierarchy_path: url from pathway hierarchy file. Defaults to the cached download.
+    :param pathways_proteins_path: url from pathway protein file. Defaults to the cached download.
+    :param pathways_chemicals_path: url from pathway chemical file. Defaults to the cached download.
+    :param parallel: If false, return completed futures of the given paths. The files are then downloaded by the
+     parsers when they are first needed, one after the other.
+    :param force_download: If true, download the files that are not given again, overwriting the cached ones
+    :return: A dictionary from each key of :data:`SOURCES` to a future of the path (or URL) to parse
+    """
+    tasks = {
+        'pathways': (pathways_path, download_pathway_names, None),
+        'hierarchy': (pathways_hierarchy_path, download_pathway_hierarchy, None),
+        'chemicals': (pathways_chemicals_path, download_chemicals_pathways, load_chemical_annotations),
+        'proteins': (pathways_proteins_path, download_proteins_pathways, load_protein_annotations),
+    }
+
+    if not parallel:
+        rv = {}
+        for key, (path, download, _) in tasks.items():
+            # the parsers would otherwise read the cached files
+            if path is None and force_download:
+                path = download(force_download=True)
+            rv[key] = Future()
+            rv[key].set_result(path)
+        return rv
+
+    executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='reactome-prefetch')
+    rv = {
+        key: executor.submit(_prepare, key, path, download, load, force_download)
+        for key, (path, download, load) in tasks.items()
+    }
+    # the submitted tasks keep running, the pool only stops accepting new ones
+    executor.shutdown(wait=False)
+    return rv
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+"""A thread-safe, read-only query service for serving the Reactome database behind a web API.
+
+The :class:`QueryService` wraps a :class:`bio2bel_reactome.Manager` bound to a pooled engine and a thread-local
+scoped session that is removed after every call, so concurrent requests never share a session. The results of the hot
+lookups are plain, immutable values kept in a bounded LRU cache with a time to live. The cache is cleared when the
+version stamp written by :meth:`bio2bel_reactome.Manager.populate` and :meth:`bio2bel_reactome.Manager.update`
+changes, which is checked at most every ``check_interval`` seconds.
+
+>>> from bio2bel_reactome.service import QueryService
+>>> service = QueryService('sqlite:///reactome.db', pool_size=10, maxsize=4096, ttl=600)
+>>> service.get_pathway('R-HSA-389357')  # doctest: +SKIP
+>>> service.get_metrics()  # doctest: +SKIP
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from types import MappingProxyType
+from typing import Any, Callable, FrozenSet, Hashable, Mapping, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from bio2bel.utils import get_connection
+from .manager import Manager
+from .models import Pathway
+from .utils import TTLCache
+
+__all__ = [
+    'QueryService',
+    'ReadOnlyError',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class ReadOnlyError(RuntimeError):
+    """Raised when a session of the query service is about to write to the database."""
+
+
+def _raise_read_only(session, flush_context, instances) -> None:
+    raise ReadOnlyError('the query service is read-only')
+
+
+def _build_engine(
+    connection: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: float,
+    pool_recycle: int,
+    echo: bool,
+):
+    """Build an engine with a connection pool, sharing SQLite connections between threads."""
+    url = make_url(connection)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(
+            url,
+            echo=echo,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+        )
+
+    connect_args = {'check_same_thread': False}
+    if url.database in (None, '', ':memory:'):
+        # each connection to an in-memory database would see a different, empty database
+        return create_engine(url, echo=echo, poolclass=StaticPool, connect_args=connect_args)
+    return create_engine(
+        url,
+        echo=echo,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        connect_args=connect_args,
+    )
+
+
+def _pathway_to_dict(pathway: Optional[Pathway]) -> Optional[Mapping[str, Optional[str]]]:
+    if pathway is None:
+        return None
+    return MappingProxyType({
+        'reactome_id': pathway.identifier,
+        'name': pathway.name,
+        'species': pathway.species.name if pathway.species else None,
+        'parent_id': pathway.parent.identifier if pathway.parent else None,
+    })
+
+
+class QueryService:
+    """A thread-safe, read-only facade over the query methods of the manager, with cached lookups."""
+
+    def __init__(
+        self,
+        connection: Optional[str] = None,
+        *,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = 3600,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        check_interval: float = 5.0,
+        echo: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Connect to the database.
+
+        :param connection: A SQLAlchemy connection string. Defaults to the one configured for Bio2BEL.
+        :param pool_size: The number of connections kept open in the pool
+        :param max_overflow: The number of connections opened beyond ``pool_size`` under load
+        :param pool_timeout: The number of seconds to wait for a connection before giving up
+        :param pool_recycle: The number of seconds after which a connection is replaced. Ignored for SQLite.
+        :param maxsize: The maximum number of cached results
+        :param ttl: The number of seconds a result is cached
+        :param check_interval: The minimum number of seconds between two reads of the version stamp
+        :param echo: If true, log the SQL statements
+        :param clock: The function giving the current time in seconds, used for the cache and the version checks
+        """
+        self.engine = _build_engine(
+            get_connection(connection=connection),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            echo=echo,
+        )
+        session_maker = sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+        event.listen(session_maker, 'before_flush', _raise_read_only)
+        self.sessions = scoped_session(session_maker)
+        # The scoped session hands each thread its own session, so the manager can be shared
+        self.manager = Manager(engine=self.engine, session=self.sessions)
+
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._version_stamp = None
+        self._checked_at = None
+        self._invalidations = 0
+        self._method_stats = Counter()
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f'QueryService(url={self.engine.url})'
+
+    def __enter__(self) -> 'QueryService':  # noqa: D105
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:  # noqa: D105
+        self.close()
+
+    def close(self) -> None:
+        """Close the session of the calling thread and all pooled connections."""
+        self.sessions.remove()
+        self.engine.dispose()
+
+    def _run(self, func: Callable[[Manager], Any]) -> Any:
+        """Run a function of the manager in the calling thread's session, then give the connection back."""
+        try:
+            return func(self.manager)
+        finally:
+            self.sessions.remove()
+
+    def check_version(self, force: bool = False) -> bool:
+        """Clear the cache if the version stamp changed, reading it at most every ``check_interval`` seconds.
+
+        :param force: If true, read the version stamp even if it was read recently
+        :return: If the cache was cleared
+        """
+        now = self.clock()
+        with self._lock:
+            if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return False
+            first_check = self._checked_at is None
+            self._checked_at = now
+
+        version_stamp = self._run(lambda manager: manager.get_version_stamp())
+        with self._lock:
+            if version_stamp == self._version_stamp:
+                return False
+            self._version_stamp = version_stamp
+            self.cache.clear()
+            if first_check:
+                return False
+            self._invalidations += 1
+        logger.info('cleared the query cache for version stamp %s', version_stamp)
+        return True
+
+    def invalidate(self) -> None:
+        """Clear the cache."""
+        self.cache.clear()
+        with self._lock:
+            self._invalidations += 1
+
+    def _cached(self, method: str, key: Hashable, func: Callable[[Manager], Any]) -> Any:
+        self.check_version()
+        computed = []
+
+        def _compute():
+            computed.append(True)
+            return self._run(func)
+
+        rv = self.cache.get_or_compute((method, key), _compute)
+        with self._lock:
+            self._method_stats[method, 'misses' if computed else 'hits'] += 1
+        return rv
+
+    def get_metrics(self) -> Mapping[str, Any]:
+        """Get the hit and miss counts of the cache, overall and per method, and the number of invalidations."""
+        rv = dict(self.cache.get_stats())
+        with self._lock:
+            rv['invalidations'] = self._invalidations
+            rv['version_stamp'] = self._version_stamp
+            rv['methods'] = {
+                method: {'hits': self._method_stats[method, 'hits'], 'misses': self._method_stats[method, 'misses']}
+                for method, _ in sorted(self._method_stats)
+            }
+        return rv
+
+    def summarize(self) -> Mapping[str, int]:
+        """Count the pathways, proteins, chemicals, and species."""
+        return self._cached('summarize', None, lambda manager: MappingProxyType(dict(manager.summarize())))
+
+    def get_pathway(self, reactome_id: str) -> Optional[Mapping[str, Optional[str]]]:
+        """Get the identifier, name, species, and parent identifier of a pathway.
+
+        :param reactome_id: reactome identifier
+        """
+        return self._cached(
+            'get_pathway',
+            reactome_id,
+            lambda manager: _pathway_to_dict(manager.get_pathway_by_id(reactome_id)),
+        )
+
+    def get_top_level_parent(self, reactome_id: str) -> Optional[Mapping[str, Optional[str]]]:
+        """Get the pathway at the top of the hierarchy of a pathway, which is itself if it has no parent.
+
+        This is a single root, see :meth:`bio2bel_reactome.Manager.get_pathway_root`.
+
+        :param reactome_id: reactome identifier
+        """
+        return self._cached(
+            'get_top_level_parent',
+            reactome_id,
+            lambda manager: _pathway_to_dict(manager.get_pathway_root(reactome_id)),
+        )
+
+    def get_gene_sets(self, species: Optional[str] = None) -> Mapping[str, FrozenSet[str]]:
+        """Get the HGNC gene symbols of each pathway with proteins, by pathway name.
+
+        :param species: The name of the species whose pathways are included. Defaults to all.
+        """
+        return self._cached('get_gene_sets', species, lambda manager: MappingProxyType({
+            name: frozenset(hgnc_symbols)
+            for name, hgnc_symbols in manager.get_gene_sets(species=species).items()
+        }))
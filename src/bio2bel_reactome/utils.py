@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for Bio2BEL Reactome."""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Mapping, TypeVar
+
+from sqlalchemy import event
+
+__all__ = [
+    'StatementCounter',
+    'iter_in_background',
+    'TTLCache',
+]
+
+X = TypeVar('X')
+
+_DONE = object()
+
+
+class StatementCounter:
+    """Count the statements an engine sends to the database while the context is active.
+
+    Each ``execute`` and each ``executemany`` counts as a single round trip, no matter how many rows it carries.
+
+    >>> with StatementCounter(manager.engine) as counter:
+    ...     manager.count_pathways()
+    >>> counter.count
+    1
+    """
+
+    def __init__(self, engine) -> None:  # noqa: D107
+        self.engine = engine
+        self.count = 0
+
+    def _callback(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+    def __enter__(self) -> 'StatementCounter':  # noqa: D105
+        event.listen(self.engine, 'before_cursor_execute', self._callback)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:  # noqa: D105
+        event.remove(self.engine, 'before_cursor_execute', self._callback)
+
+
+def iter_in_background(iterable: Iterable[X], max_queued: int = 1) -> Iterable[X]:
+    """Produce the items of the iterable in a background thread, at most ``max_queued`` ahead of the consumer.
+
+    This overlaps the parsing of the next chunk of a file with the database writes of the current one. Exceptions
+    raised while producing are raised again in the consumer.
+
+    :param iterable: Any iterable
+    :param max_queued: The number of items produced ahead
+    """
+    items = queue.Queue(maxsize=max_queued)
+    stopped = threading.Event()
+
+    def _put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _produce():
+        try:
+            for item in iterable:
+                if not _put((None, item)):
+                    return
+        except BaseException as e:  # noqa: B902
+            _put((e, None))
+        else:
+            _put((None, _DONE))
+
+    thread = threading.Thread(target=_produce, name='reactome-producer', daemon=True)
+    thread.start()
+    try:
+        while True:
+            error, item = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+class TTLCache:
+    """A thread-safe cache that keeps at most ``maxsize`` entries, each for at most ``ttl`` seconds.
+
+    The least recently used entry is evicted when the cache is full.
+
+    >>> cache = TTLCache(maxsize=2, ttl=60)
+    >>> cache.get_or_compute('a', lambda: 1)
+    1
+    >>> cache.get_or_compute('a', lambda: 2)
+    1
+    >>> cache.hits, cache.misses
+    (1, 1)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """Build an empty cache.
+
+        :param maxsize: The maximum number of entries
+        :param ttl: The number of seconds an entry is kept
+        :param clock: The function giving the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], X]) -> X:
+        """Get the cached value of the key, or compute and cache it.
+
+        The value is computed outside the lock, so concurrent misses of the same key may compute it twice.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Mapping[str, Any]:
+        """Get the size of the cache and the counts of hits, misses, evictions, and expirations."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -3,10 +3,12 @@
 """Test constants for Bio2BEL Reactome."""
 
 import os
+from contextlib import contextmanager
+from unittest import mock
 
 import bio2bel_reactome
+from bio2bel_reactome.utils import StatementCounter
 from bio2bel.testing import TemporaryConnectionMixin
-from pyobo.mocks import _replace_mapping_getter
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 resources_path = os.path.join(dir_path, 'resources')
@@ -16,8 +18,20 @@ pathway_hierarchy = os.path.join(resources_path, 'ReactomePathwaysRelation.txt')
 proteins_to_reactome = os.path.join(resources_path, 'UniProt2Reactome_All_Levels.txt')
 chemicals_to_reactome = os.path.join(resources_path, 'ChEBI2Reactome_All_Levels.txt')
 
-mock_name_id_mapping = _replace_mapping_getter('bio2bel_reactome.manager.get_name_id_mapping', {
-    'ncbitaxon': {
+# A later release of the test data, with added, removed, renamed, and moved pathways and memberships
+next_release_path = os.path.join(resources_path, 'next_release')
+next_pathways = os.path.join(next_release_path, 'ReactomePathways.txt')
+next_pathway_hierarchy = os.path.join(next_release_path, 'ReactomePathwaysRelation.txt')
+next_proteins_to_reactome = os.path.join(next_release_path, 'UniProt2Reactome_All_Levels.txt')
+next_chemicals_to_reactome = os.path.join(next_release_path, 'ChEBI2Reactome_All_Levels.txt')
+
+# The hierarchy of the test data with a second parent for R-HSA-389357, from another hierarchy
+multiple_parents_hierarchy = os.path.join(resources_path, 'multiple_parents', 'ReactomePathwaysRelation.txt')
+
+# Replaces the PyOBO species and ChEBI name mappings, for every caller of the mappings module
+mock_name_id_mapping = mock.patch.multiple(
+    'bio2bel_reactome.parsers.mappings',
+    _load_species_name_to_id=mock.Mock(return_value={
         'Arabidopsis thaliana': '3702',
         'Bos taurus': '9913',
         'Caenorhabditis elegans': '6239',
@@ -36,8 +50,14 @@ mock_name_id_mapping = _replace_mapping_getter('bio2bel_reactome.manager.get_nam
         'Sus scrofa': '9823',
         'Taeniopygia guttata': '59729',
         'Xenopus tropicalis': '8364',
-    },
-})
+    }),
+    _load_chebi_id_to_name=mock.Mock(return_value={
+        '15422': 'ATP',
+        '16618': '1-phosphatidyl-1D-myo-inositol 3-phosphate',
+        '16761': 'ADP',
+        '18348': '1-phosphatidyl-1D-myo-inositol 4,5-bisphosphate',
+    }),
+)
 
 
 class DatabaseMixin(TemporaryConnectionMixin):
@@ -45,6 +65,12 @@ class DatabaseMixin(TemporaryConnectionMixin):
 
     reactome_manager: bio2bel_reactome.Manager
 
+    #: The pathway hierarchy file the database is populated with
+    pathways_hierarchy_path = pathway_hierarchy
+
+    #: Extra keyword arguments for :meth:`bio2bel_reactome.Manager.populate`
+    populate_kwargs = {}
+
     @classmethod
     def setUpClass(cls):
         """Create a temporary file and populate the database."""
@@ -55,9 +81,10 @@ class DatabaseMixin(TemporaryConnectionMixin):
         with mock_name_id_mapping:
             cls.reactome_manager.populate(
                 pathways_path=pathways,
-                pathways_hierarchy_path=pathway_hierarchy,
+                pathways_hierarchy_path=cls.pathways_hierarchy_path,
                 pathways_proteins_path=proteins_to_reactome,
                 pathways_chemicals_path=chemicals_to_reactome,
+                **cls.populate_kwargs,
             )
 
     @classmethod
@@ -65,3 +92,10 @@ class DatabaseMixin(TemporaryConnectionMixin):
         """Close the connection in the manager and deletes the temporary database."""
         cls.reactome_manager.session.close()
         super().tearDownClass()
+
+    @contextmanager
+    def assertQueryCount(self, expected: int):  # noqa: N802
+        """Assert that the code in the context sends the given number of statements to the database."""
+        with StatementCounter(self.reactome_manager.engine) as counter:
+            yield counter
+        self.assertEqual(expected, counter.count, msg=f'expected {expected} queries, got {counter.count}')
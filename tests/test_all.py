@@ -2,8 +2,13 @@
 
 """This module contains the tests related with the graph enrichment."""
 
+from unittest import mock
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+
 from bio2bel_reactome.constants import CHEBI, UNIPROT
-from bio2bel_reactome.models import Chemical, Pathway
+from bio2bel_reactome.models import Chemical, LOOKUP_INDEXES, Pathway, protein_pathway
 from pybel.dsl import abundance, protein
 from tests.constants import DatabaseMixin
 
@@ -67,6 +72,35 @@ class TestGlobal(DatabaseMixin):
         self.assertIsNotNone(protein, 'Protein not found')
         self.assertEqual(3, len(protein.pathways))
 
+    def test_protein_pathway_unique(self):
+        """Test that the same protein-pathway edge can not be stored twice."""
+        protein = self.reactome_manager.get_protein_by_uniprot_id('P08237')
+        pathway = self.reactome_manager.get_pathway_by_id('R-HSA-389356')
+        self.assertIn(pathway, protein.pathways)
+
+        with self.assertRaises(IntegrityError):
+            self.reactome_manager.session.execute(
+                protein_pathway.insert(),
+                {'protein_id': protein.id, 'pathway_id': pathway.id},
+            )
+        self.reactome_manager.session.rollback()
+
+    def test_lookup_indexes(self):
+        """Test that the lookup indexes exist after loading and serve the lookups by gene symbol."""
+        inspector = inspect(self.reactome_manager.engine)
+        index_names = {
+            index['name']
+            for table_name in {index.table.name for index in LOOKUP_INDEXES}
+            for index in inspector.get_indexes(table_name)
+        }
+        self.assertLessEqual({index.name for index in LOOKUP_INDEXES}, index_names)
+
+        plan = self.reactome_manager.session.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM reactome_protein WHERE hgnc_symbol = :symbol',
+            {'symbol': 'PFKM'},
+        ).fetchall()
+        self.assertIn('ix_reactome_protein_hgnc_symbol', ' '.join(str(row[-1]) for row in plan))
+
     def test_empty_pathway_chemicals(self):
         """Test loading a pathway with no chemicals."""
         pathway = self.reactome_manager.get_pathway_by_id('R-DME-389357')
@@ -151,18 +185,172 @@ class TestGlobal(DatabaseMixin):
         self.assertIsNotNone(granfather, msg='Pathway not found')
         self.assertEqual('R-HSA-388841', granfather.identifier)
 
+    def test_ancestors(self):
+        """Test getting the ancestors of a pathway from the hierarchy closure, closest first."""
+        ancestors = self.reactome_manager.get_pathway_ancestors('R-HSA-389359')
+        self.assertEqual(['R-HSA-389356', 'R-HSA-388841'], [pathway.identifier for pathway in ancestors])
+        self.assertEqual([], self.reactome_manager.get_pathway_ancestors('R-HSA-388841'))
+
+    def test_descendants(self):
+        """Test getting the descendants of a pathway from the hierarchy closure."""
+        descendants = self.reactome_manager.get_pathway_descendants('R-HSA-388841')
+        self.assertEqual(
+            {
+                'R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359',
+                'R-ATH-389357', 'R-CEL-389357', 'R-CFA-389357', 'R-DRE-389357', 'R-DDI-389357', 'R-DME-389357',
+            },
+            {pathway.identifier for pathway in descendants},
+        )
+        self.assertEqual({'R-HSA-389357', 'R-HSA-389359'}, {pathway.identifier for pathway in descendants[-2:]})
+        self.assertEqual([], self.reactome_manager.get_pathway_descendants('R-HSA-389359'))
+
+    def test_root_and_depth(self):
+        """Test getting the root and the depth of pathways with a single query each."""
+        with self.assertQueryCount(1):
+            root = self.reactome_manager.get_pathway_root('R-HSA-389357')
+        self.assertEqual('R-HSA-388841', root.identifier)
+        self.assertEqual('R-BTA-389357', self.reactome_manager.get_pathway_root('R-BTA-389357').identifier)
+        self.assertIsNone(self.reactome_manager.get_pathway_root('R-HSA-0'))
+
+        self.assertEqual(2, self.reactome_manager.get_pathway_depth('R-HSA-389357'))
+        self.assertEqual(1, self.reactome_manager.get_pathway_depth('R-DME-389357'))
+        self.assertEqual(0, self.reactome_manager.get_pathway_depth('R-HSA-388841'))
+        self.assertIsNone(self.reactome_manager.get_pathway_depth('R-HSA-0'))
+
+    def test_eager_loading(self):
+        """Test iterating over the human pathways with their members in a constant number of queries."""
+        self.reactome_manager.session.expunge_all()
+        with self.assertQueryCount(6):  # the species, its pathways, and one query per relationship
+            pathways = self.reactome_manager.get_human_pathways(load=['proteins', 'chemicals', 'parent', 'children'])
+            members = {
+                pathway.identifier: (
+                    {protein.uniprot_id for protein in pathway.proteins},
+                    {chemical.chebi_id for chemical in pathway.chemicals},
+                    pathway.parent.identifier if pathway.parent else None,
+                    {child.identifier for child in pathway.children},
+                )
+                for pathway in pathways
+            }
+        self.assertEqual(
+            ({'P08237', 'Q9UHC3', 'Q9H8M5'}, set(), 'R-HSA-388841', {'R-HSA-389357', 'R-HSA-389359'}),
+            members['R-HSA-389356'],
+        )
+        self.assertEqual({'15422', '16761', '16618', '18348'}, members['R-HSA-389357'][1])
+
+        self.reactome_manager.session.expunge_all()
+        with self.assertQueryCount(1):
+            descendants = self.reactome_manager.get_pathway_descendants(
+                'R-HSA-388841', load=['species'], strategy='joined',
+            )
+            species_names = {pathway.species.name for pathway in descendants}
+        self.assertEqual(7, len(species_names))
+
+        with self.assertRaises(ValueError):
+            self.reactome_manager.get_human_pathways(load=['proteins'], strategy='lazy')
+
+    def test_pathway_rows(self):
+        """Test getting the pathways as plain rows with a single query."""
+        with self.assertQueryCount(1):
+            rows = self.reactome_manager.get_pathway_rows('Homo sapiens')
+        self.assertEqual(
+            {
+                ('R-HSA-388841', 'Costimulation by the CD28 family', 'Homo sapiens', None),
+                ('R-HSA-389356', 'CD28 co-stimulation', 'Homo sapiens', 'R-HSA-388841'),
+                ('R-HSA-389357', 'CD28 dependent PI3K/Akt signaling', 'Homo sapiens', 'R-HSA-389356'),
+                ('R-HSA-389359', 'CD28 dependent Vav1 pathway', 'Homo sapiens', 'R-HSA-389356'),
+            },
+            set(rows),
+        )
+        self.assertEqual(self.reactome_manager.count_pathways(), len(self.reactome_manager.get_pathway_rows()))
+
     def test_top_hierarchy(self):
         """Test get all top hierarchy members."""
         main_pathways = self.reactome_manager.get_all_top_hierarchy_pathways()
         # Only 12 pathways are in the highest hierarchy level
         self.assertEqual(len(main_pathways), 12)
 
+    def test_gene_sets(self):
+        """Test that the gene sets are read with a single query and match the ORM relationships."""
+        for only_human in (False, True):
+            with self.assertQueryCount(1):
+                gene_sets = self.reactome_manager.get_gene_sets(only_human=only_human)
+
+            if only_human:
+                pathways = self.reactome_manager.get_human_pathways()
+            else:
+                pathways = self.reactome_manager.list_pathways()
+            self.assertEqual(
+                {
+                    pathway.name: {protein.hgnc_symbol for protein in pathway.proteins if protein.hgnc_symbol}
+                    for pathway in sorted(pathways, key=lambda pathway: pathway.id)
+                    if pathway.proteins
+                },
+                gene_sets,
+            )
+
+        self.assertEqual(
+            {'PFKM', 'ASIC3', 'CNNM1', 'CNNM2', 'CNNM3', 'CNNM4', 'SFTPD'},
+            self.reactome_manager.get_gene_sets(only_human=True)['CD28 dependent Vav1 pathway'],
+        )
+
+    def test_pathway_names_to_ids(self):
+        """Test the mapping from pathway names to identifiers."""
+        with self.assertQueryCount(1):
+            names_to_ids = self.reactome_manager.get_pathway_names_to_ids(only_human=True)
+        self.assertEqual(
+            {
+                'CD28 dependent PI3K/Akt signaling': 'R-HSA-389357',
+                'CD28 co-stimulation': 'R-HSA-389356',
+                'CD28 dependent Vav1 pathway': 'R-HSA-389359',
+                'Costimulation by the CD28 family': 'R-HSA-388841',
+            },
+            names_to_ids,
+        )
+        self.assertEqual(
+            {pathway.name for pathway in self.reactome_manager.list_pathways()},
+            set(self.reactome_manager.get_pathway_names_to_ids()),
+        )
+
     def test_get_pathway_by_id(self):
         """Test get get pathway name 2."""
         bos_taurus_cd29_pathway = self.reactome_manager.get_pathway_by_id('R-BTA-389357')
         self.assertIsNotNone(bos_taurus_cd29_pathway, msg='Pathway not found')
         self.assertEqual('R-BTA-389357', bos_taurus_cd29_pathway.identifier)
 
+    def test_batched_lookups(self):
+        """Test getting many entities by their identifiers with their relationships in a single query."""
+        self.reactome_manager.session.expunge_all()
+        with self.assertQueryCount(1):
+            proteins = self.reactome_manager.get_proteins_by_uniprot_ids(
+                ['P08237', 'Q9UHC3', 'P08237', None, 'XXXXXX'],
+                load=['pathways.species'],
+            )
+            self.assertEqual({'P08237', 'Q9UHC3'}, set(proteins))
+            self.assertEqual(
+                {('R-RNO-389357', 'Rattus norvegicus'), ('R-HSA-389356', 'Homo sapiens'),
+                 ('R-HSA-389359', 'Homo sapiens')},
+                {(pathway.identifier, pathway.species.name) for pathway in proteins['P08237'].pathways},
+            )
+
+        chemicals = self.reactome_manager.get_chemicals_by_chebi_ids(['16761', '15422'])
+        self.assertEqual({'16761', '15422'}, set(chemicals))
+        self.assertEqual('16761', chemicals['16761'].chebi_id)
+
+        species = self.reactome_manager.get_species_by_names(['Homo sapiens', 'Not a species'])
+        self.assertEqual(['Homo sapiens'], list(species))
+
+        with self.assertRaises(ValueError):
+            self.reactome_manager.get_pathways_by_ids(['R-HSA-389356'], load=['genes'])
+
+    def test_batched_lookups_chunked(self):
+        """Test that the keys of a batched lookup are split in chunks under the parameter limit."""
+        reactome_ids = ['R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359', 'R-HSA-388841', 'R-HSA-0']
+        with mock.patch('bio2bel_reactome.manager.get_max_parameters', return_value=2):
+            with self.assertQueryCount(3):
+                pathways = self.reactome_manager.get_pathways_by_ids(reactome_ids, load=['species', 'parent'])
+        self.assertEqual(set(reactome_ids[:-1]), set(pathways))
+        self.assertEqual('R-HSA-388841', pathways['R-HSA-389356'].parent.identifier)
+
     def test_gene_query_1(self):
         """Single protein query. This protein is associated with 3 pathways"""
         hgnc_gene_symbol = 'PFKM'
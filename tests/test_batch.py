@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for scoring many gene lists in batches."""
+
+import io
+import os
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+import pandas as pd
+
+from bio2bel_reactome.batch import (
+    iter_gene_list_directory, iter_gene_lists, iter_gmt, iter_scored_batches, write_enrichment_parquet,
+    write_enrichment_tsv,
+)
+from tests.constants import DatabaseMixin
+
+GENE_LISTS = [
+    ('a', ['PFKM']),
+    ('b', ['PFKM', 'CNNM2', 'ASIC3']),
+    ('c', ['CNNM1', 'CNNM3', 'SFTPD', 'NOT_A_GENE']),
+    ('d', ['NOT_A_GENE']),
+    ('e', []),
+]
+
+
+class TestReaders(unittest.TestCase):
+    """Test reading gene lists."""
+
+    def test_directory(self):
+        """Test reading one gene list per file, skipping comments, empty lines, and hidden files."""
+        with tempfile.TemporaryDirectory() as directory:
+            for file_name, text in [('b.txt', 'PFKM\n\n# a comment\nCNNM2\n'), ('a', 'SFTPD\n'), ('.hidden', 'X\n')]:
+                with open(os.path.join(directory, file_name), 'w') as file:
+                    file.write(text)
+            os.mkdir(os.path.join(directory, 'c'))
+
+            expected = [('a', ['SFTPD']), ('b', ['PFKM', 'CNNM2'])]
+            self.assertEqual(expected, list(iter_gene_list_directory(directory)))
+            self.assertEqual(expected, list(iter_gene_lists(directory)))
+
+    def test_gmt(self):
+        """Test reading one gene list per line of a GMT file."""
+        file = io.StringIO('a\tdescription\tPFKM\tCNNM2\r\n\nb\t\tSFTPD\t\nc\t\n')
+        self.assertEqual([('a', ['PFKM', 'CNNM2']), ('b', ['SFTPD']), ('c', [])], list(iter_gmt(file)))
+
+
+class TestBatch(DatabaseMixin):
+    """Test scoring gene lists in batches against the enrichment index."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database and build the index."""
+        super().setUpClass()
+        cls.index = cls.reactome_manager.get_enrichment_index(hierarchy=True)
+
+    def _get_expected(self) -> pd.DataFrame:
+        expected = self.index.enrich([genes for _, genes in GENE_LISTS])
+        expected.insert(0, 'list', [GENE_LISTS[query][0] for query in expected['query']])
+        return expected.drop(columns=['query', 'pathway_code'])
+
+    def test_batches(self):
+        """Test that the batches have the results of a single enrichment, in order, in and out of process."""
+        expected = self._get_expected()
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                batches = list(iter_scored_batches(self.index, iter(GENE_LISTS), batch_size=2, workers=workers))
+                self.assertEqual([2, 2, 1], [count for count, _ in batches])
+                actual = pd.concat([df for _, df in batches], ignore_index=True)
+                pd.testing.assert_frame_equal(expected, actual)
+
+    def test_collapse(self):
+        """Test keeping the leaf-most significant pathways of each list."""
+        batches = iter_scored_batches(self.index, GENE_LISTS, batch_size=2, collapse=True, alpha=1.0)
+        df = pd.concat([df for _, df in batches], ignore_index=True)
+        self.assertTrue(df['significant'].all())
+        self.assertFalse(df['redundant'].any())
+        self.assertNotIn('R-HSA-389356', set(df['pathway_id']))
+
+    def test_tsv(self):
+        """Test that the TSV file has a single header and all rows."""
+        file = io.StringIO()
+        lists, rows = write_enrichment_tsv(iter_scored_batches(self.index, GENE_LISTS, batch_size=2), file)
+        self.assertEqual(len(GENE_LISTS), lists)
+        file.seek(0)
+        pd.testing.assert_frame_equal(self._get_expected(), pd.read_csv(file, sep='\t'))
+        self.assertEqual(rows, len(self._get_expected().index))
+
+    @unittest.skipIf(find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        """Test that the Parquet file has all rows, even if the first batch has none."""
+        gene_lists = [('d', ['NOT_A_GENE'])] + GENE_LISTS
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.parquet')
+            batches = iter_scored_batches(self.index, gene_lists, batch_size=1, hierarchy=True)
+            lists, rows = write_enrichment_parquet(batches, path)
+            df = pd.read_parquet(path)
+
+        self.assertEqual(len(gene_lists), lists)
+        self.assertEqual(rows, len(df.index))
+        self.assertEqual(self._get_expected()['pathway_id'].tolist(), df['pathway_id'].tolist())
+        self.assertIn('redundant', df.columns)
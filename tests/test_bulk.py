@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for loading the database with batched inserts."""
+
+import unittest
+
+from sqlalchemy import create_engine, select
+
+from bio2bel_reactome.bulk import bulk_insert, reset_sequences
+from bio2bel_reactome.models import Pathway, Species, chemical_pathway, protein_pathway
+from tests import test_all
+
+
+class TestBulk(test_all.TestGlobal):
+    """Run the same checks as :class:`tests.test_all.TestGlobal` on a database loaded in bulk."""
+
+    populate_kwargs = {'bulk': True, 'chunksize': 3}
+
+    def test_association_counts(self):
+        """Check the association tables have one row per distinct pair from the test data."""
+        connection = self.reactome_manager.engine
+        self.assertEqual(16, len(connection.execute(select([protein_pathway])).fetchall()))
+        self.assertEqual(4, len(connection.execute(select([chemical_pathway])).fetchall()))
+
+    def test_parent_links(self):
+        """Check the number of pathways that received a parent from the hierarchy file."""
+        n_children = self.reactome_manager.session.query(Pathway).filter(Pathway.parent_id.isnot(None)).count()
+        self.assertEqual(9, n_children)
+
+
+class TestResetSequences(unittest.TestCase):
+    """Test moving the sequences of the primary keys past the inserted rows."""
+
+    def test_postgresql(self):
+        """Test that one statement per table is sent on PostgreSQL."""
+        statements = []
+        engine = create_engine(
+            'postgresql://', strategy='mock',
+            executor=lambda statement, *multiparams, **params: statements.append((str(statement), params)),
+        )
+        tables = [Species.__table__, Pathway.__table__]
+        self.assertEqual(tables, reset_sequences(engine, tables))
+        self.assertEqual(2, len(statements))
+        self.assertIn('FROM reactome_pathway', statements[1][0])
+        self.assertEqual({'table_name': 'reactome_pathway'}, statements[1][1])
+
+    def test_other(self):
+        """Test that nothing is sent on other databases."""
+        engine = create_engine('sqlite://')
+        with engine.begin() as connection:
+            self.assertEqual([], reset_sequences(connection, [Species.__table__]))
+
+
+class TestBulkInsert(unittest.TestCase):
+    """Test inserting rows while skipping the ones already stored."""
+
+    def test_ignore_duplicates(self):
+        """Test that rows repeated across chunks or already in the table are skipped on SQLite."""
+        engine = create_engine('sqlite://')
+        protein_pathway.create(engine)
+        rows = [{'protein_id': 1, 'pathway_id': 1}, {'protein_id': 1, 'pathway_id': 2}]
+        with engine.begin() as connection:
+            bulk_insert(connection, protein_pathway, rows, chunksize=1, ignore_duplicates=True)
+            bulk_insert(connection, protein_pathway, rows + rows, chunksize=1, ignore_duplicates=True)
+        self.assertEqual(2, len(engine.execute(select([protein_pathway])).fetchall()))
+
+    def test_postgresql(self):
+        """Test that conflicts on the primary key do nothing on PostgreSQL."""
+        statements = []
+        engine = create_engine(
+            'postgresql://', strategy='mock',
+            executor=lambda statement, *multiparams, **params: statements.append(statement),
+        )
+        bulk_insert(engine, protein_pathway, [{'protein_id': 1, 'pathway_id': 1}], ignore_duplicates=True)
+        self.assertIn('ON CONFLICT DO NOTHING', str(statements[0].compile(dialect=engine.dialect)))
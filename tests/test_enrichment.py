@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the in-memory enrichment index."""
+
+import unittest
+from math import comb
+
+from bio2bel_reactome.enrichment import EnrichmentIndex, hypergeometric_sf
+from bio2bel_reactome.hierarchy import PathwayHierarchy
+from bio2bel_reactome.parsers.pathway_hierarchy import get_pathway_hierarchy_df
+from tests.constants import DatabaseMixin, multiple_parents_hierarchy
+
+QUERIES = [
+    ['PFKM'],
+    ['PFKM', 'CNNM2', 'ASIC3'],
+    ['CNNM1', 'CNNM3', 'SFTPD', 'NOT_A_GENE'],
+    ['NOT_A_GENE'],
+    [],
+]
+
+
+def _fisher_greater(k: int, n_universe: int, n_pathway: int, n_query: int) -> float:
+    return sum(
+        comb(n_pathway, i) * comb(n_universe - n_pathway, n_query - i)
+        for i in range(k, min(n_pathway, n_query) + 1)
+    ) / comb(n_universe, n_query)
+
+
+class TestEnrichmentIndex(DatabaseMixin):
+    """Test the enrichment index against the database queries."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database and build the index."""
+        super().setUpClass()
+        cls.index = cls.reactome_manager.get_enrichment_index()
+
+    def test_matches_query_hgnc_symbols(self):
+        """Test that the results match the database query, apart from the added p-values."""
+        for symbols, results in zip(QUERIES, self.index.query_many(QUERIES)):
+            with self.subTest(symbols=symbols):
+                expected = self.reactome_manager.query_hgnc_symbols(symbols)
+                for result in results.values():
+                    self.assertIsInstance(result.pop('p_value'), float)
+                self.assertEqual(expected, results)
+
+    def test_p_values(self):
+        """Test the p-values against the exact hypergeometric tail."""
+        n_universe = len(self.index.entities)
+        df = self.index.enrich(QUERIES)
+        self.assertLess(0, len(df.index))
+        for row in df.itertuples():
+            self.assertAlmostEqual(
+                _fisher_greater(row.overlap, n_universe, row.pathway_size, row.query_size),
+                row.p_value,
+            )
+
+    def test_hypergeometric_sf(self):
+        """Test the vectorized tail on a larger universe."""
+        p_values = hypergeometric_sf([1, 3, 5], 1000, [10, 40, 5], [20, 50, 5])
+        for p_value, args in zip(p_values, [(1, 1000, 10, 20), (3, 1000, 40, 50), (5, 1000, 5, 5)]):
+            self.assertAlmostEqual(_fisher_greater(*args), p_value)
+
+    def test_species(self):
+        """Test restricting the index to the pathways of one species."""
+        index = self.reactome_manager.get_enrichment_index(species='Rattus norvegicus')
+        self.assertEqual(['R-RNO-389357'], index.pathway_ids)
+        self.assertEqual({'R-RNO-389357'}, set(index.query(['PFKM', 'CNNM2'])))
+
+    def test_chemicals(self):
+        """Test indexing the chemicals by ChEBI identifier."""
+        index = self.reactome_manager.get_enrichment_index(chemicals=True)
+        result = index.query(['16761', '15422'])
+        self.assertEqual({'R-HSA-389357'}, set(result))
+        self.assertEqual(2, result['R-HSA-389357']['mapped_proteins'])
+        self.assertEqual(4, result['R-HSA-389357']['pathway_size'])
+
+
+class TestHierarchyEnrichment(DatabaseMixin):
+    """Test annotating the enrichment results with the pathway hierarchy."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database and build the index with the hierarchy."""
+        super().setUpClass()
+        cls.index = cls.reactome_manager.get_enrichment_index(hierarchy=True)
+
+    def test_queries(self):
+        """Test that the hierarchy is read with one more query."""
+        with self.assertQueryCount(2):
+            self.reactome_manager.get_enrichment_index(hierarchy=True)
+
+    def test_same_as_database(self):
+        """Test that the depths and roots are the ones of the closure table."""
+        df = self.index.enrich_hierarchy(QUERIES)
+        self.assertLess(0, len(df.index))
+        for row in df.itertuples():
+            self.assertEqual(self.reactome_manager.get_pathway_depth(row.pathway_id), row.depth)
+            self.assertEqual(self.reactome_manager.get_pathway_root(row.pathway_id).identifier, row.root_id)
+            self.assertEqual(row.depth == 0, row.is_root)
+
+    def test_redundant(self):
+        """Test that significant ancestors of significant pathways are flagged, per query."""
+        df = self.index.enrich_hierarchy(QUERIES, alpha=1.0)
+        redundant = {(row.query, row.pathway_id) for row in df.itertuples() if row.redundant}
+        self.assertEqual({(0, 'R-HSA-389356'), (1, 'R-HSA-389356')}, redundant)
+
+        # the child is not significant anymore
+        df = self.index.enrich_hierarchy(QUERIES, alpha=0.5)
+        self.assertFalse(df['redundant'].any())
+        self.assertEqual((df['p_value'] <= 0.5).tolist(), df['significant'].tolist())
+
+    def test_collapse(self):
+        """Test keeping only the leaf-most significant pathways."""
+        df = self.reactome_manager.enrich_with_hierarchy(QUERIES, alpha=1.0, collapse=True)
+        self.assertEqual(
+            {
+                (0, 'R-HSA-389359'), (0, 'R-RNO-389357'),
+                (1, 'R-HSA-389359'), (1, 'R-RNO-389357'),
+                (2, 'R-HSA-389359'), (2, 'R-RNO-389357'),
+            },
+            set(zip(df['query'], df['pathway_id'])),
+        )
+
+    def test_without_hierarchy(self):
+        """Test that the annotation needs the hierarchy."""
+        index = self.reactome_manager.get_enrichment_index()
+        with self.assertRaises(ValueError):
+            index.enrich_hierarchy(QUERIES)
+
+
+class TestMultipleParentsEnrichment(unittest.TestCase):
+    """Test the hierarchy annotations of a pathway with two parents."""
+
+    def setUp(self):
+        """Index a pathway with all of its ancestors, which all share its genes, and an unrelated pathway."""
+        pathway_ids = ['R-BTA-389357', 'R-HSA-388841', 'R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359']
+        members = [['A', 'B', 'C'], ['A', 'B', 'C', 'D'], ['A', 'B', 'C'], ['A', 'B'], ['E']]
+        entities = sorted({entity for genes in members for entity in genes})
+        self.index = EnrichmentIndex(
+            pathway_ids=pathway_ids,
+            pathway_names=pathway_ids,
+            entities=entities,
+            pathway_codes=[code for code, genes in enumerate(members) for _ in genes],
+            entity_codes=[entities.index(entity) for genes in members for entity in genes],
+        )
+        self.index.set_hierarchy(
+            PathwayHierarchy.from_dataframe(get_pathway_hierarchy_df(url=multiple_parents_hierarchy)),
+        )
+
+    def test_redundant(self):
+        """Test that the ancestors through both parents are flagged, while the root follows the last parent."""
+        df = self.index.enrich_hierarchy([['A', 'B']], alpha=1.0).set_index('pathway_id')
+        self.assertEqual(
+            {'R-BTA-389357': True, 'R-HSA-388841': True, 'R-HSA-389356': True, 'R-HSA-389357': False},
+            df['redundant'].to_dict(),
+        )
+        self.assertEqual('R-BTA-389357', df.loc['R-HSA-389357', 'root_id'])
+        self.assertEqual(1, df.loc['R-HSA-389357', 'depth'])
+
+    def test_collapse(self):
+        """Test that collapsing keeps only the pathway whose parents are all significant."""
+        df = self.index.enrich_hierarchy([['A', 'B']], alpha=1.0, collapse=True)
+        self.assertEqual(['R-HSA-389357'], df['pathway_id'].tolist())
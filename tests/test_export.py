@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for exporting the pathway memberships as BEL."""
+
+import io
+import itertools as itt
+import json
+
+import pybel
+from bio2bel.compath import CompathManager
+from bio2bel_reactome.export import (
+    GENE_SET_TSV_COLUMNS, iter_part_of_edges, to_bel_graph, write_bel_script, write_nodelink,
+)
+from tests.constants import DatabaseMixin
+
+
+def _get_edges(graph: pybel.BELGraph):
+    return {
+        (u.as_bel(), data['relation'], v.as_bel())
+        for u, v, data in graph.edges(data=True)
+    }
+
+
+class TestExport(DatabaseMixin):
+    """Test exporting the pathway memberships of a populated database."""
+
+    def test_same_as_compath(self):
+        """Test that the graph is the one made by walking the ORM instances."""
+        expected = CompathManager.to_bel(self.reactome_manager)
+        graph = self.reactome_manager.to_bel()
+        self.assertEqual(set(expected), set(graph))
+        self.assertEqual(_get_edges(expected), _get_edges(graph))
+        self.assertEqual(expected.name, graph.name)
+
+    def test_queries(self):
+        """Test that the edges are read with one query for the pathways and one per association table."""
+        with self.assertQueryCount(2):
+            edges = list(iter_part_of_edges(self.reactome_manager))
+        self.assertEqual(len(set(edges)), len(edges))
+
+        with self.assertQueryCount(3):
+            edges_with_chemicals = list(iter_part_of_edges(self.reactome_manager, chemicals=True))
+        self.assertEqual(len(edges) + 4, len(edges_with_chemicals))
+
+    def test_species(self):
+        """Test exporting the pathways of one species."""
+        graph = to_bel_graph(self.reactome_manager, species='Homo sapiens', chemicals=True)
+        pathway_ids = {node.identifier for node in graph if isinstance(node, pybel.dsl.BiologicalProcess)}
+        self.assertEqual({'R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359'}, pathway_ids)
+        self.assertEqual(4, sum(isinstance(node, pybel.dsl.Abundance) for node in graph))
+
+    def test_bel_script(self):
+        """Test that the BEL script has the statements PyBEL writes for the graph."""
+        file = io.StringIO()
+        count = write_bel_script(self.reactome_manager, file, chemicals=True)
+
+        graph = to_bel_graph(self.reactome_manager, chemicals=True)
+        self.assertEqual(graph.number_of_edges(), count)
+
+        expected = '\n'.join(pybel.to_bel_script_lines(graph)).splitlines()
+        lines = file.getvalue().splitlines()
+        # the first line of the header has the time
+        self.assertEqual(expected[1:len(expected) - count - 2], lines[1:len(lines) - count - 2])
+        self.assertEqual(set(expected[-count - 2:]), set(lines[-count - 2:]))
+
+    def test_nodelink(self):
+        """Test that the node-link JSON is the one PyBEL writes for the graph."""
+        file = io.StringIO()
+        count = write_nodelink(self.reactome_manager, file, chemicals=True)
+
+        graph = to_bel_graph(self.reactome_manager, chemicals=True)
+        self.assertEqual(graph.number_of_edges(), count)
+
+        expected = pybel.to_nodelink(graph)
+        actual = json.loads(file.getvalue())
+        self.assertEqual(expected['graph'], actual['graph'])
+        self.assertEqual(expected['nodes'], actual['nodes'])
+        self.assertEqual(
+            sorted(expected['links'], key=lambda link: link['key']),
+            sorted(actual['links'], key=lambda link: link['key']),
+        )
+
+        reloaded = pybel.from_nodelink(actual)
+        self.assertEqual(_get_edges(graph), _get_edges(reloaded))
+
+
+class TestGeneSetExport(DatabaseMixin):
+    """Test streaming the gene sets of a populated database."""
+
+    def _write(self, **kwargs) -> str:
+        file = io.StringIO()
+        self.reactome_manager.write_gene_sets(file, **kwargs)
+        return file.getvalue()
+
+    def test_gmt(self):
+        """Test that the GMT file has the non-empty gene sets, read with a single query."""
+        with self.assertQueryCount(1):
+            text = self._write(species='Homo sapiens')
+        lines = [line.split('\t') for line in text.splitlines()]
+        self.assertEqual(
+            {
+                name: hgnc_symbols
+                for name, hgnc_symbols in self.reactome_manager.get_gene_sets(species='Homo sapiens').items()
+                if hgnc_symbols
+            },
+            {name: set(members) for name, _, *members in lines},
+        )
+        self.assertIn(['CD28 co-stimulation', 'R-HSA-389356', 'ASIC3', 'CNNM2', 'PFKM'], lines)
+
+    def test_gmt_chemicals(self):
+        """Test adding the chemicals to the gene sets."""
+        with self.assertQueryCount(2):
+            text = self._write(chemicals=True)
+        lines = {line.split('\t')[1]: line.split('\t')[2:] for line in text.splitlines()}
+        self.assertEqual(['CHEBI:15422', 'CHEBI:16618', 'CHEBI:16761', 'CHEBI:18348'], lines['R-HSA-389357'])
+
+    def test_tsv(self):
+        """Test that the TSV file has one row per membership with the identifiers of the members."""
+        rows = [line.split('\t') for line in self._write(fmt='tsv', chemicals=True).splitlines()]
+        self.assertEqual(list(GENE_SET_TSV_COLUMNS), rows[0])
+        self.assertEqual(16 + 4, len(rows) - 1)
+        self.assertIn(['R-HSA-389357', 'CD28 dependent PI3K/Akt signaling', 'chemical', '16761', 'ADP', ''], rows)
+        reactome_ids = [row[0] for row in rows[1:]]
+        self.assertEqual(len(set(reactome_ids)), len([key for key, _ in itt.groupby(reactome_ids)]))
+
+        with self.assertRaises(ValueError):
+            self._write(fmt='gml')
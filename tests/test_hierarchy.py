@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the in-memory pathway hierarchy engine."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bio2bel_reactome.hierarchy import PathwayHierarchy
+from bio2bel_reactome.models import Pathway
+from tests.constants import DatabaseMixin, multiple_parents_hierarchy
+
+
+class TestPathwayHierarchy(unittest.TestCase):
+    """Test the engine on small hand-made hierarchies."""
+
+    def test_dag(self):
+        """Test the traversal, the topological order, and the depths of a hierarchy where a pathway has two parents."""
+        df = pd.DataFrame([('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'), ('d', 'e'), ('c', 'e')])
+        hierarchy = PathwayHierarchy.from_dataframe(df)
+
+        self.assertEqual(5, len(hierarchy))
+        self.assertEqual(['b', 'c'], hierarchy.get_children('a'))
+        self.assertEqual(['d', 'c'], hierarchy.get_parents('e'))
+        self.assertEqual(['b', 'c', 'd', 'e'], hierarchy.get_descendants('a'))
+        self.assertEqual(['d', 'c', 'b', 'a'], hierarchy.get_ancestors('e'))
+        self.assertEqual([], hierarchy.get_ancestors('a'))
+        self.assertEqual(['a'], hierarchy.get_roots())
+        self.assertEqual(['e'], hierarchy.get_leaves())
+        self.assertEqual([], hierarchy.get_cycle_pathways())
+        self.assertEqual(
+            {'a': 0, 'b': 1, 'c': 1, 'd': 2, 'e': 3},
+            {identifier: hierarchy.get_depth(identifier) for identifier in hierarchy.identifiers},
+        )
+
+        order = {identifier: position for position, identifier in enumerate(hierarchy.topological_sort())}
+        self.assertEqual(5, len(order))
+        for parent_id, child_id in df.itertuples(index=False, name=None):
+            self.assertLess(order[parent_id], order[child_id])
+
+    def test_parent_array(self):
+        """Test that the last parent listed for a pathway wins."""
+        hierarchy = PathwayHierarchy.from_dataframe(pd.DataFrame([('a', 'c'), ('b', 'c'), ('a', 'b')]))
+        parent_array = hierarchy.get_parent_array()
+        self.assertEqual(
+            {'a': None, 'b': 'a', 'c': 'b'},
+            {
+                identifier: hierarchy.identifiers[parent] if parent >= 0 else None
+                for identifier, parent in zip(hierarchy.identifiers, parent_array.tolist())
+            },
+        )
+
+    def test_cycles_and_orphans(self):
+        """Test that pathways on or below a cycle have no depth, and that unknown pathways make orphan edges."""
+        df = pd.DataFrame([('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'b'), ('d', 'e'), ('x', 'a'), ('a', None)])
+        hierarchy = PathwayHierarchy.from_dataframe(df, identifiers=['a', 'b', 'c', 'd', 'e'])
+
+        self.assertEqual([5, 6], hierarchy.orphan_edges.tolist())
+        self.assertEqual(['b', 'c', 'd', 'e'], hierarchy.get_cycle_pathways())
+        self.assertEqual(['a'], hierarchy.topological_sort())
+        self.assertIsNone(hierarchy.get_depth('e'))
+        self.assertEqual(0, hierarchy.get_depth('a'))
+        self.assertEqual(['b', 'c', 'd', 'e'], hierarchy.get_descendants('a'))
+        self.assertEqual(['c', 'b', 'a'], hierarchy.get_ancestors('d'))
+
+    def test_closure(self):
+        """Test the closure of a forest, and that a cycle is walked until its first repeated pathway."""
+        hierarchy = PathwayHierarchy.from_parent_links(
+            [10, 20, 30, 40, 50, 60],
+            [None, 10, 20, None, 60, 50],
+        )
+        ancestors, descendants, depths = hierarchy.get_closure()
+        pks = np.asarray(hierarchy.identifiers)
+        rows = set(zip(pks[ancestors].tolist(), pks[descendants].tolist(), depths.tolist()))
+        self.assertEqual(
+            {
+                (10, 10, 0), (20, 20, 0), (30, 30, 0), (40, 40, 0),
+                (10, 20, 1), (20, 30, 1), (10, 30, 2),
+                (50, 50, 0), (60, 50, 1), (60, 60, 0), (50, 60, 1),
+            },
+            rows,
+        )
+        self.assertEqual(len(rows), len(depths))
+
+    def test_transitive_closure(self):
+        """Test the closure over all parents, at the shortest distance, on a hierarchy with two parents and a cycle."""
+        df = pd.DataFrame([('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'), ('d', 'e'), ('c', 'e'), ('e', 'c')])
+        hierarchy = PathwayHierarchy.from_dataframe(df)
+        ancestors, descendants, distances = hierarchy.get_transitive_closure()
+        ids = np.array(hierarchy.identifiers, dtype=object)
+        rows = set(zip(ids[ancestors].tolist(), ids[descendants].tolist(), distances.tolist()))
+        self.assertEqual(len(rows), len(distances))
+        self.assertEqual(
+            {('e', 'e', 0), ('d', 'e', 1), ('c', 'e', 1), ('b', 'e', 2), ('a', 'e', 2)},
+            {row for row in rows if row[1] == 'e'},
+        )
+        self.assertEqual(
+            {('c', 'c', 0), ('a', 'c', 1), ('e', 'c', 1), ('d', 'c', 2), ('b', 'c', 3)},
+            {row for row in rows if row[1] == 'c'},
+        )
+        for identifier in hierarchy.identifiers:
+            self.assertEqual(
+                set(hierarchy.get_ancestors(identifier)),
+                {ancestor for ancestor, descendant, distance in rows if descendant == identifier and distance},
+            )
+
+
+class TestManagerHierarchy(DatabaseMixin):
+    """Test the engine loaded from a populated database."""
+
+    def test_get_hierarchy(self):
+        """Test that the engine agrees with the closure table, and is read with a single query."""
+        with self.assertQueryCount(1):
+            hierarchy = self.reactome_manager.get_hierarchy()
+
+        self.assertEqual(self.reactome_manager.count_pathways(), len(hierarchy))
+        self.assertEqual([], hierarchy.get_cycle_pathways())
+        self.assertEqual(0, len(hierarchy.orphan_edges))
+        for reactome_id in ('R-HSA-388841', 'R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359'):
+            self.assertEqual(
+                [pathway.identifier for pathway in self.reactome_manager.get_pathway_ancestors(reactome_id)],
+                hierarchy.get_ancestors(reactome_id),
+            )
+            self.assertEqual(
+                {pathway.identifier for pathway in self.reactome_manager.get_pathway_descendants(reactome_id)},
+                set(hierarchy.get_descendants(reactome_id)),
+            )
+            self.assertEqual(self.reactome_manager.get_pathway_depth(reactome_id), hierarchy.get_depth(reactome_id))
+
+    def test_species(self):
+        """Test loading the hierarchy of one species."""
+        hierarchy = self.reactome_manager.get_hierarchy(species='Homo sapiens')
+        self.assertEqual(['R-HSA-388841'], hierarchy.get_roots())
+        descendants = hierarchy.get_descendants('R-HSA-388841')
+        self.assertEqual(['R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359'], sorted(descendants))
+
+
+class TestMultipleParents(DatabaseMixin):
+    """Test the hierarchy edges of a pathway with two parents."""
+
+    pathways_hierarchy_path = multiple_parents_hierarchy
+
+    def _get_identifiers(self, pathways):
+        return [pathway.identifier for pathway in pathways]
+
+    def test_parents(self):
+        """Test that all parents are stored, while the parent reference keeps the last one listed."""
+        pathway = self.reactome_manager.get_pathway_by_id('R-HSA-389357')
+        self.assertEqual('R-BTA-389357', pathway.parent.identifier)
+        self.assertEqual(['R-BTA-389357', 'R-HSA-389356'], sorted(self._get_identifiers(pathway.parents)))
+        with self.assertQueryCount(1):
+            parents = self.reactome_manager.get_pathway_parents('R-HSA-389357')
+        self.assertEqual(['R-BTA-389357', 'R-HSA-389356'], self._get_identifiers(parents))
+        self.assertEqual([], self.reactome_manager.get_pathway_parents('R-HSA-388841'))
+
+    def test_ancestors_and_roots(self):
+        """Test that the recursive queries follow both parents."""
+        with self.assertQueryCount(1):
+            ancestors = self.reactome_manager.get_all_pathway_ancestors('R-HSA-389357')
+        self.assertEqual(['R-BTA-389357', 'R-HSA-388841', 'R-HSA-389356'], self._get_identifiers(ancestors))
+
+        with self.assertQueryCount(1):
+            roots = self.reactome_manager.get_pathway_roots('R-HSA-389357')
+        self.assertEqual(['R-BTA-389357', 'R-HSA-388841'], self._get_identifiers(roots))
+        self.assertEqual(
+            ['R-HSA-388841'],
+            self._get_identifiers(self.reactome_manager.get_pathway_roots('R-HSA-388841')),
+        )
+        self.assertEqual([], self.reactome_manager.get_pathway_roots('R-HSA-0000000'))
+
+    def test_descendants(self):
+        """Test that the recursive query reaches the pathways below through any of their parents."""
+        self.assertEqual(
+            ['R-HSA-389357'],
+            self._get_identifiers(self.reactome_manager.get_all_pathway_descendants('R-BTA-389357')),
+        )
+        descendants = self._get_identifiers(self.reactome_manager.get_all_pathway_descendants('R-HSA-388841'))
+        self.assertEqual(9, len(descendants))
+        self.assertIn('R-HSA-389357', descendants)
+
+    def test_closure(self):
+        """Test that the closure table follows both parents, like the recursive queries."""
+        manager = self.reactome_manager
+        ancestors = self._get_identifiers(manager.get_pathway_ancestors('R-HSA-389357'))
+        self.assertEqual(['R-BTA-389357', 'R-HSA-389356'], sorted(ancestors[:2]))
+        self.assertEqual(['R-HSA-388841'], ancestors[2:])
+        self.assertEqual(2, manager.get_pathway_depth('R-HSA-389357'))
+
+        for pathway in manager.session.query(Pathway):
+            reactome_id = pathway.identifier
+            with self.subTest(reactome_id=reactome_id):
+                self.assertEqual(
+                    self._get_identifiers(manager.get_all_pathway_ancestors(reactome_id)),
+                    sorted(self._get_identifiers(manager.get_pathway_ancestors(reactome_id))),
+                )
+                self.assertEqual(
+                    self._get_identifiers(manager.get_all_pathway_descendants(reactome_id)),
+                    sorted(self._get_identifiers(manager.get_pathway_descendants(reactome_id))),
+                )
+                roots = manager.get_pathway_roots(reactome_id)
+                self.assertIn(manager.get_pathway_root(reactome_id), roots)
+                self.assertIn(manager.get_top_hiearchy_parent_by_id(reactome_id), roots)
+
+        self.assertEqual('R-HSA-388841', manager.get_pathway_root('R-HSA-389357').identifier)
+
+    def test_engine(self):
+        """Test that the engine loaded from the database has both parents."""
+        hierarchy = self.reactome_manager.get_hierarchy()
+        self.assertEqual(['R-BTA-389357', 'R-HSA-389356'], sorted(hierarchy.get_parents('R-HSA-389357')))
+        self.assertEqual(2, hierarchy.get_depth('R-HSA-389357'))
+        self.assertEqual(0, len(hierarchy.orphan_edges))
+
+
+class TestMultipleParentsBulk(TestMultipleParents):
+    """Test the hierarchy edges of a pathway with two parents, bulk loaded."""
+
+    populate_kwargs = {'bulk': True, 'chunksize': 3}
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+"""Tests that the parsing dependencies are only imported when needed."""
+
+import subprocess
+import sys
+import unittest
+
+#: Modules that should only be imported once the database is populated, updated, or exported
+DEFERRED = [
+    'protmapper',
+    'flask_admin',
+    'bio2bel_reactome.batch',
+    'bio2bel_reactome.enrichment',
+    'bio2bel_reactome.export',
+    'bio2bel_reactome.hierarchy',
+    'bio2bel_reactome.parsers.entity_pathways',
+    'bio2bel_reactome.parsers.mappings',
+    'bio2bel_reactome.parsers.prefetch',
+]
+
+
+class TestImports(unittest.TestCase):
+    """Test the imports of the package and its command line interface."""
+
+    def _help_test_deferred(self, module: str):
+        code = f'import sys, {module}; print(*sorted(set(sys.modules).intersection({DEFERRED!r})))'
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, '-c', code],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        self.assertEqual('', result.stdout.strip())
+
+    def test_package(self):
+        """Test importing the package."""
+        self._help_test_deferred('bio2bel_reactome')
+
+    def test_cli(self):
+        """Test importing the command line interface."""
+        self._help_test_deferred('bio2bel_reactome.cli')
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the parsers."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from importlib.util import find_spec
+from unittest import mock
+
+import pandas as pd
+
+from bio2bel_reactome.parsers.entity_pathways import (
+    get_procesed_chemical_pathways_df, get_procesed_proteins_pathways_df, iter_procesed_chemical_pathways_dfs,
+    iter_procesed_proteins_pathways_dfs,
+)
+from bio2bel_reactome.parsers.artifacts import get_artifact_path, has_artifact
+from bio2bel_reactome.parsers.mappings import MappedDict, get_chebi_id_to_name, get_species_name_to_id, write_mapping
+from bio2bel_reactome.parsers.pathway_hierarchy import (
+    get_pathway_hierarchy_df, parse_pathway_hierarchy, parse_pathway_hierarchy_arrays,
+)
+from bio2bel_reactome.parsers.pathway_names import get_pathway_names_df, parse_pathway_names
+from bio2bel_reactome.parsers.prefetch import SOURCES, prefetch_sources
+from tests.constants import (
+    chemicals_to_reactome, mock_name_id_mapping, pathway_hierarchy, pathways, proteins_to_reactome,
+)
+
+
+@mock_name_id_mapping
+class TestStreaming(unittest.TestCase):
+    """Test that the streaming parsers give the same rows as reading the whole file."""
+
+    def _help_test_same(self, get_df, iter_dfs, path):
+        expected = get_df(url=path).astype(object)
+        expected = expected.where(expected.notna(), None)
+        chunks = list(iter_dfs(url=path, chunksize=4))
+
+        self.assertEqual(len(expected.index) // 4 + bool(len(expected.index) % 4), len(chunks))
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.index), 4)
+            self.assertEqual(list(expected.columns), list(chunk.columns))
+
+        actual = pd.concat([chunk.astype(object) for chunk in chunks], ignore_index=True)
+        actual = actual.where(actual.notna(), None)
+        self.assertEqual(expected.values.tolist(), actual.values.tolist())
+
+    def test_proteins(self):
+        """Test streaming the protein file."""
+        self._help_test_same(
+            get_procesed_proteins_pathways_df,
+            iter_procesed_proteins_pathways_dfs,
+            proteins_to_reactome,
+        )
+
+    def test_chemicals(self):
+        """Test streaming the chemical file."""
+        self._help_test_same(
+            get_procesed_chemical_pathways_df,
+            iter_procesed_chemical_pathways_dfs,
+            chemicals_to_reactome,
+        )
+
+
+class TestPathwayParsers(unittest.TestCase):
+    """Test the parsers of the pathway names and hierarchy files."""
+
+    def test_hierarchy(self):
+        """Test that the edges are the rows of the file, as tuples and as arrays."""
+        df = get_pathway_hierarchy_df(url=pathway_hierarchy)
+        edges = parse_pathway_hierarchy(df)
+        self.assertEqual([(row[0], row[1]) for _, row in df.iterrows()], edges)
+        self.assertIn(('R-HSA-388841', 'R-HSA-389356'), edges)
+
+        arrays = parse_pathway_hierarchy_arrays(df)
+        self.assertEqual(len(edges), len(arrays.parents))
+        self.assertEqual(len(set(arrays.identifiers)), len(arrays.identifiers))
+        self.assertEqual(
+            edges,
+            list(zip(arrays.identifiers[arrays.parents], arrays.identifiers[arrays.children])),
+        )
+
+    def test_hierarchy_indexed(self):
+        """Test indexing the edges into the identifiers of the pathway names file."""
+        reactome_ids = list(parse_pathway_names(get_pathway_names_df(url=pathways))[0])
+        df = pd.DataFrame([('R-HSA-388841', 'R-HSA-389356'), ('R-HSA-388841', 'R-HSA-0')])
+        arrays = parse_pathway_hierarchy_arrays(df, identifiers=reactome_ids)
+        self.assertEqual([reactome_ids.index('R-HSA-388841')] * 2, arrays.parents.tolist())
+        self.assertEqual([reactome_ids.index('R-HSA-389356'), -1], arrays.children.tolist())
+
+    def test_names(self):
+        """Test that the names are stripped and the species collected."""
+        df = get_pathway_names_df(url=pathways)
+        names, species = parse_pathway_names(df)
+        self.assertEqual(
+            {reactome_id: (name.strip(), species_name) for reactome_id, name, species_name in df.values},
+            names,
+        )
+        self.assertEqual(set(df[2]), species)
+        self.assertEqual(('CD28 co-stimulation', 'Homo sapiens'), names['R-HSA-389356'])
+
+
+def _to_rows(df: pd.DataFrame):
+    df = df.astype(object)
+    return df.where(df.notna(), None).values.tolist()
+
+
+@unittest.skipIf(find_spec('pyarrow') is None, 'pyarrow is not installed')
+class TestArtifacts(unittest.TestCase):
+    """Test caching the preprocessed dataframes on disk."""
+
+    def setUp(self):
+        """Copy the protein file to a temporary data directory whose files are cached."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, os.path.basename(proteins_to_reactome))
+        shutil.copyfile(proteins_to_reactome, self.path)
+
+        self.patches = [
+            mock.patch.multiple(
+                'bio2bel_reactome.parsers.artifacts',
+                SOURCES_DIR=self.directory,
+                ARTIFACTS_DIR=os.path.join(self.directory, 'artifacts'),
+            ),
+            mock.patch('bio2bel_reactome.parsers.mappings.MAPPINGS_DIR', os.path.join(self.directory, 'mappings')),
+            mock_name_id_mapping,
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.expected = _to_rows(get_procesed_proteins_pathways_df(url=proteins_to_reactome))
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.directory)
+
+    def _assert_not_processed(self):
+        return mock.patch(
+            'bio2bel_reactome.parsers.entity_pathways._process_proteins_pathways_df',
+            side_effect=AssertionError('the file was processed again'),
+        )
+
+    def test_only_data_dir(self):
+        """Test that files outside of the data directory are not cached."""
+        self.assertIsNone(get_artifact_path('proteins', proteins_to_reactome))
+        self.assertIsNone(get_artifact_path('proteins', 'https://example.com/' + os.path.basename(self.path)))
+
+    def test_dataframe(self):
+        """Test that the second read of the whole dataframe comes from the cache."""
+        self.assertFalse(has_artifact(get_artifact_path('proteins', self.path)))
+        self.assertEqual(self.expected, _to_rows(get_procesed_proteins_pathways_df(url=self.path)))
+        self.assertTrue(has_artifact(get_artifact_path('proteins', self.path)))
+
+        with self._assert_not_processed():
+            df = get_procesed_proteins_pathways_df(url=self.path)
+        self.assertEqual(self.expected, _to_rows(df))
+        self.assertEqual('category', df['uniprot_id'].dtype.name)
+
+        with self._assert_not_processed():
+            chunks = list(iter_procesed_proteins_pathways_dfs(url=self.path, chunksize=4))
+        self.assertTrue(all(len(chunk.index) <= 4 for chunk in chunks))
+        self.assertEqual(self.expected, _to_rows(pd.concat(chunks, ignore_index=True)))
+
+    def test_streaming(self):
+        """Test that the chunks are cached by the streaming parser, unless some species are skipped."""
+        list(iter_procesed_proteins_pathways_dfs(url=self.path, chunksize=4, species={'Homo sapiens'}))
+        self.assertFalse(has_artifact(get_artifact_path('proteins', self.path)))
+
+        # stopping early leaves no cache either
+        next(iter(iter_procesed_proteins_pathways_dfs(url=self.path, chunksize=4)))
+        self.assertFalse(has_artifact(get_artifact_path('proteins', self.path)))
+
+        list(iter_procesed_proteins_pathways_dfs(url=self.path, chunksize=4))
+        self.assertTrue(has_artifact(get_artifact_path('proteins', self.path)))
+
+        expected = list(iter_procesed_proteins_pathways_dfs(url=proteins_to_reactome, species={'Homo sapiens'}))
+        with self._assert_not_processed():
+            self.assertEqual(self.expected, _to_rows(get_procesed_proteins_pathways_df(url=self.path)))
+            actual = list(iter_procesed_proteins_pathways_dfs(url=self.path, species={'Homo sapiens'}))
+        self.assertEqual(
+            _to_rows(pd.concat(expected, ignore_index=True)),
+            _to_rows(pd.concat(actual, ignore_index=True)),
+        )
+
+    def test_invalidation(self):
+        """Test that the cache is not used once the file or the version of the mappings change."""
+        get_procesed_proteins_pathways_df(url=self.path)
+        artifact_path = get_artifact_path('proteins', self.path)
+
+        with mock.patch('bio2bel_reactome.parsers.artifacts.ARTIFACT_VERSION', -1):
+            self.assertNotEqual(artifact_path, get_artifact_path('proteins', self.path))
+
+        with open(self.path, 'a') as file:
+            print('P04637', 'R-HSA-0000000', 'link', 'name', 'IEA', 'Homo sapiens', sep='\t', file=file)
+        self.assertNotEqual(artifact_path, get_artifact_path('proteins', self.path))
+        self.assertFalse(has_artifact(get_artifact_path('proteins', self.path)))
+        self.assertEqual(len(self.expected) + 1, len(get_procesed_proteins_pathways_df(url=self.path).index))
+
+
+class TestMappings(unittest.TestCase):
+    """Test the trimmed, memory-mapped lookup tables."""
+
+    def setUp(self):
+        """Copy the chemical and pathway files to a temporary data directory."""
+        self.directory = tempfile.mkdtemp()
+        self.chemicals_path = os.path.join(self.directory, os.path.basename(chemicals_to_reactome))
+        self.pathways_path = os.path.join(self.directory, os.path.basename(pathways))
+        shutil.copyfile(chemicals_to_reactome, self.chemicals_path)
+        shutil.copyfile(pathways, self.pathways_path)
+
+        self.patches = [
+            mock.patch('bio2bel_reactome.parsers.artifacts.SOURCES_DIR', self.directory),
+            mock.patch('bio2bel_reactome.parsers.mappings.MAPPINGS_DIR', os.path.join(self.directory, 'mappings')),
+            mock_name_id_mapping,
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.directory)
+
+    def test_mapped_dict(self):
+        """Test reading back a written mapping."""
+        mapping = {'b': 'Β-alanine', 'a': '', 'c': 'x' * 1000}
+        write_mapping(os.path.join(self.directory, 'test'), mapping)
+        mapped = MappedDict(os.path.join(self.directory, 'test'))
+        self.assertEqual(mapping, dict(mapped))
+        self.assertNotIn('d', mapped)
+        self.assertIsNone(mapped.get('0'))
+
+        write_mapping(os.path.join(self.directory, 'empty'), {})
+        self.assertEqual({}, dict(MappedDict(os.path.join(self.directory, 'empty'))))
+
+    def test_trimmed(self):
+        """Test that the mappings are trimmed to the file and later read without loading the full mapping."""
+        full = {'16761': 'ADP', '15422': 'ATP', '99999': 'unused'}
+        with mock.patch('bio2bel_reactome.parsers.mappings._load_chebi_id_to_name', return_value=full) as load:
+            self.assertEqual(full, get_chebi_id_to_name(chemicals_to_reactome))
+            self.assertEqual({'16761': 'ADP', '15422': 'ATP'}, dict(get_chebi_id_to_name(self.chemicals_path)))
+            load.side_effect = AssertionError('the full mapping was loaded again')
+            self.assertEqual('ATP', get_chebi_id_to_name(self.chemicals_path)['15422'])
+
+    def test_species(self):
+        """Test that the species mapping is trimmed to the remapped species of the file."""
+        full = {'Homo sapiens': '9606', 'Canis lupus familiaris': '9615', 'Felis catus': '9685'}
+        with mock.patch('bio2bel_reactome.parsers.mappings._load_species_name_to_id', return_value=full):
+            self.assertEqual(
+                {'Homo sapiens': '9606', 'Canis lupus familiaris': '9615'},
+                dict(get_species_name_to_id(self.pathways_path)),
+            )
+
+
+class TestPrefetch(unittest.TestCase):
+    """Test preparing the source files concurrently."""
+
+    def test_concurrent_downloads(self):
+        """Test that the four downloads run at the same time, by having each wait for all the others."""
+        barrier = threading.Barrier(len(SOURCES), timeout=10)
+
+        def _make_download(path):
+            def _download(force_download=False):
+                barrier.wait()
+                return path
+
+            return _download
+
+        with mock.patch.multiple(
+            'bio2bel_reactome.parsers.prefetch',
+            download_pathway_names=_make_download(pathways),
+            download_pathway_hierarchy=_make_download(pathway_hierarchy),
+            download_chemicals_pathways=_make_download(chemicals_to_reactome),
+            download_proteins_pathways=_make_download(proteins_to_reactome),
+            load_chemical_annotations=mock.DEFAULT,
+            load_protein_annotations=mock.DEFAULT,
+        ) as loaders:
+            sources = prefetch_sources()
+            self.assertEqual(
+                {
+                    'pathways': pathways,
+                    'hierarchy': pathway_hierarchy,
+                    'chemicals': chemicals_to_reactome,
+                    'proteins': proteins_to_reactome,
+                },
+                {key: future.result(timeout=10) for key, future in sources.items()},
+            )
+            loaders['load_chemical_annotations'].assert_called_once_with(chemicals_to_reactome)
+            loaders['load_protein_annotations'].assert_called_once_with(proteins_to_reactome)
+
+    def test_sequential(self):
+        """Test that without parallelism the given paths are passed through untouched."""
+        sources = prefetch_sources(pathways_path=pathways, parallel=False)
+        self.assertEqual(set(SOURCES), set(sources))
+        self.assertEqual(pathways, sources['pathways'].result())
+        self.assertIsNone(sources['proteins'].result())
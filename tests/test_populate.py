@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for populating the database."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from click.testing import CliRunner
+from sqlalchemy import func, select
+
+import bio2bel_reactome
+from bio2bel_reactome.models import Chemical, Pathway, Protein, Species, protein_pathway
+from tests.constants import (
+    DatabaseMixin, chemicals_to_reactome, mock_name_id_mapping, pathway_hierarchy, pathways, proteins_to_reactome,
+)
+
+
+def _populate_round_trips(directory: str, proteins_path: str, **kwargs) -> int:
+    connection = 'sqlite:///' + os.path.join(directory, f'{os.path.basename(proteins_path)}.db')
+    manager = bio2bel_reactome.Manager(connection=connection)
+    with mock_name_id_mapping:
+        manager.populate(
+            pathways_path=pathways,
+            pathways_hierarchy_path=pathway_hierarchy,
+            pathways_proteins_path=proteins_path,
+            pathways_chemicals_path=chemicals_to_reactome,
+            **kwargs,
+        )
+    manager.session.close()
+    return manager.populate_round_trips
+
+
+class TestRoundTrips(unittest.TestCase):
+    """Check that the number of statements sent while populating does not grow with the number of rows."""
+
+    def setUp(self):
+        """Write a protein file with ten times more proteins than the test data."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.large_proteins_path = os.path.join(self.directory.name, 'large.tsv')
+        with open(proteins_to_reactome) as file, open(self.large_proteins_path, 'w') as large_file:
+            lines = [line.rstrip('\n') for line in file]
+            for i in range(10):
+                for line in lines:
+                    uniprot_id, rest = line.split('\t', 1)
+                    print(f'{uniprot_id}{i}', rest, sep='\t', file=large_file)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def _help_test_constant(self, **kwargs):
+        small = _populate_round_trips(self.directory.name, proteins_to_reactome, **kwargs)
+        large = _populate_round_trips(self.directory.name, self.large_proteins_path, **kwargs)
+        self.assertLess(0, small)
+        self.assertEqual(small, large)
+
+    def test_orm(self):
+        """Test the round trips of the ORM load are constant."""
+        self._help_test_constant()
+
+    def test_bulk(self):
+        """Test the round trips of the bulk load are constant."""
+        self._help_test_constant(bulk=True)
+
+
+class TestNewModels(DatabaseMixin):
+    """Check that models added after populating get fresh primary keys from the database."""
+
+    def test_get_or_create(self):
+        """Test adding a species, a pathway, a protein, and a chemical through the session."""
+        manager = self.reactome_manager
+        max_ids = {model: manager._get_next_id(model) - 1 for model in (Species, Pathway, Protein, Chemical)}
+
+        species = manager.get_or_create_species(taxonomy_id='0', name='Test species')
+        chemical = manager.get_or_create_chemical(chebi_id='00000', chebi_name='new chemical')
+        pathway = manager.get_or_create_pathway(
+            reactome_id='R-TST-0000000', name='new pathway', species=species, chemicals=[chemical],
+        )
+        protein = manager.get_or_create_protein('P00000')
+        protein.pathways.append(pathway)
+        manager.session.commit()
+
+        for model, instance in ((Species, species), (Pathway, pathway), (Protein, protein), (Chemical, chemical)):
+            self.assertLess(max_ids[model], instance.id)
+
+
+class TestNewModelsBulk(TestNewModels):
+    """Check that models added after populating in bulk get fresh primary keys from the database."""
+
+    populate_kwargs = {'bulk': True}
+
+
+class TestRepeatedLinks(unittest.TestCase):
+    """Check that protein-pathway pairs repeated in later chunks of the file are stored once."""
+
+    def test_repeated_links(self):
+        """Test the ORM and the bulk load of a protein file listing every pair twice."""
+        with tempfile.TemporaryDirectory() as directory:
+            proteins_path = os.path.join(directory, 'repeated.tsv')
+            with open(proteins_to_reactome) as file, open(proteins_path, 'w') as repeated_file:
+                text = file.read()
+                repeated_file.write(text + text)
+
+            for bulk in (False, True):
+                with self.subTest(bulk=bulk):
+                    manager = bio2bel_reactome.Manager(
+                        connection='sqlite:///' + os.path.join(directory, f'{bulk}.db'),
+                    )
+                    with mock_name_id_mapping:
+                        manager.populate(
+                            pathways_path=pathways,
+                            pathways_hierarchy_path=pathway_hierarchy,
+                            pathways_proteins_path=proteins_path,
+                            pathways_chemicals_path=chemicals_to_reactome,
+                            bulk=bulk,
+                            chunksize=3,
+                        )
+                    self.assertEqual(16, manager.session.scalar(select([func.count()]).select_from(protein_pathway)))
+                    manager.session.close()
+
+
+class TestBulkPopulated(DatabaseMixin):
+    """Check that a bulk load never runs on a populated database."""
+
+    def test_populated(self):
+        """Test that the method refuses, and that the command resets the database first when forced."""
+        manager = self.reactome_manager
+        summary = dict(manager.summarize())
+        with self.assertRaises(ValueError):
+            manager.populate(bulk=True)
+        self.assertEqual(summary, dict(manager.summarize()))
+
+        main = bio2bel_reactome.Manager.get_cli()
+        with mock.patch.object(bio2bel_reactome.Manager, 'populate') as populate:
+            result = CliRunner().invoke(main, ['-c', self.connection, 'populate', '--bulk', '--force'])
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertIn('Deleting the previous instance of the database', result.output)
+        self.assertTrue(populate.call_args[1]['bulk'])
+        manager.session.expire_all()
+        self.assertFalse(manager.is_populated())
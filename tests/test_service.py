@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the read-only query service."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from bio2bel_reactome.models import Species
+from bio2bel_reactome.service import QueryService, ReadOnlyError
+from tests.constants import DatabaseMixin
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):  # noqa: D107
+        self.now = 0.0
+
+    def __call__(self) -> float:  # noqa: D102
+        return self.now
+
+
+class TestQueryService(DatabaseMixin):
+    """Test the query service on a populated database."""
+
+    def setUp(self):
+        """Start a service on the test database."""
+        self.clock = FakeClock()
+        self.service = QueryService(self.connection, ttl=60, check_interval=10, clock=self.clock)
+
+    def tearDown(self):
+        """Close the service."""
+        self.service.close()
+
+    def test_get_pathway(self):
+        """Test getting a pathway, then getting it again from the cache."""
+        expected = {
+            'reactome_id': 'R-HSA-389356',
+            'name': 'CD28 co-stimulation',
+            'species': 'Homo sapiens',
+            'parent_id': 'R-HSA-388841',
+        }
+        self.assertEqual(expected, dict(self.service.get_pathway('R-HSA-389356')))
+        self.assertEqual(expected, dict(self.service.get_pathway('R-HSA-389356')))
+        self.assertIsNone(self.service.get_pathway('R-HSA-0000000'))
+
+        metrics = self.service.get_metrics()
+        self.assertEqual({'hits': 1, 'misses': 2}, metrics['methods']['get_pathway'])
+        self.assertEqual(1, metrics['hits'])
+        self.assertEqual(2, metrics['misses'])
+
+    def test_top_level_parent(self):
+        """Test getting the top of the hierarchy of a pathway."""
+        self.assertEqual('R-HSA-388841', self.service.get_top_level_parent('R-HSA-389359')['reactome_id'])
+        self.assertEqual('R-HSA-388841', self.service.get_top_level_parent('R-HSA-388841')['reactome_id'])
+
+    def test_gene_sets(self):
+        """Test getting the gene sets of a species."""
+        expected = self.reactome_manager.get_gene_sets(only_human=True)
+        self.assertEqual(expected, self.service.get_gene_sets('Homo sapiens'))
+        self.assertEqual(self.reactome_manager.get_gene_sets(), self.service.get_gene_sets())
+        self.assertEqual({}, self.service.get_gene_sets('Not a species'))
+
+    def test_threads(self):
+        """Test that concurrent lookups from many threads get consistent results."""
+        reactome_ids = ['R-HSA-389356', 'R-HSA-389357', 'R-HSA-389359', 'R-HSA-388841'] * 25
+        expected = [dict(self.service.get_pathway(reactome_id)) for reactome_id in reactome_ids[:4]] * 25
+        self.service.invalidate()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            actual = list(executor.map(lambda reactome_id: dict(self.service.get_pathway(reactome_id)), reactome_ids))
+        self.assertEqual(expected, actual)
+
+    def test_ttl(self):
+        """Test that results expire after the time to live."""
+        self.service.summarize()
+        self.clock.now += 59
+        self.service.summarize()
+        self.clock.now += 2
+        self.service.summarize()
+        self.assertEqual({'hits': 1, 'misses': 2}, self.service.get_metrics()['methods']['summarize'])
+
+    def test_version_stamp(self):
+        """Test that writing a new version stamp clears the cache once it is checked again."""
+        self.assertIsNotNone(self.reactome_manager.get_version_stamp())
+        self.service.get_pathway('R-HSA-389356')
+        self.assertEqual(1, len(self.service.cache))
+
+        with self.reactome_manager.engine.begin() as connection:
+            stamp = self.reactome_manager._write_version_stamp(connection)
+
+        # the stamp is not read again before the check interval is over
+        self.service.get_pathway('R-HSA-389356')
+        self.assertEqual(0, self.service.get_metrics()['invalidations'])
+
+        self.clock.now += 10
+        self.service.get_pathway('R-HSA-389356')
+        metrics = self.service.get_metrics()
+        self.assertEqual(1, metrics['invalidations'])
+        self.assertEqual(stamp, metrics['version_stamp'])
+        self.assertEqual({'hits': 1, 'misses': 2}, metrics['methods']['get_pathway'])
+
+    def test_read_only(self):
+        """Test that the sessions of the service can not write."""
+        session = self.service.manager.session
+        session.add(Species(taxonomy_id='0', name='Not a species'))
+        with self.assertRaises(ReadOnlyError):
+            session.flush()
+        self.service.sessions.remove()
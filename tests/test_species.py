@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for loading only some species."""
+
+import os
+import tempfile
+import unittest
+
+import bio2bel_reactome
+from tests.constants import (
+    DatabaseMixin, chemicals_to_reactome, mock_name_id_mapping, pathway_hierarchy, pathways, proteins_to_reactome,
+)
+
+
+class TestHumanOnly(DatabaseMixin):
+    """Test loading only human pathways, selected by name."""
+
+    populate_kwargs = {'species': ['Homo sapiens']}
+
+    def test_counts(self):
+        """Test that only human species, pathways, and their members are stored."""
+        self.assertEqual(
+            {'species': 1, 'pathways': 4, 'proteins': 7, 'chemicals': 4},
+            dict(self.reactome_manager.summarize()),
+        )
+
+    def test_left_out(self):
+        """Test that pathways and proteins only found in rat pathways are missing."""
+        self.assertIsNone(self.reactome_manager.get_pathway_by_id('R-RNO-389357'))
+        self.assertIsNone(self.reactome_manager.get_protein_by_uniprot_id('A0A0G2JXF7'))
+
+    def test_protein_links(self):
+        """Test that links to left out pathways are skipped."""
+        protein = self.reactome_manager.get_protein_by_uniprot_id('P08237')
+        self.assertIsNotNone(protein)
+        self.assertEqual({'R-HSA-389356', 'R-HSA-389359'}, protein.get_pathways_ids())
+
+    def test_hierarchy(self):
+        """Test that the hierarchy between the human pathways is kept."""
+        pathway = self.reactome_manager.get_pathway_by_id('R-HSA-389356')
+        self.assertEqual('R-HSA-388841', pathway.parent.identifier)
+        self.assertEqual({'R-HSA-389357', 'R-HSA-389359'}, {child.identifier for child in pathway.children})
+
+
+class TestTaxonomyBulk(TestHumanOnly):
+    """Test loading human and rat pathways in bulk, selected by NCBI taxonomy identifier."""
+
+    populate_kwargs = {'species': ['9606', '10116'], 'bulk': True}
+
+    def test_counts(self):
+        """Test that only human and rat species, pathways, and their members are stored."""
+        self.assertEqual(
+            {'species': 2, 'pathways': 5, 'proteins': 10, 'chemicals': 4},
+            dict(self.reactome_manager.summarize()),
+        )
+
+    def test_left_out(self):
+        """Test that rat pathways are stored and mouse pathways are left out."""
+        self.assertIsNotNone(self.reactome_manager.get_pathway_by_id('R-RNO-389357'))
+        self.assertIsNone(self.reactome_manager.get_pathway_by_id('R-MMU-389357'))
+
+    def test_protein_links(self):
+        """Test that links to rat pathways are kept."""
+        protein = self.reactome_manager.get_protein_by_uniprot_id('P08237')
+        self.assertIsNotNone(protein)
+        self.assertEqual({'R-HSA-389356', 'R-HSA-389359', 'R-RNO-389357'}, protein.get_pathways_ids())
+
+
+class TestUnknownSpecies(unittest.TestCase):
+    """Test that species missing from the pathway table file are rejected before anything is loaded."""
+
+    def test_unknown(self):
+        """Test a misspelled name and a taxonomy identifier of no species of the file."""
+        with tempfile.TemporaryDirectory() as directory:
+            manager = bio2bel_reactome.Manager(connection='sqlite:///' + os.path.join(directory, 'test.db'))
+            for species in (['Homo sapien'], ['Homo sapiens', '0']):
+                with self.subTest(species=species), mock_name_id_mapping, self.assertRaises(ValueError):
+                    manager.populate(
+                        pathways_path=pathways,
+                        pathways_hierarchy_path=pathway_hierarchy,
+                        pathways_proteins_path=proteins_to_reactome,
+                        pathways_chemicals_path=chemicals_to_reactome,
+                        species=species,
+                    )
+            self.assertFalse(manager.is_populated())
+            manager.session.close()
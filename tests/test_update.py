@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for updating the database to a new release."""
+
+import os
+import tempfile
+from unittest import mock
+
+import bio2bel_reactome
+from bio2bel_reactome.models import Chemical, Pathway, Protein, Species
+from tests.constants import (
+    DatabaseMixin, chemicals_to_reactome, mock_name_id_mapping, next_chemicals_to_reactome, next_pathway_hierarchy,
+    next_pathways, next_proteins_to_reactome, pathway_hierarchy, pathways, proteins_to_reactome,
+)
+
+
+def _dump(manager: bio2bel_reactome.Manager):
+    """Get the content of the database, independently of the primary keys."""
+    session = manager.session
+    return {
+        'species': sorted((species.name, species.taxonomy_id) for species in session.query(Species)),
+        'pathways': sorted(
+            (pathway.identifier, pathway.name, pathway.species.name, pathway.parent and pathway.parent.identifier)
+            for pathway in session.query(Pathway)
+        ),
+        'hierarchy': sorted(
+            (parent.identifier, pathway.identifier)
+            for pathway in session.query(Pathway)
+            for parent in pathway.parents
+        ),
+        'proteins': sorted(
+            (
+                protein.uniprot_id,
+                protein.uniprot_accession,
+                protein.hgnc_id,
+                protein.hgnc_symbol,
+                sorted(protein.get_pathways_ids()),
+            )
+            for protein in session.query(Protein)
+        ),
+        'chemicals': sorted(
+            (chemical.chebi_id, chemical.name, sorted(pathway.identifier for pathway in chemical.pathways))
+            for chemical in session.query(Chemical)
+        ),
+    }
+
+
+class TestUpdate(DatabaseMixin):
+    """Test updating a database populated with the test data to the next release."""
+
+    update_kwargs = {}
+
+    @classmethod
+    def setUpClass(cls):
+        """Populate the database with the test data, tamper with a protein, then update it."""
+        super().setUpClass()
+        protein = cls.reactome_manager.get_protein_by_uniprot_id('P08237')
+        protein.hgnc_symbol = 'OUTDATED'
+        cls.reactome_manager.session.commit()
+
+        with mock_name_id_mapping:
+            cls.changes = cls.reactome_manager.update(
+                pathways_path=next_pathways,
+                pathways_hierarchy_path=next_pathway_hierarchy,
+                pathways_proteins_path=next_proteins_to_reactome,
+                pathways_chemicals_path=next_chemicals_to_reactome,
+                **cls.update_kwargs,
+            )
+
+    def test_changes(self):
+        """Test the number of changed rows per table."""
+        self.assertEqual(
+            {
+                'reactome_species_inserted': 0,
+                'reactome_species_deleted': 1,
+                'reactome_pathway_inserted': 1,
+                'reactome_pathway_updated': 1,
+                'reactome_pathway_deleted': 1,
+                'reactome_pathway_parent_id_updated': 3,
+                'reactome_pathway_hierarchy_inserted': 2,
+                'reactome_pathway_hierarchy_deleted': 2,
+                'reactome_protein_inserted': 1,
+                'reactome_protein_updated': 1,
+                'reactome_protein_deleted': 1,
+                'reactome_protein_pathway_inserted': 2,
+                'reactome_protein_pathway_deleted': 2,
+                'reactome_chemical_inserted': 0,
+                'reactome_chemical_updated': 0,
+                'reactome_chemical_deleted': 1,
+                'reactome_chemical_pathway_inserted': 1,
+                'reactome_chemical_pathway_deleted': 1,
+            },
+            self.changes,
+        )
+
+    def test_pathways(self):
+        """Test that pathways are added, renamed, and removed, along with species that have no pathways left."""
+        self.assertIsNone(self.reactome_manager.get_pathway_by_id('R-XTR-389357'))
+        self.assertIsNone(self.reactome_manager.get_species_by_name('Xenopus tropicalis'))
+        self.assertEqual('CD28 dependent VAV1 pathway', self.reactome_manager.get_pathway_by_id('R-HSA-389359').name)
+
+        pathway = self.reactome_manager.get_pathway_by_id('R-HSA-9999999')
+        self.assertIsNotNone(pathway)
+        self.assertEqual('R-HSA-388841', pathway.parent.identifier)
+        self.assertEqual({'P12345', 'Q9UHC3'}, {protein.uniprot_id for protein in pathway.proteins})
+        self.assertEqual({'16761'}, {chemical.chebi_id for chemical in pathway.chemicals})
+
+    def test_hierarchy(self):
+        """Test that moved pathways get their new parent and dropped edges are unlinked."""
+        self.assertEqual('R-HSA-389356', self.reactome_manager.get_pathway_by_id('R-ATH-389357').parent.identifier)
+        self.assertIsNone(self.reactome_manager.get_pathway_by_id('R-DME-389357').parent)
+
+    def test_closure(self):
+        """Test that the hierarchy closure follows the new hierarchy."""
+        self.assertEqual(
+            ['R-HSA-389356', 'R-HSA-388841'],
+            [pathway.identifier for pathway in self.reactome_manager.get_pathway_ancestors('R-ATH-389357')],
+        )
+        self.assertEqual(0, self.reactome_manager.get_pathway_depth('R-DME-389357'))
+        self.assertEqual(1, self.reactome_manager.get_pathway_depth('R-HSA-9999999'))
+
+    def test_entities(self):
+        """Test that entities without pathways are removed and stale attributes are refreshed."""
+        self.assertIsNone(self.reactome_manager.get_protein_by_uniprot_id('A0A0G2JXF7'))
+        self.assertIsNone(self.reactome_manager.get_chemical_by_chebi_id('18348'))
+        self.assertNotEqual('OUTDATED', self.reactome_manager.get_protein_by_uniprot_id('P08237').hgnc_symbol)
+        self.assertEqual(
+            {'R-HSA-389359', 'R-RNO-389357'},
+            self.reactome_manager.get_protein_by_uniprot_id('Q9H8M5').get_pathways_ids(),
+        )
+
+    def test_same_as_populate(self):
+        """Test that the updated database has the same content as one populated from the next release."""
+        with tempfile.TemporaryDirectory() as directory:
+            manager = bio2bel_reactome.Manager(connection='sqlite:///' + os.path.join(directory, 'next.db'))
+            with mock_name_id_mapping:
+                manager.populate(
+                    pathways_path=next_pathways,
+                    pathways_hierarchy_path=next_pathway_hierarchy,
+                    pathways_proteins_path=next_proteins_to_reactome,
+                    pathways_chemicals_path=next_chemicals_to_reactome,
+                    **self.update_kwargs,
+                )
+            expected = _dump(manager)
+            manager.session.close()
+
+        self.assertEqual(expected, _dump(self.reactome_manager))
+
+
+class TestUpdateSameRelease(DatabaseMixin):
+    """Test that updating to the same release changes nothing."""
+
+    def test_no_changes(self):
+        """Test that all change counts are zero."""
+        with mock_name_id_mapping:
+            changes = self.reactome_manager.update(
+                pathways_path=pathways,
+                pathways_hierarchy_path=pathway_hierarchy,
+                pathways_proteins_path=proteins_to_reactome,
+                pathways_chemicals_path=chemicals_to_reactome,
+            )
+        self.assertEqual({}, {key: count for key, count in changes.items() if count})
+
+
+class TestUpdateDownload(DatabaseMixin):
+    """Test that updating without paths downloads the latest release."""
+
+    def test_download(self):
+        """Test that each file is downloaded again, in and out of the prefetch thread pool."""
+        for prefetch in (False, True):
+            downloads = {
+                'download_pathway_names': mock.Mock(return_value=next_pathways),
+                'download_pathway_hierarchy': mock.Mock(return_value=next_pathway_hierarchy),
+                'download_chemicals_pathways': mock.Mock(return_value=next_chemicals_to_reactome),
+                'download_proteins_pathways': mock.Mock(return_value=next_proteins_to_reactome),
+            }
+            with self.subTest(prefetch=prefetch), mock_name_id_mapping, mock.patch.multiple(
+                'bio2bel_reactome.parsers.prefetch',
+                load_chemical_annotations=mock.DEFAULT,
+                load_protein_annotations=mock.DEFAULT,
+                **downloads,
+            ):
+                changes = self.reactome_manager.update(prefetch=prefetch)
+                for download in downloads.values():
+                    download.assert_called_once_with(force_download=True)
+
+            # the first update applies the next release, the second finds nothing left to change
+            self.assertEqual(not prefetch, any(changes.values()))
+        self.assertIsNotNone(self.reactome_manager.get_pathway_by_id('R-HSA-9999999'))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the utilities."""
+
+import unittest
+
+from bio2bel_reactome.utils import TTLCache, iter_in_background
+
+
+class TestIterInBackground(unittest.TestCase):
+    """Test producing the items of an iterable in a background thread."""
+
+    def test_order(self):
+        """Test that all items arrive in order."""
+        self.assertEqual(list(range(100)), list(iter_in_background(range(100), max_queued=3)))
+
+    def test_error(self):
+        """Test that an error raised by the producer is raised in the consumer after the items before it."""
+        def _produce():
+            yield 1
+            yield 2
+            raise ValueError('broken line')
+
+        items = []
+        with self.assertRaises(ValueError):
+            for item in iter_in_background(_produce()):
+                items.append(item)
+        self.assertEqual([1, 2], items)
+
+    def test_stop_early(self):
+        """Test that the producer stops when the consumer stops iterating."""
+        produced = []
+
+        def _produce():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        it = iter_in_background(_produce(), max_queued=1)
+        self.assertEqual(0, next(it))
+        it.close()
+        self.assertLess(len(produced), 10)
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test the cache with a time to live."""
+
+    def test_evict_least_recently_used(self):
+        """Test that the least recently used entry is evicted when the cache is full."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('b', lambda: 2)
+        cache.get_or_compute('a', lambda: 3)
+        cache.get_or_compute('c', lambda: 4)
+        self.assertEqual(1, cache.get_or_compute('a', lambda: 5))
+        self.assertEqual(6, cache.get_or_compute('b', lambda: 6))
+        self.assertEqual(2, cache.get_stats()['evictions'])
+
+    def test_expire(self):
+        """Test that an entry is computed again once it expired."""
+        now = [0.0]
+        cache = TTLCache(ttl=10, clock=lambda: now[0])
+        self.assertEqual(1, cache.get_or_compute('a', lambda: 1))
+        now[0] = 10.0
+        self.assertEqual(2, cache.get_or_compute('a', lambda: 2))
+        self.assertEqual({'hits': 0, 'misses': 2, 'expirations': 1}, {
+            key: cache.get_stats()[key]
+            for key in ('hits', 'misses', 'expirations')
+        })